@@ -1,23 +1,53 @@
 from dotenv import load_dotenv
 from flask import Flask, jsonify, make_response, Response, request
+from flask.logging import default_handler
 # from flask_cors import CORS
 
-from meal_max.models import kitchen_model
+from meal_max.models import battle_event_model, kitchen_model, matchup_model, rating_model
+from meal_max.models.arena_model import ArenaConflictError, ArenaNotFoundError, create_arena_registry
 from meal_max.models.battle_model import BattleModel
-from meal_max.utils.sql_utils import check_database_connection, check_table_exists
+from meal_max.models.matchmaking_model import find_match
+from meal_max.models.season_model import SEASON_WORKERS, run_season
+from meal_max.models.tournament_model import TournamentModel
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.migrations import run_migrations
+from meal_max.utils.metrics import CONTENT_TYPE, REGISTRY
+from meal_max.utils.random_utils import get_random_org_status
+from meal_max.utils.request_timing import init_request_timing
+from meal_max.utils.sql_profiler import SQL_PROFILER
+from meal_max.utils.sql_utils import check_database_connection, check_table_exists, get_pool_stats
 
 
 # Load environment variables from .env file
 load_dotenv()
 
 app = Flask(__name__)
+
+# Route logs go through the same background writer as the models instead of
+# Flask's handler, which writes to stderr on the request thread
+app.logger.removeHandler(default_handler)
+configure_logger(app.logger)
+
+# Request ids and a JSON timing line (SQL, random.org, serialization) per request
+init_request_timing(app)
+
+# Bring the database schema up to date before serving any requests
+run_migrations()
 # This bypasses standard security stuff we'll talk about later
 # If you get errors that use words like cross origin or flight,
 # uncomment this
 # CORS(app)
 
-# Initialize the BattleModel
-battle_model = BattleModel()
+# Each session battles in its own arena; the legacy routes share the default one.
+# With ARENA_STORE=sqlite the arenas are shared by every worker process.
+arenas = create_arena_registry()
+DEFAULT_ARENA = 'default'
+
+# Page size for /api/leaderboard when the client does not pass a limit
+LEADERBOARD_DEFAULT_LIMIT = 100
+
+# Page size for /api/battle-events when the client does not pass a limit
+BATTLE_EVENTS_DEFAULT_LIMIT = 100
 
 ####################################################
 #
@@ -58,6 +88,129 @@ def db_check() -> Response:
     except Exception as e:
         return make_response(jsonify({'error': str(e)}), 404)
 
+@app.route('/api/db-pool-stats', methods=['GET'])
+def db_pool_stats() -> Response:
+    """
+    Route to report the database connection pool counters.
+
+    Returns:
+        JSON response with checkouts, waits, wait time and pool occupancy.
+    """
+    try:
+        app.logger.info("Retrieving database pool stats")
+        return make_response(jsonify({'status': 'success', 'pool': get_pool_stats()}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving database pool stats: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/random-status', methods=['GET'])
+def random_status() -> Response:
+    """
+    Route to report the random number source and the random.org circuit breaker state.
+
+    Returns:
+        JSON response with the active source and circuit breaker counters.
+    """
+    try:
+        app.logger.info("Retrieving random source status")
+        return make_response(jsonify({'status': 'success', 'random': get_random_org_status()}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving random source status: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Route to expose request, database, random.org and activity metrics for Prometheus.
+
+    Returns:
+        Plain-text response in the Prometheus exposition format.
+    """
+    try:
+        app.logger.info("Rendering metrics")
+        return make_response(REGISTRY.render(), 200, {'Content-Type': CONTENT_TYPE})
+    except Exception as e:
+        app.logger.error(f"Error rendering metrics: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/sql-profile', methods=['GET'])
+def get_sql_profile() -> Response:
+    """
+    Route to report the SQL statement templates that took the most time while profiling was on.
+
+    Query Parameters:
+        - limit (int, optional): Maximum number of templates to return. Default is all of them.
+
+    Returns:
+        JSON response with per-template counts, time, SQLite VM steps and, for slow
+        statements, the EXPLAIN QUERY PLAN output.
+    Raises:
+        400 error if limit is invalid.
+        500 error if there is an issue building the report.
+    """
+    try:
+        try:
+            limit = request.args.get('limit', type=int)
+            report = SQL_PROFILER.get_report(limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        app.logger.info("Retrieving SQL profile")
+        return make_response(jsonify({'status': 'success', 'profile': report}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving SQL profile: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/sql-profile', methods=['POST'])
+def set_sql_profile() -> Response:
+    """
+    Route to switch SQL profiling on or off, and optionally clear what was recorded.
+
+    Expected JSON Input:
+        - enabled (bool): Whether connections handed out from now on are traced.
+        - reset (bool, optional): Clear the recorded templates first. Default is False.
+
+    Returns:
+        JSON response with the profiler state.
+    Raises:
+        400 error if enabled or reset is not a boolean.
+        500 error if there is an issue switching the profiler.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        enabled = data.get('enabled')
+        reset = data.get('reset', False)
+
+        if not isinstance(enabled, bool) or not isinstance(reset, bool):
+            return make_response(jsonify({'error': 'enabled and reset must be booleans'}), 400)
+
+        if reset:
+            SQL_PROFILER.reset()
+        if enabled:
+            SQL_PROFILER.enable()
+        else:
+            SQL_PROFILER.disable()
+
+        return make_response(jsonify({'status': 'success', 'enabled': SQL_PROFILER.enabled}), 200)
+    except Exception as e:
+        app.logger.error(f"Error switching SQL profiling: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/arena-stats', methods=['GET'])
+def arena_stats() -> Response:
+    """
+    Route to report how many battle arenas are open and how many have been evicted.
+
+    Returns:
+        JSON response with the arena registry counters.
+    """
+    try:
+        app.logger.info("Retrieving arena stats")
+        return make_response(jsonify({'status': 'success', 'arenas': arenas.get_stats()}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving arena stats: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 ##########################################################
 #
@@ -118,7 +271,7 @@ def add_meal() -> Response:
 @app.route('/api/clear-meals', methods=['DELETE'])
 def clear_catalog() -> Response:
     """
-    Route to clear all meals (recreates the table).
+    Route to clear all meals and their battle history (recreates the table).
 
     Returns:
         JSON response indicating success of the operation or error message.
@@ -202,72 +355,180 @@ def get_meal_by_name(meal_name: str) -> Response:
 ############################################################
 
 
+@app.route('/api/arenas', methods=['POST'])
+def create_arena() -> Response:
+    """
+    Route to open a new battle arena with its own list of combatants.
+
+    Returns:
+        JSON response with the id to use in the arena-scoped routes.
+    Raises:
+        500 error if there is an issue opening the arena.
+    """
+    try:
+        arena_id = arenas.create()
+        app.logger.info("Opened arena %s", arena_id)
+        return make_response(jsonify({'status': 'success', 'arena_id': arena_id}), 201)
+    except Exception as e:
+        app.logger.error(f"Error opening arena: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/arenas/<string:arena_id>', methods=['DELETE'])
+def delete_arena(arena_id: str) -> Response:
+    """
+    Route to close a battle arena and drop its combatants.
+
+    Path Parameter:
+        - arena_id (str): The arena to close.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        404 error if the arena does not exist or has expired.
+    """
+    try:
+        arenas.delete(arena_id)
+        return make_response(jsonify({'status': 'success'}), 200)
+    except ArenaNotFoundError:
+        return make_response(jsonify({'error': f"Arena {arena_id} not found"}), 404)
+    except Exception as e:
+        app.logger.error(f"Error closing arena: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 @app.route('/api/battle', methods=['GET'])
-def battle() -> Response:
+@app.route('/api/arenas/<string:arena_id>/battle', methods=['GET'])
+def battle(arena_id: str = DEFAULT_ARENA) -> Response:
     """
     Route to initiate a battle between the two currently prepared meals.
 
+    Path Parameter:
+        - arena_id (str, optional): The arena to battle in. Default is the shared arena.
+
     Returns:
         JSON response indicating the result of the battle and the winner.
     Raises:
+        404 error if the arena does not exist or has expired.
+        409 error if another request kept changing the arena at the same time.
         500 error if there is an issue during the battle.
     """
     try:
         app.logger.info('Two meals enter, one meal leaves!')
 
-        winner = battle_model.battle()
+        winner = arenas.battle(arena_id, create=arena_id == DEFAULT_ARENA)
 
         return make_response(jsonify({'status': 'success', 'winner': winner}), 200)
+    except ArenaNotFoundError:
+        return make_response(jsonify({'error': f"Arena {arena_id} not found"}), 404)
+    except ArenaConflictError as e:
+        return make_response(jsonify({'error': str(e)}), 409)
     except Exception as e:
         app.logger.error(f"Battle error: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/battles/batch', methods=['POST'])
+def battle_batch() -> Response:
+    """
+    Route to resolve many independent battles between named meals in one request.
+
+    Expected JSON Input:
+        - pairs (List[List[str]]): Pairs of meal names, first combatant first.
+
+    Returns:
+        JSON response with the winner of each pair, in the order given.
+    Raises:
+        400 error if the pairs or meals are invalid.
+        500 error if there is an issue during the battles.
+    """
+    try:
+        data = request.get_json()
+        pairs = data.get('pairs')
+
+        if not isinstance(pairs, list) or not all(
+                isinstance(pair, list) and all(isinstance(name, str) for name in pair) for pair in pairs):
+            return make_response(jsonify({'error': 'pairs must be a list of [meal, meal] name pairs'}), 400)
+
+        app.logger.info("Resolving %d battles", len(pairs))
+
+        try:
+            results = BattleModel().battle_batch([tuple(pair) for pair in pairs])
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        return make_response(jsonify({'status': 'success', 'results': results}), 200)
+    except Exception as e:
+        app.logger.error(f"Batch battle error: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 @app.route('/api/clear-combatants', methods=['POST'])
-def clear_combatants() -> Response:
+@app.route('/api/arenas/<string:arena_id>/clear-combatants', methods=['POST'])
+def clear_combatants(arena_id: str = DEFAULT_ARENA) -> Response:
     """
     Route to clear the list of combatants for the battle.
 
+    Path Parameter:
+        - arena_id (str, optional): The arena to clear. Default is the shared arena.
+
     Returns:
         JSON response indicating success of the operation.
     Raises:
+        404 error if the arena does not exist or has expired.
+        409 error if another request kept changing the arena at the same time.
         500 error if there is an issue clearing combatants.
     """
     try:
         app.logger.info('Clearing all combatants...')
-        battle_model.clear_combatants()
+        arenas.clear_combatants(arena_id, create=arena_id == DEFAULT_ARENA)
         app.logger.info('Combatants cleared.')
         return make_response(jsonify({'status': 'success'}), 200)
+    except ArenaNotFoundError:
+        return make_response(jsonify({'error': f"Arena {arena_id} not found"}), 404)
+    except ArenaConflictError as e:
+        return make_response(jsonify({'error': str(e)}), 409)
     except Exception as e:
         app.logger.error("Failed to clear combatants: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-combatants', methods=['GET'])
-def get_combatants() -> Response:
+@app.route('/api/arenas/<string:arena_id>/get-combatants', methods=['GET'])
+def get_combatants(arena_id: str = DEFAULT_ARENA) -> Response:
     """
     Route to get the list of combatants for the battle.
 
+    Path Parameter:
+        - arena_id (str, optional): The arena to read. Default is the shared arena.
+
     Returns:
         JSON response with the list of combatants.
+    Raises:
+        404 error if the arena does not exist or has expired.
     """
     try:
         app.logger.info('Getting combatants...')
-        combatants = battle_model.get_combatants()
+        combatants = arenas.get_combatants(arena_id, create=arena_id == DEFAULT_ARENA)
         return make_response(jsonify({'status': 'success', 'combatants': combatants}), 200)
+    except ArenaNotFoundError:
+        return make_response(jsonify({'error': f"Arena {arena_id} not found"}), 404)
     except Exception as e:
         app.logger.error("Failed to get combatants: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/prep-combatant', methods=['POST'])
-def prep_combatant() -> Response:
+@app.route('/api/arenas/<string:arena_id>/prep-combatant', methods=['POST'])
+def prep_combatant(arena_id: str = DEFAULT_ARENA) -> Response:
     """
     Route to prepare a prep a meal making it a combatant for a battle.
 
+    Path Parameter:
+        - arena_id (str, optional): The arena to prep in. Default is the shared arena.
+
     Parameters:
         - meal (str): The name of the meal
 
     Returns:
         JSON response indicating the success of combatant preparation.
     Raises:
+        404 error if the arena does not exist or has expired.
+        409 error if another request kept changing the arena at the same time.
         500 error if there is an issue preparing combatants.
     """
     try:
@@ -280,8 +541,11 @@ def prep_combatant() -> Response:
 
         try:
             meal = kitchen_model.get_meal_by_name(meal)
-            battle_model.prep_combatant(meal)
-            combatants = battle_model.get_combatants()
+            combatants = arenas.prep_combatant(arena_id, meal, create=arena_id == DEFAULT_ARENA)
+        except ArenaNotFoundError:
+            return make_response(jsonify({'error': f"Arena {arena_id} not found"}), 404)
+        except ArenaConflictError as e:
+            return make_response(jsonify({'error': str(e)}), 409)
         except Exception as e:
             app.logger.error("Failed to prepare combatant: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
@@ -291,6 +555,219 @@ def prep_combatant() -> Response:
         app.logger.error("Failed to prepare combatants: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/matchmake', methods=['POST'])
+@app.route('/api/arenas/<string:arena_id>/matchmake', methods=['POST'])
+def matchmake(arena_id: str = DEFAULT_ARENA) -> Response:
+    """
+    Route to pair a meal with the opponent closest to it in battle score and prep both.
+
+    Replaces whatever combatants the arena had, so a battle can follow straight away.
+
+    Path Parameter:
+        - arena_id (str, optional): The arena to prep in. Default is the shared arena.
+
+    Expected JSON Input:
+        - meal (str, optional): The meal to find an opponent for. Default is a random meal.
+        - max_gap (float, optional): The largest battle score difference to accept.
+
+    Returns:
+        JSON response with the two combatants and the gap between their scores.
+    Raises:
+        400 error if a parameter is invalid, the meal is unknown or no opponent is close enough.
+        404 error if the arena does not exist or has expired.
+        409 error if another request kept changing the arena at the same time.
+        500 error if there is an issue making the match.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        meal_name = data.get('meal')
+        max_gap = data.get('max_gap')
+
+        if max_gap is not None and (isinstance(max_gap, bool) or not isinstance(max_gap, (int, float))):
+            return make_response(jsonify({'error': 'max_gap must be a number'}), 400)
+
+        app.logger.info("Matchmaking for %s in arena %s", meal_name or 'a random meal', arena_id)
+
+        try:
+            meal, opponent = find_match(meal_name, max_gap)
+            combatants = arenas.set_combatants(arena_id, [meal, opponent], create=arena_id == DEFAULT_ARENA)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except ArenaNotFoundError:
+            return make_response(jsonify({'error': f"Arena {arena_id} not found"}), 404)
+        except ArenaConflictError as e:
+            return make_response(jsonify({'error': str(e)}), 409)
+
+        return make_response(jsonify({'status': 'success', 'combatants': combatants,
+                                      'score_gap': abs(meal.battle_score - opponent.battle_score)}), 200)
+    except Exception as e:
+        app.logger.error(f"Matchmaking error: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+@app.route('/api/battle-events', methods=['GET'])
+def get_battle_events() -> Response:
+    """
+    Route to read the battle history, oldest first, one page at a time.
+
+    Query Parameters:
+        - after_id (int): Return events after this id. Default is 0.
+        - limit (int): Maximum number of events to return, at most 1000. Default is 100.
+
+    Returns:
+        JSON response with a page of battle events and the write-behind queue counters.
+        Battles still waiting in the queue appear once it has been flushed.
+    Raises:
+        400 error if after_id or limit is invalid.
+        500 error if there is an issue reading the history.
+    """
+    try:
+        try:
+            after_id = int(request.args.get('after_id', 0))
+            limit = int(request.args.get('limit', BATTLE_EVENTS_DEFAULT_LIMIT))
+        except ValueError:
+            return make_response(jsonify({'error': 'after_id and limit must be integers'}), 400)
+        app.logger.info("Retrieving battle events after %d (limit %d)", after_id, limit)
+
+        try:
+            events = battle_event_model.get_battle_events(after_id, limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        return make_response(jsonify({'status': 'success', 'events': events,
+                                      'queue': battle_event_model.get_battle_event_log().get_stats()}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving battle events: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Tournament
+#
+############################################################
+
+
+@app.route('/api/tournament', methods=['POST'])
+def run_tournament() -> Response:
+    """
+    Route to run a whole tournament between many meals in one request.
+
+    Expected JSON Input:
+        - meals (List[str]): The names of the entrants, best seed first. At most 128 by default (TOURNAMENT_MAX_ENTRANTS).
+        - format (str): 'single_elimination', 'round_robin' or 'swiss'. Default is 'single_elimination'.
+        - rounds (int, optional): Number of Swiss rounds.
+
+    Returns:
+        JSON response with the champion, the standings and every match.
+    Raises:
+        400 error if the entrants or format are invalid.
+        500 error if there is an issue running the tournament.
+    """
+    try:
+        data = request.get_json()
+        meals = data.get('meals')
+        tournament_format = data.get('format', 'single_elimination')
+        rounds = data.get('rounds')
+
+        if not isinstance(meals, list) or not all(isinstance(meal, str) for meal in meals):
+            return make_response(jsonify({'error': 'meals must be a list of meal names'}), 400)
+        if rounds is not None and not isinstance(rounds, int):
+            return make_response(jsonify({'error': 'rounds must be an integer'}), 400)
+
+        app.logger.info("Running %s tournament with %d meals", tournament_format, len(meals))
+
+        try:
+            tournament = TournamentModel.from_meal_names(meals, tournament_format, rounds)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        result = tournament.run()
+        return make_response(jsonify({'status': 'success', **result}), 200)
+    except Exception as e:
+        app.logger.error(f"Tournament error: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/season', methods=['POST'])
+def play_season() -> Response:
+    """
+    Route to play a full round robin between every active meal and record the totals.
+
+    Seasons are unrated: the totals go to each meal's season stats and leave its
+    battles, wins, rating and leaderboard position alone.
+
+    Expected JSON Input:
+        - workers (int, optional): Worker processes to play on. Default is SEASON_WORKERS.
+        - seed (int, optional): Seed for a reproducible season.
+
+    Returns:
+        JSON response with the number of meals and battles, rated (always false) and the season standings.
+    Raises:
+        400 error if a parameter is invalid or there are too few meals.
+        500 error if there is an issue playing the season.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        workers = data.get('workers', SEASON_WORKERS)
+        seed = data.get('seed')
+
+        if not isinstance(workers, int) or (seed is not None and not isinstance(seed, int)):
+            return make_response(jsonify({'error': 'workers and seed must be integers'}), 400)
+
+        app.logger.info("Playing a season on %d worker(s)", workers)
+
+        try:
+            result = run_season(workers, seed)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        return make_response(jsonify({'status': 'success', **result}), 200)
+    except Exception as e:
+        app.logger.error(f"Season error: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/matchup-odds', methods=['GET'])
+def get_matchup_odds() -> Response:
+    """
+    Route to get the win probability of every pairing of meals, a page of rows at a time.
+
+    Query Parameters:
+        - meal (str, repeatable): Meals to compare. Default is every active meal.
+        - samples (int): Simulated battles per pairing. Default is 10000.
+        - seed (int, optional): Seed for a reproducible sampled estimate.
+        - offset (int): First meal to return a row for. Default is 0.
+        - limit (int): Maximum number of rows to return. Default is 100.
+
+    Returns:
+        JSON response with the meals, their battle scores, the page offset and the analytic and
+        sampled rows, where [i][j] is the chance meal offset + i wins when prepped first against
+        meal j, plus the next_offset to pass for the following page.
+    Raises:
+        400 error if a parameter or meal is invalid.
+        500 error if there is an issue computing the odds.
+    """
+    try:
+        meal_names = request.args.getlist('meal')
+        try:
+            samples = int(request.args.get('samples', matchup_model.MATCHUP_SAMPLES))
+            seed = request.args.get('seed')
+            seed = int(seed) if seed is not None else None
+            offset = int(request.args.get('offset', 0))
+            limit = int(request.args.get('limit', matchup_model.MATCHUP_MAX_LIMIT))
+        except ValueError:
+            return make_response(jsonify({'error': 'samples, seed, offset and limit must be integers'}), 400)
+        app.logger.info("Computing matchup odds for %s", meal_names or 'all meals')
+
+        try:
+            odds = matchup_model.get_matchup_odds(meal_names, samples, seed, offset, limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        return make_response(jsonify({'status': 'success', **odds}), 200)
+    except Exception as e:
+        app.logger.error(f"Error computing matchup odds: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 ############################################################
 #
@@ -302,27 +779,61 @@ def prep_combatant() -> Response:
 @app.route('/api/leaderboard', methods=['GET'])
 def get_leaderboard() -> Response:
     """
-    Route to get the leaderboard of meals sorted by wins, battles, or win percentage.
+    Route to get the leaderboard of meals sorted by wins, win percentage or rating, one page at a time.
 
     Query Parameters:
-        - sort (str): The field to sort by ('wins', 'battles', or 'win_pct'). Default is 'wins'.
+        - sort (str): The field to sort by ('wins', 'win_pct' or 'rating'). Default is 'wins'.
+        - limit (int): Maximum number of meals to return. Default is 100.
+        - cursor (str): The next_cursor from the previous page, to continue after it.
 
     Returns:
-        JSON response with a sorted leaderboard of meals.
+        JSON response with a sorted page of the leaderboard and the cursor for the next page
+        (null on the last page).
     Raises:
+        400 error if the limit or cursor is invalid.
         500 error if there is an issue generating the leaderboard.
     """
     try:
         sort_by = request.args.get('sort', 'wins')  # Default sort by wins
-        app.logger.info("Generating leaderboard sorted by %s", sort_by)
+        cursor = request.args.get('cursor')
+        try:
+            limit = int(request.args.get('limit', LEADERBOARD_DEFAULT_LIMIT))
+        except ValueError:
+            return make_response(jsonify({'error': 'limit must be an integer'}), 400)
+        app.logger.info("Generating leaderboard sorted by %s (limit %d)", sort_by, limit)
 
-        leaderboard_data = kitchen_model.get_leaderboard(sort_by)
+        try:
+            page = kitchen_model.get_leaderboard_page(sort_by, limit, cursor)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
 
-        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+        return make_response(jsonify({'status': 'success', 'leaderboard': page['leaderboard'],
+                                      'next_cursor': page['next_cursor']}), 200)
     except Exception as e:
         app.logger.error(f"Error generating leaderboard: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/ratings/recompute', methods=['POST'])
+def recompute_ratings() -> Response:
+    """
+    Route to rebuild every meal's rating by replaying the battle history.
+
+    Ratings are already updated with each battle; this is for repairs and
+    K-factor changes. The history is streamed in batches.
+
+    Returns:
+        JSON response with the number of battle events replayed and meals rated.
+    Raises:
+        500 error if there is an issue recomputing the ratings.
+    """
+    try:
+        app.logger.info("Recomputing ratings from battle history")
+        result = rating_model.recompute_ratings()
+        return make_response(jsonify({'status': 'success', **result}), 200)
+    except Exception as e:
+        app.logger.error(f"Error recomputing ratings: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,533 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional, TypeVar
+import uuid
+
+from meal_max.models.battle_event_model import record_battle_events
+from meal_max.models.battle_model import BattleModel, BattleResult
+from meal_max.models.kitchen_model import Meal, apply_battle_results
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Seconds an arena may sit unused before it is evicted
+ARENA_TTL = float(os.getenv("ARENA_TTL", "1800"))
+
+# Most arenas kept in memory; the least recently used one is evicted beyond this
+ARENA_MAX_COUNT = int(os.getenv("ARENA_MAX_COUNT", "10000"))
+
+# Where arena state lives: sqlite (shared by every worker process) or memory
+ARENA_STORE = os.getenv("ARENA_STORE", "sqlite")
+
+# How many times a write that lost a compare-and-swap race is retried
+ARENA_CAS_RETRIES = int(os.getenv("ARENA_CAS_RETRIES", "5"))
+
+T = TypeVar("T")
+
+
+class ArenaConflictError(RuntimeError):
+    """Raised when an arena keeps changing underneath a write, even after retries"""
+
+
+class ArenaNotFoundError(KeyError):
+    """Raised when an arena does not exist or has expired"""
+
+
+class Arena:
+    """A BattleModel owned by one session, with its own lock
+
+    Attributes:
+        arena_id (str): key of the arena in its registry
+        battle_model (BattleModel): the combatants prepped in this arena
+        last_used (float): monotonic time the arena was last checked out
+    """
+
+    def __init__(self, arena_id: str):
+        self.arena_id = arena_id
+        self.battle_model = BattleModel()
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+
+class ArenaRegistry:
+    """Keeps one Arena per session so concurrent users never share combatants
+
+    Requests for different arenas run in parallel; requests for the same
+    arena are serialized by that arena's lock. Arenas idle for longer than
+    ttl are evicted, and the least recently used arena is evicted when more
+    than max_arenas are open.
+
+    Attributes:
+        ttl (float): seconds an arena may sit unused before eviction
+        max_arenas (int): most arenas kept in memory
+    """
+
+    def __init__(self, ttl: float = ARENA_TTL, max_arenas: int = ARENA_MAX_COUNT):
+        if max_arenas < 1:
+            raise ValueError(f"Invalid max arenas: {max_arenas}. Must be at least 1.")
+
+        self.ttl = ttl
+        self.max_arenas = max_arenas
+
+        self._lock = threading.Lock()
+        self._arenas: "OrderedDict[str, Arena]" = OrderedDict()
+        self._stats = {"created": 0, "expired": 0, "evicted": 0}
+
+    def create(self, arena_id: Optional[str] = None) -> str:
+        """Opens a new, empty arena
+
+        Args:
+            arena_id (str, optional): key to use, a random one is generated if omitted
+
+        Returns:
+            str: the id of the new arena
+
+        Raises:
+            ValueError: if an arena with that id is already open
+
+        """
+        arena_id = arena_id or uuid.uuid4().hex
+        with self._lock:
+            self._evict_expired()
+            if arena_id in self._arenas:
+                logger.error("Arena %s already exists", arena_id)
+                raise ValueError(f"Arena {arena_id} already exists")
+            self._add(arena_id)
+        return arena_id
+
+    def delete(self, arena_id: str) -> None:
+        """Closes an arena and drops its combatants
+
+        Args:
+            arena_id (str): the arena to close
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist or has expired
+
+        """
+        with self._lock:
+            if self._arenas.pop(arena_id, None) is None:
+                logger.info("Arena %s not found", arena_id)
+                raise ArenaNotFoundError(f"Arena {arena_id} not found")
+        logger.info("Closed arena %s", arena_id)
+
+    @contextmanager
+    def use(self, arena_id: str, create: bool = False) -> Iterator[BattleModel]:
+        """Checks out an arena's BattleModel, holding the arena lock until the block exits
+
+        Args:
+            arena_id (str): the arena to use
+            create (bool): open the arena if it does not exist instead of failing
+
+        Yields:
+            BattleModel: the arena's battle model
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist (or has expired) and create is False
+
+        """
+        with self._lock:
+            self._evict_expired()
+            arena = self._arenas.get(arena_id)
+            if arena is None:
+                if not create:
+                    logger.info("Arena %s not found", arena_id)
+                    raise ArenaNotFoundError(f"Arena {arena_id} not found")
+                arena = self._add(arena_id)
+            arena.last_used = time.monotonic()
+            self._arenas.move_to_end(arena_id)
+
+        with arena.lock:
+            yield arena.battle_model
+
+    def get_combatants(self, arena_id: str, create: bool = False) -> List[Meal]:
+        """Returns the combatants prepped in an arena
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+
+        """
+        with self.use(arena_id, create) as battle_model:
+            return list(battle_model.get_combatants())
+
+    def prep_combatant(self, arena_id: str, meal: Meal, create: bool = False) -> List[Meal]:
+        """Adds a meal to an arena and returns the arena's combatants
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+            ValueError: if the arena already has two combatants
+
+        """
+        with self.use(arena_id, create) as battle_model:
+            battle_model.prep_combatant(meal)
+            return list(battle_model.get_combatants())
+
+    def set_combatants(self, arena_id: str, meals: List[Meal], create: bool = False) -> List[Meal]:
+        """Replaces an arena's combatants in one step and returns them
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+            ValueError: if more than two meals are given
+
+        """
+        if len(meals) > 2:
+            raise ValueError(f"Cannot set {len(meals)} combatants, an arena holds two.")
+        with self.use(arena_id, create) as battle_model:
+            battle_model.clear_combatants()
+            for meal in meals:
+                battle_model.prep_combatant(meal)
+            return list(battle_model.get_combatants())
+
+    def clear_combatants(self, arena_id: str, create: bool = False) -> None:
+        """Empties an arena's combatant list
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+
+        """
+        with self.use(arena_id, create) as battle_model:
+            battle_model.clear_combatants()
+
+    def battle(self, arena_id: str, create: bool = False) -> str:
+        """Battles the two combatants in an arena and records the result
+
+        Returns:
+            str: name of the winning meal
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+            ValueError: if fewer than two combatants are prepped
+
+        """
+        with self.use(arena_id, create) as battle_model:
+            return battle_model.battle()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Returns the registry counters for monitoring
+
+        Returns:
+            dict: open arenas, limits and created/expired/evicted counts
+
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["store"] = "memory"
+            stats["open"] = len(self._arenas)
+            stats["ttl"] = self.ttl
+            stats["max_arenas"] = self.max_arenas
+        return stats
+
+    def _add(self, arena_id: str) -> Arena:
+        arena = Arena(arena_id)
+        self._arenas[arena_id] = arena
+        self._stats["created"] += 1
+        logger.info("Opened arena %s", arena_id)
+
+        while len(self._arenas) > self.max_arenas:
+            evicted_id, _ = self._arenas.popitem(last=False)
+            self._stats["evicted"] += 1
+            logger.warning("Arena limit of %d reached, evicted least recently used arena %s",
+                           self.max_arenas, evicted_id)
+        return arena
+
+    def _evict_expired(self) -> None:
+        # Arenas are kept in last-used order, so stop at the first live one
+        cutoff = time.monotonic() - self.ttl
+        while self._arenas:
+            arena_id, arena = next(iter(self._arenas.items()))
+            if arena.last_used > cutoff:
+                break
+            del self._arenas[arena_id]
+            self._stats["expired"] += 1
+            logger.info("Arena %s expired after %.0fs idle", arena_id, self.ttl)
+
+
+class SqliteArenaRegistry:
+    """Keeps arena state in the arenas table so every worker process sees the same combatants
+
+    Writes use optimistic concurrency: the arena is read with its version,
+    changed in memory, and written back only if the version is unchanged.
+    A write that loses the race is rolled back and retried on fresh state.
+    A battle's stats are written in the same transaction as the arena, so a
+    retried battle is never counted twice.
+
+    Attributes:
+        ttl (float): seconds an arena may sit unused before it expires
+        max_arenas (int): most arenas kept; the least recently used is evicted beyond this
+        max_retries (int): retries for a write that lost a compare-and-swap race
+    """
+
+    def __init__(self, ttl: float = ARENA_TTL, max_arenas: int = ARENA_MAX_COUNT,
+                 max_retries: int = ARENA_CAS_RETRIES):
+        if max_arenas < 1:
+            raise ValueError(f"Invalid max arenas: {max_arenas}. Must be at least 1.")
+
+        self.ttl = ttl
+        self.max_arenas = max_arenas
+        self.max_retries = max_retries
+
+        # Counters are per process; the arenas themselves are shared
+        self._stats_lock = threading.Lock()
+        self._stats = {"created": 0, "expired": 0, "evicted": 0, "conflicts": 0}
+
+    def create(self, arena_id: Optional[str] = None) -> str:
+        """Opens a new, empty arena
+
+        Args:
+            arena_id (str, optional): key to use, a random one is generated if omitted
+
+        Returns:
+            str: the id of the new arena
+
+        Raises:
+            ValueError: if an arena with that id is already open
+
+        """
+        arena_id = arena_id or uuid.uuid4().hex
+        now = time.time()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            self._expire(cursor, now)
+            try:
+                cursor.execute("INSERT INTO arenas (arena_id, last_used) VALUES (?, ?)", (arena_id, now))
+            except sqlite3.IntegrityError:
+                logger.error("Arena %s already exists", arena_id)
+                raise ValueError(f"Arena {arena_id} already exists")
+            self._evict_over_limit(cursor)
+            conn.commit()
+
+        self._count("created")
+        logger.info("Opened arena %s", arena_id)
+        return arena_id
+
+    def delete(self, arena_id: str) -> None:
+        """Closes an arena and drops its combatants
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist or has expired
+
+        """
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM arenas WHERE arena_id = ? AND last_used >= ?",
+                           (arena_id, time.time() - self.ttl))
+            deleted = cursor.rowcount
+            conn.commit()
+
+        if not deleted:
+            logger.info("Arena %s not found", arena_id)
+            raise ArenaNotFoundError(f"Arena {arena_id} not found")
+        logger.info("Closed arena %s", arena_id)
+
+    def get_combatants(self, arena_id: str, create: bool = False) -> List[Meal]:
+        """Returns the combatants prepped in an arena
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+
+        """
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            battle_model, _ = self._load(cursor, arena_id, create)
+            cursor.execute("UPDATE arenas SET last_used = ? WHERE arena_id = ?", (time.time(), arena_id))
+            conn.commit()
+        return battle_model.get_combatants()
+
+    def prep_combatant(self, arena_id: str, meal: Meal, create: bool = False) -> List[Meal]:
+        """Adds a meal to an arena and returns the arena's combatants
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+            ValueError: if the arena already has two combatants
+            ArenaConflictError: if the arena kept changing during every retry
+
+        """
+        def prep(battle_model: BattleModel, cursor: sqlite3.Cursor) -> List[Meal]:
+            battle_model.prep_combatant(meal)
+            return list(battle_model.get_combatants())
+
+        return self._update(arena_id, create, prep)
+
+    def set_combatants(self, arena_id: str, meals: List[Meal], create: bool = False) -> List[Meal]:
+        """Replaces an arena's combatants in one step and returns them
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+            ValueError: if more than two meals are given
+            ArenaConflictError: if the arena kept changing during every retry
+
+        """
+        if len(meals) > 2:
+            raise ValueError(f"Cannot set {len(meals)} combatants, an arena holds two.")
+
+        def replace(battle_model: BattleModel, cursor: sqlite3.Cursor) -> List[Meal]:
+            battle_model.clear_combatants()
+            for meal in meals:
+                battle_model.prep_combatant(meal)
+            return list(battle_model.get_combatants())
+
+        return self._update(arena_id, create, replace)
+
+    def clear_combatants(self, arena_id: str, create: bool = False) -> None:
+        """Empties an arena's combatant list
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+            ArenaConflictError: if the arena kept changing during every retry
+
+        """
+        self._update(arena_id, create, lambda battle_model, cursor: battle_model.clear_combatants())
+
+    def battle(self, arena_id: str, create: bool = False) -> str:
+        """Battles the two combatants in an arena and records the result
+
+        Returns:
+            str: name of the winning meal
+
+        Raises:
+            ArenaNotFoundError: if the arena does not exist and create is False
+            ValueError: if fewer than two combatants are prepped
+            ArenaConflictError: if the arena kept changing during every retry
+
+        """
+        def battle(battle_model: BattleModel, cursor: sqlite3.Cursor) -> BattleResult:
+            # No transaction is open yet, so the random draw does not block other writers
+            result = battle_model.fight()
+            apply_battle_results(cursor, [(result.winner.id, result.loser.id)])
+            battle_model.combatants.remove(result.loser)
+            return result
+
+        # Only the attempt that committed is logged, so a retried battle appears once
+        result = self._update(arena_id, create, battle)
+        record_battle_events([result.to_event()])
+        return result.winner.meal
+
+    def get_stats(self) -> dict[str, Any]:
+        """Returns the arena counters for monitoring
+
+        Returns:
+            dict: open arenas, limits and this process's created/expired/evicted/conflict counts
+
+        """
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM arenas WHERE last_used >= ?", (time.time() - self.ttl,))
+            open_arenas = cursor.fetchone()[0]
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["store"] = "sqlite"
+        stats["open"] = open_arenas
+        stats["ttl"] = self.ttl
+        stats["max_arenas"] = self.max_arenas
+        return stats
+
+    def _load(self, cursor: sqlite3.Cursor, arena_id: str, create: bool) -> tuple[BattleModel, int]:
+        now = time.time()
+        if create:
+            # Open the arena, or reset it if it has expired, without touching a live one
+            cursor.execute("""
+                INSERT INTO arenas (arena_id, last_used) VALUES (?, ?)
+                ON CONFLICT(arena_id) DO UPDATE SET combatants = '[]', version = version + 1, last_used = excluded.last_used
+                WHERE last_used < ?
+            """, (arena_id, now, now - self.ttl))
+            if cursor.rowcount > 0:
+                # The arena was opened or reset, so hold it to the same limits as create
+                self._expire(cursor, now)
+                self._evict_over_limit(cursor)
+                self._count("created")
+                logger.info("Opened arena %s", arena_id)
+            # Commit straight away: the upsert opened a write transaction, and the
+            # caller may draw a random number (possibly from random.org) before
+            # its own write, which must not happen while holding the database lock
+            cursor.connection.commit()
+
+        cursor.execute("SELECT combatants, version FROM arenas WHERE arena_id = ? AND last_used >= ?",
+                       (arena_id, now - self.ttl))
+        row = cursor.fetchone()
+        if row is None:
+            logger.info("Arena %s not found", arena_id)
+            raise ArenaNotFoundError(f"Arena {arena_id} not found")
+
+        battle_model = BattleModel()
+        battle_model.combatants = [Meal(**combatant) for combatant in json.loads(row[0])]
+        return battle_model, row[1]
+
+    def _expire(self, cursor: sqlite3.Cursor, now: float) -> None:
+        cursor.execute("DELETE FROM arenas WHERE last_used < ?", (now - self.ttl,))
+        self._count("expired", cursor.rowcount)
+
+    def _evict_over_limit(self, cursor: sqlite3.Cursor) -> None:
+        # Keep the max_arenas most recently used arenas
+        cursor.execute("""
+            DELETE FROM arenas WHERE arena_id IN (
+                SELECT arena_id FROM arenas ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_arenas,))
+        if cursor.rowcount > 0:
+            logger.warning("Arena limit of %d reached, evicted %d least recently used arena(s)",
+                           self.max_arenas, cursor.rowcount)
+            self._count("evicted", cursor.rowcount)
+
+    def _update(self, arena_id: str, create: bool, change: Callable[[BattleModel, sqlite3.Cursor], T]) -> T:
+        for attempt in range(self.max_retries + 1):
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                battle_model, version = self._load(cursor, arena_id, create)
+                result = change(battle_model, cursor)
+
+                combatants = json.dumps([asdict(combatant) for combatant in battle_model.combatants])
+                cursor.execute(
+                    "UPDATE arenas SET combatants = ?, version = version + 1, last_used = ? WHERE arena_id = ? AND version = ?",
+                    (combatants, time.time(), arena_id, version)
+                )
+                if cursor.rowcount == 1:
+                    conn.commit()
+                    return result
+                conn.rollback()
+
+            self._count("conflicts")
+            logger.warning("Arena %s changed during update (attempt %d), retrying", arena_id, attempt + 1)
+
+        logger.error("Arena %s kept changing, gave up after %d attempts", arena_id, self.max_retries + 1)
+        raise ArenaConflictError(f"Arena {arena_id} is being modified concurrently, try again.")
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+
+ARENA_STORES = {
+    "memory": ArenaRegistry,
+    "sqlite": SqliteArenaRegistry,
+}
+
+
+def create_arena_registry(store: str = ARENA_STORE):
+    """Builds the arena registry for the configured store
+
+    Args:
+        store (str): sqlite or memory
+
+    Returns:
+        ArenaRegistry | SqliteArenaRegistry: a new registry
+
+    Raises:
+        ValueError: if no store is registered under that name
+
+    """
+    if store not in ARENA_STORES:
+        logger.error("Invalid arena store: %s", store)
+        raise ValueError(f"Invalid arena store: {store}. Must be one of {', '.join(ARENA_STORES)}.")
+    return ARENA_STORES[store]()
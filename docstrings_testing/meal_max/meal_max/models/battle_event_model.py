@@ -0,0 +1,272 @@
+import atexit
+from collections import deque
+from dataclasses import dataclass, field
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import REGISTRY
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Seconds between background flushes, and how many events one INSERT batch holds
+BATTLE_EVENTS_FLUSH_INTERVAL = float(os.getenv("BATTLE_EVENTS_FLUSH_INTERVAL", "1"))
+BATTLE_EVENTS_BATCH_SIZE = int(os.getenv("BATTLE_EVENTS_BATCH_SIZE", "500"))
+
+# Most events held in memory; new events are dropped (and counted) beyond this
+BATTLE_EVENTS_MAX_BUFFER = int(os.getenv("BATTLE_EVENTS_MAX_BUFFER", "10000"))
+
+# Largest page get_battle_events will return in one call
+BATTLE_EVENTS_MAX_LIMIT = 1000
+
+BATTLES_RECORDED = REGISTRY.counter("battles_total", "Battles whose result was recorded")
+
+
+
+@dataclass
+class BattleEvent:
+    combatant_1_id: int
+    combatant_2_id: int
+    score_1: float
+    score_2: float
+    random_number: float
+    winner_id: int
+    battled_at: float = field(default_factory=time.time)
+
+
+class BattleEventLog:
+    """Write-behind queue that appends battle events to the battle_events table
+
+    append() only puts the event in a bounded in-memory buffer, so battles
+    never wait on an INSERT. A background thread writes the buffer in
+    batches every flush_interval seconds, or sooner once a full batch is
+    waiting. close() stops the thread and writes whatever is left.
+
+    Attributes:
+        flush_interval (float): seconds between background flushes
+        batch_size (int): most events written per transaction
+        max_buffer (int): most events held in memory before new ones are dropped
+    """
+
+    def __init__(self, flush_interval: float = BATTLE_EVENTS_FLUSH_INTERVAL,
+                 batch_size: int = BATTLE_EVENTS_BATCH_SIZE, max_buffer: int = BATTLE_EVENTS_MAX_BUFFER):
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size}. Must be at least 1.")
+        if max_buffer < batch_size:
+            raise ValueError(f"Invalid max buffer: {max_buffer}. Must be at least the batch size ({batch_size}).")
+
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+
+        self._cond = threading.Condition(threading.Lock())
+        self._buffer: deque = deque()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {"appended": 0, "written": 0, "dropped": 0, "flushes": 0, "flush_failures": 0}
+
+    def append(self, event: BattleEvent) -> bool:
+        """Queues an event for the next flush
+
+        Args:
+            event (BattleEvent): the battle to record
+
+        Returns:
+            bool: False if the buffer was full or the log is closed and the event was dropped
+
+        """
+        with self._cond:
+            if self._closed or len(self._buffer) >= self.max_buffer:
+                self._stats["dropped"] += 1
+                logger.warning("Battle event buffer is full or closed, dropping event")
+                return False
+
+            self._buffer.append(event)
+            self._stats["appended"] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+        self._ensure_thread()
+        return True
+
+    def flush(self) -> int:
+        """Writes every buffered event now
+
+        Returns:
+            int: the number of events written
+
+        Raises:
+            sqlite3.Error: if a batch cannot be written; it is put back in the buffer
+            RuntimeError: if no database connection could be checked out; the batch is put back too
+
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    return written
+
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    # Includes a pool checkout timing out, not only database errors
+                    self._requeue(batch)
+                    logger.error("Failed to write %d battle events: %s", len(batch), str(e))
+                    raise e
+                written += len(batch)
+
+    def close(self) -> None:
+        """Stops the background thread and writes the remaining events
+
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+
+        if self._thread is not None:
+            self._thread.join()
+        try:
+            self.flush()
+        except Exception:
+            logger.error("Dropping %d battle events that could not be written on shutdown", len(self._buffer))
+
+    def get_stats(self) -> dict[str, Any]:
+        """Returns the queue counters for monitoring
+
+        Returns:
+            dict: buffered events and appended/written/dropped/flush counts
+
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["buffered"] = len(self._buffer)
+            stats["max_buffer"] = self.max_buffer
+        return stats
+
+    def _write(self, batch: List[BattleEvent]) -> None:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO battle_events (combatant_1_id, combatant_2_id, score_1, score_2, random_number, winner_id, battled_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(event.combatant_1_id, event.combatant_2_id, event.score_1, event.score_2,
+                   event.random_number, event.winner_id, event.battled_at) for event in batch])
+            conn.commit()
+
+        with self._cond:
+            self._stats["written"] += len(batch)
+            self._stats["flushes"] += 1
+        logger.info("Wrote %d battle events", len(batch))
+
+    def _requeue(self, batch: List[BattleEvent]) -> None:
+        # Failed events go back to the front so they keep their order
+        with self._cond:
+            self._stats["flush_failures"] += 1
+            room = self.max_buffer - len(self._buffer)
+            if room < len(batch):
+                self._stats["dropped"] += len(batch) - room
+                batch = batch[len(batch) - room:] if room > 0 else []
+            self._buffer.extendleft(reversed(batch))
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._closed or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._flush_loop, name="battle-event-flush", daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                # The events are back in the buffer; try again on the next tick
+                time.sleep(self.flush_interval)
+
+
+_event_log = BattleEventLog()
+atexit.register(_event_log.close)
+
+
+def get_battle_event_log() -> BattleEventLog:
+    """Returns the process-wide battle event log
+
+    Returns:
+        BattleEventLog: the shared write-behind queue
+
+    """
+    return _event_log
+
+
+def record_battle_events(events: List[BattleEvent]) -> None:
+    """Queues several battles for the history log without waiting on the database
+
+    Every recorded battle passes through here once, after its result is
+    committed, so this is also where battles are counted for /api/metrics.
+
+    Args:
+        events (List[BattleEvent]): the battles to record, in the order they were fought
+
+    """
+    BATTLES_RECORDED.inc(amount=len(events))
+    for event in events:
+        _event_log.append(event)
+
+
+def get_battle_events(after_id: int = 0, limit: int = 100) -> List[dict[str, Any]]:
+    """Reads battle history in the order it was written, one page at a time
+
+    Args:
+        after_id (int): return events with an id greater than this
+        limit (int): most events to return, 1 to BATTLE_EVENTS_MAX_LIMIT
+
+    Returns:
+        List[dict]: the events, oldest first
+
+    Raises:
+        ValueError: if limit is out of range
+        sqlite3.Error: if any database error occurs
+
+    """
+    if not 1 <= limit <= BATTLE_EVENTS_MAX_LIMIT:
+        logger.error("Invalid limit parameter: %s", limit)
+        raise ValueError(f"Invalid limit: {limit}. Must be between 1 and {BATTLE_EVENTS_MAX_LIMIT}.")
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, combatant_1_id, combatant_2_id, score_1, score_2, random_number, winner_id, battled_at
+                FROM battle_events WHERE id > ? ORDER BY id LIMIT ?
+            """, (after_id, limit))
+            rows = cursor.fetchall()
+
+        return [
+            {'id': row[0], 'combatant_1_id': row[1], 'combatant_2_id': row[2], 'score_1': row[3],
+             'score_2': row[4], 'random_number': row[5], 'winner_id': row[6], 'battled_at': row[7]}
+            for row in rows
+        ]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
@@ -1,15 +1,61 @@
+from dataclasses import dataclass
 import logging
-from typing import List
+import os
+from typing import Any, List
 
-from meal_max.models.kitchen_model import Meal, update_meal_stats
+from meal_max.models.battle_event_model import BattleEvent, record_battle_events
+from meal_max.models.kitchen_model import Meal, get_meals_by_names, record_battle_result, record_battle_results
 from meal_max.utils.logger import configure_logger
-from meal_max.utils.random_utils import get_random
+from meal_max.utils.random_utils import get_random, get_randoms
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Most matchups battle_batch will resolve in one call
+BATTLE_BATCH_MAX_SIZE = int(os.getenv("BATTLE_BATCH_MAX_SIZE", "1000"))
+
+
+@dataclass
+class BattleResult:
+    combatant_1: Meal
+    combatant_2: Meal
+    score_1: float
+    score_2: float
+    random_number: float
+    winner: Meal
+    loser: Meal
+
+    def to_event(self) -> BattleEvent:
+        return BattleEvent(self.combatant_1.id, self.combatant_2.id, self.score_1, self.score_2,
+                           self.random_number, self.winner.id)
+
+
+def first_combatant_wins(score_1: float, score_2: float, random_number: float) -> bool:
+    """Applies the battle rule to two scores and a random draw
+
+    The score delta is normalized by 100; the first combatant wins when the
+    normalized delta is greater than the random number.
+
+    Args:
+        score_1 (float): battle score of the first combatant
+        score_2 (float): battle score of the second combatant
+        random_number (float): the random draw, between 0 and 1
+
+    Returns:
+        bool: True if the first combatant wins
+
+    """
+    # Compute the delta and normalize between 0 and 1
+    delta = abs(score_1 - score_2) / 100
+
+    # Log the delta and normalized delta
+    logger.info("Delta between scores: %.3f", delta)
+
+    return delta > random_number
+
+
 class BattleModel:
     """A class to manage battles between meals
     
@@ -36,6 +82,33 @@ class BattleModel:
         Logs:
             Error: if less than two combatants enrolled
         
+        """
+        result = self.fight()
+
+        # Update stats for both combatants in a single transaction
+        record_battle_result(result.winner.id, result.loser.id)
+        record_battle_events([result.to_event()])
+
+        # Remove the losing combatant from combatants
+        self.combatants.remove(result.loser)
+
+        return result.winner.meal
+
+    def fight(self) -> BattleResult:
+        """Decides a battle between the two combatants without recording it
+
+        Neither the stats nor the combatant list are changed; the caller
+        records the result and removes the loser
+
+        Returns:
+            BattleResult: the combatants, their scores, the random draw, the winner and the loser
+
+        Raises:
+            ValueError: if less than two combatants enrolled
+
+        Logs:
+            Error: if less than two combatants enrolled
+
         """
         logger.info("Two meals enter, one meal leaves!")
 
@@ -57,12 +130,6 @@ class BattleModel:
         logger.info("Score for %s: %.3f", combatant_1.meal, score_1)
         logger.info("Score for %s: %.3f", combatant_2.meal, score_2)
 
-        # Compute the delta and normalize between 0 and 1
-        delta = abs(score_1 - score_2) / 100
-
-        # Log the delta and normalized delta
-        logger.info("Delta between scores: %.3f", delta)
-
         # Get random number from random.org
         random_number = get_random()
 
@@ -70,7 +137,7 @@ class BattleModel:
         logger.info("Random number from random.org: %.3f", random_number)
 
         # Determine the winner based on the normalized delta
-        if delta > random_number:
+        if first_combatant_wins(score_1, score_2, random_number):
             winner = combatant_1
             loser = combatant_2
         else:
@@ -80,14 +147,62 @@ class BattleModel:
         # Log the winner
         logger.info("The winner is: %s", winner.meal)
 
-        # Update stats for both combatants
-        update_meal_stats(winner.id, 'win')
-        update_meal_stats(loser.id, 'loss')
+        return BattleResult(combatant_1, combatant_2, score_1, score_2, random_number, winner, loser)
 
-        # Remove the losing combatant from combatants
-        self.combatants.remove(loser)
+    def battle_batch(self, pairs: List[tuple[str, str]]) -> List[dict[str, Any]]:
+        """Resolves many independent battles between named meals at once
 
-        return winner.meal
+        Every meal is loaded with one query, all random numbers are drawn in
+        one batch and every result is written in one transaction. The
+        combatant list is not touched.
+
+        Args:
+            pairs (List[tuple[str, str]]): meal names to battle, first combatant first
+
+        Returns:
+            List[dict]: combatant_1, combatant_2 and winner for each pair, in order
+
+        Raises:
+            ValueError: if the batch is empty or too large, a pair is malformed
+                or a meal is missing or deleted
+
+        Logs:
+            Error: if the batch is invalid
+
+        """
+        if not pairs:
+            logger.error("Battle batch is empty.")
+            raise ValueError("At least one pair of meals is required.")
+        if len(pairs) > BATTLE_BATCH_MAX_SIZE:
+            logger.error("Battle batch of %d pairs is too large.", len(pairs))
+            raise ValueError(f"Too many pairs: {len(pairs)}. At most {BATTLE_BATCH_MAX_SIZE} can be battled at once.")
+        for pair in pairs:
+            if len(pair) != 2 or pair[0] == pair[1]:
+                logger.error("Invalid battle pair: %s", pair)
+                raise ValueError(f"Invalid pair: {list(pair)}. Each pair must name two different meals.")
+
+        logger.info("Resolving a batch of %d battles", len(pairs))
+
+        names = list(dict.fromkeys(name for pair in pairs for name in pair))
+        meals = {meal.meal: meal for meal in get_meals_by_names(names)}
+        scores = {name: self.get_battle_score(meal) for name, meal in meals.items()}
+        random_numbers = get_randoms(len(pairs))
+
+        battles = []
+        for (name_1, name_2), random_number in zip(pairs, random_numbers):
+            if first_combatant_wins(scores[name_1], scores[name_2], random_number):
+                winner, loser = meals[name_1], meals[name_2]
+            else:
+                winner, loser = meals[name_2], meals[name_1]
+            battles.append(BattleResult(meals[name_1], meals[name_2], scores[name_1], scores[name_2],
+                                        random_number, winner, loser))
+
+        # Update stats for every battle in a single transaction
+        record_battle_results([(battle.winner.id, battle.loser.id) for battle in battles])
+        record_battle_events([battle.to_event() for battle in battles])
+
+        return [{'combatant_1': battle.combatant_1.meal, 'combatant_2': battle.combatant_2.meal,
+                 'winner': battle.winner.meal} for battle in battles]
 
     def clear_combatants(self):
         """clears the combatant list
@@ -97,7 +212,9 @@ class BattleModel:
         self.combatants.clear()
 
     def get_battle_score(self, combatant: Meal) -> float:
-        """calculates the battle score of a meal
+        """returns the battle score of a meal
+
+        The score is computed once when the meal is created and stored with it.
 
         Args:
             combatant (Meal): name of meal trying to retrive data for
@@ -106,19 +223,9 @@ class BattleModel:
             float: battle score for the meal
         
         """
-        difficulty_modifier = {"HIGH": 1, "MED": 2, "LOW": 3}
-
-        # Log the calculation process
-        logger.info("Calculating battle score for %s: price=%.3f, cuisine=%s, difficulty=%s",
-                    combatant.meal, combatant.price, combatant.cuisine, combatant.difficulty)
-
-        # Calculate score
-        score = (combatant.price * len(combatant.cuisine)) - difficulty_modifier[combatant.difficulty]
-
-        # Log the calculated score
-        logger.info("Battle score for %s: %.3f", combatant.meal, score)
+        logger.info("Battle score for %s: %.3f", combatant.meal, combatant.battle_score)
 
-        return score
+        return combatant.battle_score
 
     def get_combatants(self) -> List[Meal]:
         """Retrives current list of combatants
@@ -1,9 +1,13 @@
-from dataclasses import dataclass
+import base64
+from dataclasses import dataclass, field
+import json
 import logging
-import os
 import sqlite3
-from typing import Any
+import time
+from typing import Any, Optional
 
+from meal_max.models.battle_event_model import get_battle_event_log
+from meal_max.models.rating_model import apply_elo
 from meal_max.utils.sql_utils import get_db_connection
 from meal_max.utils.logger import configure_logger
 
@@ -12,6 +16,23 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Largest page get_leaderboard_page will return in one call
+LEADERBOARD_MAX_LIMIT = 1000
+
+# Amount subtracted from a meal's battle score for each difficulty
+DIFFICULTY_MODIFIER = {"HIGH": 1, "MED": 2, "LOW": 3}
+
+
+def compute_battle_score(price: float, cuisine: str, difficulty: str) -> float:
+    """
+    Computes a meal's battle score: price times cuisine length, less the difficulty modifier
+
+    Returns:
+        float: the battle score
+    """
+    return (price * len(cuisine)) - DIFFICULTY_MODIFIER[difficulty]
+
+
 @dataclass
 class Meal:
     id: int
@@ -19,12 +40,16 @@ class Meal:
     cuisine: str
     price: float
     difficulty: str
+    # Stored with the meal; derived from the fields above, so not compared
+    battle_score: Optional[float] = field(default=None, compare=False)
 
     def __post_init__(self):
         if self.price < 0:
             raise ValueError("Price must be a positive value.")
         if self.difficulty not in ['LOW', 'MED', 'HIGH']:
             raise ValueError("Difficulty must be 'LOW', 'MED', or 'HIGH'.")
+        if self.battle_score is None:
+            self.battle_score = compute_battle_score(self.price, self.cuisine, self.difficulty)
 
 
 def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
@@ -47,9 +72,9 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO meals (meal, cuisine, price, difficulty)
-                VALUES (?, ?, ?, ?)
-            """, (meal, cuisine, price, difficulty))
+                INSERT INTO meals (meal, cuisine, price, difficulty, battle_score, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (meal, cuisine, price, difficulty, compute_battle_score(price, cuisine, difficulty), time.time()))
             conn.commit()
 
             logger.info("Meal successfully added to the database: %s", meal)
@@ -65,17 +90,23 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
 
 def clear_meals() -> None:
     """
-    Recreates the meals table, effectively deleting all meals.
+    Deletes every meal and restarts meal IDs at 1, keeping the schema and its indexes.
+
+    The battle history goes with them, including battles still queued in this
+    worker's write-behind buffer, since it refers to meals by IDs that will be
+    handed out again.
 
     Raises:
         sqlite3.Error: If any database error occurs.
+        RuntimeError: If the queued battle events cannot be written first.
     """
     try:
-        with open(os.getenv("SQL_CREATE_TABLE_PATH", "/app/sql/create_meal_table.sql"), "r") as fh:
-            create_table_script = fh.read()
+        get_battle_event_log().flush()
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.executescript(create_table_script)
+            cursor.execute("DELETE FROM meals")
+            cursor.execute("DELETE FROM battle_events")
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('meals', 'battle_events')")
             conn.commit()
 
             logger.info("Meals cleared successfully.")
@@ -118,35 +149,105 @@ def delete_meal(meal_id: int) -> None:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+def encode_leaderboard_cursor(sort_by: str, value: float, meal_id: int) -> str:
+    """
+    Builds the opaque cursor pointing just past a leaderboard row
+
+    Args:
+        sort_by (str): the leaderboard order the cursor belongs to
+        value (float): the row's raw sort key (wins, win_pct as a fraction, or rating)
+        meal_id (int): the row's meal id, the tiebreaker
 
-    """ gets the leaderboard and sorts them by wins
-    Returns: 
-        A dictionary
-    Raises: 
-        1. Value error if the sort by parameter is invalid 2. Exception e if there is a database error
-    Logs: 
-        1. Error if there is an invalid sort by parameter 2. Error if there is a database error 
+    Returns:
+        str: a url-safe cursor string
     """
-     
+    payload = json.dumps([sort_by, value, meal_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_leaderboard_cursor(sort_by: str, cursor: str) -> tuple[float, int]:
+    """
+    Unpacks a cursor produced by encode_leaderboard_cursor
+
+    Returns:
+        tuple[float, int]: the sort key and meal id of the last row already seen
+    Raises:
+        Value error if the cursor is malformed or belongs to another sort order
+    """
+    try:
+        cursor_sort, value, meal_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        value = float(value)
+        meal_id = int(meal_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        logger.error("Invalid leaderboard cursor: %s", cursor)
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if cursor_sort != sort_by:
+        logger.error("Leaderboard cursor for %s used with sort_by %s", cursor_sort, sort_by)
+        raise ValueError(f"Cursor was issued for sort_by '{cursor_sort}', not '{sort_by}'")
+    return value, meal_id
+
+
+def get_leaderboard_page(sort_by: str = "wins", limit: Optional[int] = None, cursor: Optional[str] = None) -> dict[str, Any]:
+    """ gets one page of the leaderboard using keyset pagination on (sort key, id)
+
+    Only the requested rows are read: the cursor becomes a range condition on
+    the leaderboard index, so later pages cost the same as the first.
+
+    Args:
+        sort_by (str): 'wins', 'win_pct' or 'rating'
+        limit (int, optional): maximum rows to return, 1 to LEADERBOARD_MAX_LIMIT; None returns every row
+        cursor (str, optional): next_cursor from the previous page
+    Returns:
+        A dictionary with the 'leaderboard' rows and the 'next_cursor' (None on the last page)
+    Raises:
+        1. Value error if sort_by, limit or cursor is invalid 2. Exception e if there is a database error
+    Logs:
+        1. Error if a parameter is invalid 2. Error if there is a database error
+    """
+
+    # win_pct is a generated column, rating is kept current by every recorded
+    # battle, and each sort order is served by a partial index on the same
+    # WHERE clause, so this is an index scan, not a sort or a recompute
     query = """
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
-        FROM meals WHERE deleted = false AND battles > 0
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, win_pct, rating
+        FROM meals WHERE deleted = FALSE AND battles > 0
     """
+    params: list[Any] = []
 
-    if sort_by == "win_pct":
-        query += " ORDER BY win_pct DESC"
-    elif sort_by == "wins":
-        query += " ORDER BY wins DESC"
-    else:
+    if sort_by not in ("wins", "win_pct", "rating"):
         logger.error("Invalid sort_by parameter: %s", sort_by)
         raise ValueError("Invalid sort_by parameter: %s" % sort_by)
 
+    if limit is not None and not (isinstance(limit, int) and 1 <= limit <= LEADERBOARD_MAX_LIMIT):
+        logger.error("Invalid limit parameter: %s", limit)
+        raise ValueError(f"Invalid limit: {limit}. Must be between 1 and {LEADERBOARD_MAX_LIMIT}.")
+
+    if cursor:
+        # Rows strictly after the cursor in (sort key DESC, id ASC) order; the
+        # leading "<=" gives the index a range to seek to
+        last_value, last_id = decode_leaderboard_cursor(sort_by, cursor)
+        query += f" AND {sort_by} <= ? AND ({sort_by} < ? OR id > ?)"
+        params += [last_value, last_value, last_id]
+
+    query += f" ORDER BY {sort_by} DESC, id"
+
+    if limit is not None:
+        # Read one extra row to learn whether another page exists
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
+            db_cursor = conn.cursor()
+            db_cursor.execute(query, params)
+            rows = db_cursor.fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            sort_value = {"wins": last[6], "win_pct": last[7], "rating": last[8]}[sort_by]
+            next_cursor = encode_leaderboard_cursor(sort_by, sort_value, last[0])
 
         leaderboard = []
         for row in rows:
@@ -158,17 +259,30 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
                 'difficulty': row[4],
                 'battles': row[5],
                 'wins': row[6],
-                'win_pct': round(row[7] * 100, 1)  # Convert to percentage
+                'win_pct': round(row[7] * 100, 1),  # Convert to percentage
+                'rating': round(row[8], 1)
             }
             leaderboard.append(meal)
 
         logger.info("Leaderboard retrieved successfully")
-        return leaderboard
+        return {'leaderboard': leaderboard, 'next_cursor': next_cursor}
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
+def get_leaderboard(sort_by: str="wins", limit: Optional[int] = None, cursor: Optional[str] = None) -> list[dict[str, Any]]:
+
+    """ gets the leaderboard and sorts them by wins, win_pct or rating
+    Returns: 
+        A list of dictionaries, one per ranked meal (see get_leaderboard_page for limit and cursor)
+    Raises: 
+        1. Value error if the sort by parameter is invalid 2. Exception e if there is a database error
+    Logs: 
+        1. Error if there is an invalid sort by parameter 2. Error if there is a database error 
+    """
+    return get_leaderboard_page(sort_by, limit, cursor)['leaderboard']
+
 def get_meal_by_id(meal_id: int) -> Meal:
 
     """ 
@@ -186,14 +300,14 @@ def get_meal_by_id(meal_id: int) -> Meal:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id = ?", (meal_id,))
+            cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted, battle_score FROM meals WHERE id = ?", (meal_id,))
             row = cursor.fetchone()
 
             if row:
                 if row[5]:
                     logger.info("Meal with ID %s has been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4], battle_score=row[6])
             else:
                 logger.info("Meal with ID %s not found", meal_id)
                 raise ValueError(f"Meal with ID {meal_id} not found")
@@ -216,14 +330,14 @@ def get_meal_by_name(meal_name: str) -> Meal:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE meal = ?", (meal_name,))
+            cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted, battle_score FROM meals WHERE meal = ?", (meal_name,))
             row = cursor.fetchone()
 
             if row:
                 if row[5]:
                     logger.info("Meal with name %s has been deleted", meal_name)
                     raise ValueError(f"Meal with name {meal_name} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4], battle_score=row[6])
             else:
                 logger.info("Meal with name %s not found", meal_name)
                 raise ValueError(f"Meal with name {meal_name} not found")
@@ -233,6 +347,157 @@ def get_meal_by_name(meal_name: str) -> Meal:
         raise e
 
 
+def get_all_meals() -> list[Meal]:
+    """Gets every meal that has not been deleted, in id order
+
+    Returns:
+        list[Meal]: the active meals
+    Raises:
+        Exception e if there is a database error
+    Logs:
+        Error if there has been a database error
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, meal, cuisine, price, difficulty, battle_score FROM meals WHERE deleted = FALSE ORDER BY id")
+            rows = cursor.fetchall()
+
+        return [Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4], battle_score=row[5])
+                for row in rows]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def get_random_meal(random_number: float) -> Meal:
+    """Picks an active meal using a random number, without scanning the table
+
+    Seeks to the first active id at or after a point between 1 and the largest
+    id, wrapping to the lowest id. Meals that follow a run of deleted ids are a
+    little more likely to be picked.
+
+    Args:
+        random_number (float): a draw from [0, 1)
+
+    Returns:
+        Meal: the chosen meal
+    Raises:
+        1. Value error if there are no active meals 2. Exception e if there is a database error
+    Logs:
+        Error if there has been a database error
+    """
+    query = "SELECT id, meal, cuisine, price, difficulty, battle_score FROM meals WHERE deleted = FALSE AND id >= ? ORDER BY id LIMIT 1"
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(id) FROM meals")
+            max_id = cursor.fetchone()[0] or 0
+            cursor.execute(query, (1 + int(random_number * max_id),))
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(query, (0,))
+                row = cursor.fetchone()
+
+        if row is None:
+            logger.info("No active meals to pick from")
+            raise ValueError("No meals available")
+        return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4], battle_score=row[5])
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def find_closest_meal(meal: Meal, max_gap: Optional[float] = None) -> Meal:
+    """Finds the active meal whose battle score is closest to a meal's
+
+    Two seeks on the battle score index, one upward and one downward, so the
+    cost is O(log N) however many meals there are.
+
+    Args:
+        meal (Meal): the meal to find an opponent for
+        max_gap (float, optional): largest score difference to accept
+
+    Returns:
+        Meal: the closest other meal; ties go to the lower score
+    Raises:
+        1. Value error if no other meal is within max_gap 2. Exception e if there is a database error
+    Logs:
+        Error if there has been a database error
+    """
+    columns = "id, meal, cuisine, price, difficulty, battle_score"
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {columns} FROM meals WHERE deleted = FALSE AND battle_score >= ? AND id != ?
+                ORDER BY battle_score, id LIMIT 1
+            """, (meal.battle_score, meal.id))
+            above = cursor.fetchone()
+            cursor.execute(f"""
+                SELECT {columns} FROM meals WHERE deleted = FALSE AND battle_score <= ? AND id != ?
+                ORDER BY battle_score DESC, id DESC LIMIT 1
+            """, (meal.battle_score, meal.id))
+            below = cursor.fetchone()
+
+        candidates = [row for row in (below, above) if row is not None]
+        if max_gap is not None:
+            candidates = [row for row in candidates if abs(row[5] - meal.battle_score) <= max_gap]
+        if not candidates:
+            logger.info("No opponent found for meal %s", meal.meal)
+            raise ValueError(f"No opponent found for meal {meal.meal}")
+
+        row = min(candidates, key=lambda row: abs(row[5] - meal.battle_score))
+        return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4], battle_score=row[5])
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def get_meals_by_names(meal_names: list[str]) -> list[Meal]:
+    """Gets many meals by name with a single query
+
+    Args:
+        meal_names (list[str]): names of the meals to load
+
+    Returns:
+        list[Meal]: the meals, in the same order as meal_names
+    Raises:
+        Value error if any meal has been deleted or hasn't been found 2. Exception e if there is a database error
+    Logs:
+        Error if there has been a database error
+    """
+    if not meal_names:
+        return []
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            unique_names = list(dict.fromkeys(meal_names))
+            placeholders = ", ".join("?" for _ in unique_names)
+            cursor.execute(f"SELECT id, meal, cuisine, price, difficulty, deleted, battle_score FROM meals WHERE meal IN ({placeholders})", unique_names)
+            rows = {row[1]: row for row in cursor.fetchall()}
+
+        meals = []
+        for meal_name in meal_names:
+            row = rows.get(meal_name)
+            if row is None:
+                logger.info("Meal with name %s not found", meal_name)
+                raise ValueError(f"Meal with name {meal_name} not found")
+            if row[5]:
+                logger.info("Meal with name %s has been deleted", meal_name)
+                raise ValueError(f"Meal with name {meal_name} has been deleted")
+            meals.append(Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4], battle_score=row[6]))
+        return meals
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
 def update_meal_stats(meal_id: int, result: str) -> None:
     """
         Updates meal name stats by meal id and result
@@ -268,3 +533,154 @@ def update_meal_stats(meal_id: int, result: str) -> None:
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
+
+
+def record_battle_result(winner_id: int, loser_id: int) -> None:
+    """
+    Records the outcome of a single battle in one transaction.
+
+    Args:
+        winner_id (int): ID of the winning meal.
+        loser_id (int): ID of the losing meal.
+
+    Raises:
+        ValueError: If either meal is missing or deleted, or if both IDs are the same.
+        sqlite3.Error: If any database error occurs.
+    """
+    record_battle_results([(winner_id, loser_id)])
+
+
+def record_battle_results(results: list[tuple[int, int]]) -> None:
+    """
+    Records the outcomes of one or many battles in a single transaction.
+
+    Every meal involved is validated with one query, the per-meal battle and
+    win deltas are applied with one batched UPDATE, and the whole batch is
+    committed once. Either every result is recorded or none are.
+
+    Args:
+        results (list[tuple[int, int]]): (winner_id, loser_id) pairs.
+
+    Raises:
+        ValueError: If a meal is missing or deleted, or a meal battles itself.
+        sqlite3.Error: If any database error occurs.
+    """
+    if not results:
+        return
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            apply_battle_results(cursor, results)
+            conn.commit()
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def record_season_stats(deltas: dict[int, tuple[int, int]]) -> None:
+    """
+    Adds a season's per-meal battle and win counts to many meals in one transaction.
+
+    The counts go to season_battles and season_wins, not battles and wins.
+    Ratings depend on the order battles were fought, which per-meal totals no
+    longer carry, so season battles stay out of the rated stats and the
+    leaderboard.
+
+    Args:
+        deltas (dict[int, tuple[int, int]]): meal id -> (battles, wins) to add.
+
+    Raises:
+        ValueError: If any meal is missing or deleted; nothing is written.
+        sqlite3.Error: If any database error occurs.
+    """
+    if not deltas:
+        return
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # Checking rowcount instead of selecting first avoids an IN list
+            # longer than SQLite's variable limit
+            cursor.executemany(
+                "UPDATE meals SET season_battles = season_battles + ?, season_wins = season_wins + ? "
+                "WHERE id = ? AND deleted = FALSE",
+                [(battles, wins, meal_id) for meal_id, (battles, wins) in deltas.items()]
+            )
+            if cursor.rowcount != len(deltas):
+                conn.rollback()
+                missing = len(deltas) - cursor.rowcount
+                logger.info("%d meal(s) missing or deleted, discarding season stats", missing)
+                raise ValueError(f"{missing} meal(s) were not found or have been deleted")
+            conn.commit()
+
+        logger.info("Recorded season stats for %d meal(s)", len(deltas))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def apply_battle_results(cursor: sqlite3.Cursor, results: list[tuple[int, int]]) -> None:
+    """
+    Applies battle outcomes on an open cursor without committing.
+
+    Lets callers record results in the same transaction as their own writes;
+    record_battle_results wraps this with its own connection and commit. If
+    no transaction is open yet, one is started with BEGIN IMMEDIATE so the
+    ratings read here cannot change before they are written back.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the connection that will commit.
+        results (list[tuple[int, int]]): (winner_id, loser_id) pairs.
+
+    Raises:
+        ValueError: If a meal is missing or deleted, or a meal battles itself.
+        sqlite3.Error: If any database error occurs.
+    """
+    if not results:
+        return
+
+    # Collapse the results into one (battles, wins) delta per meal
+    deltas: dict[int, list[int]] = {}
+    for winner_id, loser_id in results:
+        if winner_id == loser_id:
+            raise ValueError(f"Meal with ID {winner_id} cannot battle itself")
+        deltas.setdefault(winner_id, [0, 0])
+        deltas.setdefault(loser_id, [0, 0])
+        deltas[winner_id][0] += 1
+        deltas[winner_id][1] += 1
+        deltas[loser_id][0] += 1
+
+    meal_ids = list(deltas)
+
+    # The new ratings are written as absolute values, so take the write lock
+    # before reading the old ones; otherwise two concurrent battles on the same
+    # meal would each start from the same rating and one update would be lost
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+
+    placeholders = ", ".join("?" for _ in meal_ids)
+    cursor.execute(f"SELECT id, deleted, rating FROM meals WHERE id IN ({placeholders})", meal_ids)
+    found = {meal_id: (deleted, rating) for meal_id, deleted, rating in cursor.fetchall()}
+
+    for meal_id in meal_ids:
+        if meal_id not in found:
+            logger.info("Meal with ID %s not found", meal_id)
+            raise ValueError(f"Meal with ID {meal_id} not found")
+        if found[meal_id][0]:
+            logger.info("Meal with ID %s has been deleted", meal_id)
+            raise ValueError(f"Meal with ID {meal_id} has been deleted")
+
+    # Ratings depend on the order battles were fought, so replay them one by one
+    ratings = {meal_id: rating for meal_id, (_, rating) in found.items()}
+    for winner_id, loser_id in results:
+        apply_elo(ratings, winner_id, loser_id)
+
+    cursor.executemany(
+        "UPDATE meals SET battles = battles + ?, wins = wins + ?, rating = ? WHERE id = ?",
+        [(battles, wins, ratings[meal_id], meal_id) for meal_id, (battles, wins) in deltas.items()]
+    )
+
+    logger.info("Recorded %d battle result(s) for %d meal(s)", len(results), len(meal_ids))
@@ -0,0 +1,41 @@
+import logging
+import random
+from typing import Optional
+
+from meal_max.models.kitchen_model import Meal, find_closest_meal, get_meal_by_name, get_random_meal
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+def find_match(meal_name: Optional[str] = None, max_gap: Optional[float] = None) -> tuple[Meal, Meal]:
+    """Pairs a meal with the opponent closest to it in battle score
+
+    Every lookup is an index seek, so a match costs O(log N) whatever the
+    size of the catalog. The random meal is picked with the standard library:
+    battle random numbers only have two decimal places, too coarse to reach
+    every meal in a large catalog.
+
+    Args:
+        meal_name (str, optional): meal to find an opponent for; a random meal if omitted
+        max_gap (float, optional): largest score difference to accept
+
+    Returns:
+        tuple[Meal, Meal]: the meal and its opponent
+
+    Raises:
+        ValueError: if max_gap is negative, the meal is missing or deleted,
+            or no opponent is close enough
+
+    """
+    if max_gap is not None and max_gap < 0:
+        logger.error("Invalid max gap: %s", max_gap)
+        raise ValueError(f"Invalid max gap: {max_gap}. Must be at least 0.")
+
+    meal = get_meal_by_name(meal_name) if meal_name else get_random_meal(random.random())
+    opponent = find_closest_meal(meal, max_gap)
+
+    logger.info("Matched %s (%.3f) with %s (%.3f)", meal.meal, meal.battle_score, opponent.meal, opponent.battle_score)
+    return meal, opponent
@@ -0,0 +1,182 @@
+import logging
+import os
+from typing import Any, List, Optional
+
+import numpy as np
+
+from meal_max.models.kitchen_model import Meal, get_all_meals, get_meals_by_names
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Simulated battles per pairing when the caller does not ask for a number
+MATCHUP_SAMPLES = int(os.getenv("MATCHUP_SAMPLES", "10000"))
+
+# Most simulated battles per pairing; every one is a real draw held in memory
+MATCHUP_MAX_SAMPLES = int(os.getenv("MATCHUP_MAX_SAMPLES", "100000"))
+
+# Most matrix rows get_matchup_odds returns in one page. The response carries
+# two rows x N matrices, so the catalog itself is not capped, only the page
+MATCHUP_MAX_LIMIT = int(os.getenv("MATCHUP_MAX_LIMIT", "100"))
+
+# Random draws simulated at once; rows are processed in blocks of about this many draws
+MATCHUP_BLOCK_DRAWS = 2_500_000
+
+# Every value a battle's random draw can take: random.org and the local
+# sources all return two-decimal fractions in [0, 1)
+DRAW_VALUES = np.arange(100) / 100
+
+
+def get_battle_scores(meals: List[Meal]) -> np.ndarray:
+    """Collects the stored battle score of every meal into one array
+
+    Args:
+        meals (List[Meal]): the meals to score
+
+    Returns:
+        np.ndarray: one score per meal, in the same order
+
+    """
+    return np.fromiter((meal.battle_score for meal in meals), dtype=np.float64, count=len(meals))
+
+
+def win_probability_matrix(scores: np.ndarray, offset: int = 0, limit: Optional[int] = None) -> np.ndarray:
+    """Computes the exact win probabilities for every pairing
+
+    BattleModel.battle lets the first combatant win when the normalized score
+    delta is greater than the random draw, so the odds are the share of
+    DRAW_VALUES below the delta.
+
+    Args:
+        scores (np.ndarray): battle score of each meal
+        offset (int): first meal to compute a row for
+        limit (int, optional): most rows to compute, all remaining meals if omitted
+
+    Returns:
+        np.ndarray: rows x N matrix where [i, j] is the chance that meal
+            offset + i wins when prepped first against meal j; self-matchups are NaN
+
+    """
+    odds = _win_thresholds(scores, offset, limit) / len(DRAW_VALUES)
+    _blank_self_matchups(odds, offset)
+    return odds
+
+
+def simulate_win_matrix(scores: np.ndarray, samples: int = MATCHUP_SAMPLES, seed: Optional[int] = None,
+                        offset: int = 0, limit: Optional[int] = None) -> np.ndarray:
+    """Estimates the win probabilities for every pairing by Monte Carlo
+
+    Each row meal gets `samples` random draws from DRAW_VALUES, and every
+    pairing in the row applies the battle rule to them. Rows are simulated
+    in blocks so memory stays around MATCHUP_BLOCK_DRAWS draws.
+
+    Args:
+        scores (np.ndarray): battle score of each meal
+        samples (int): simulated battles per pairing
+        seed (int, optional): seed for a reproducible estimate
+        offset (int): first meal to compute a row for
+        limit (int, optional): most rows to compute, all remaining meals if omitted
+
+    Returns:
+        np.ndarray: rows x N matrix of sampled win rates; self-matchups are NaN
+
+    Raises:
+        ValueError: if samples is not between 1 and MATCHUP_MAX_SAMPLES
+
+    """
+    if not 1 <= samples <= MATCHUP_MAX_SAMPLES:
+        logger.error("Invalid number of samples: %s", samples)
+        raise ValueError(f"Invalid number of samples: {samples}. Must be between 1 and {MATCHUP_MAX_SAMPLES}.")
+
+    thresholds = _win_thresholds(scores, offset, limit)
+    rng = np.random.default_rng(seed)
+    num_draws = len(DRAW_VALUES)
+    block_rows = max(1, MATCHUP_BLOCK_DRAWS // samples)
+    sampled = np.empty(thresholds.shape)
+
+    for start in range(0, len(thresholds), block_rows):
+        block = thresholds[start:start + block_rows]
+        draws = rng.integers(0, num_draws, size=(len(block), samples))
+        # Count each row's draws per value, then how many fall below each value
+        counts = np.bincount((draws + num_draws * np.arange(len(block))[:, np.newaxis]).ravel(),
+                             minlength=len(block) * num_draws).reshape(len(block), num_draws)
+        below = np.zeros((len(block), num_draws + 1), dtype=np.int64)
+        np.cumsum(counts, axis=1, out=below[:, 1:])
+        # The first combatant wins every draw below its normalized delta
+        sampled[start:start + len(block)] = np.take_along_axis(below, block, axis=1) / samples
+
+    _blank_self_matchups(sampled, offset)
+    return sampled
+
+
+def get_matchup_odds(meal_names: Optional[List[str]] = None, samples: int = MATCHUP_SAMPLES,
+                     seed: Optional[int] = None, offset: int = 0, limit: int = MATCHUP_MAX_LIMIT) -> dict[str, Any]:
+    """Builds one page of the analytic and sampled win-probability matrices for a set of meals
+
+    Every meal is a column; the page holds the rows for meals offset to
+    offset + limit, so any catalog can be walked a page at a time.
+
+    Args:
+        meal_names (List[str], optional): meals to include, all active meals if omitted
+        samples (int): simulated battles per pairing
+        seed (int, optional): seed for a reproducible estimate
+        offset (int): first meal to return a row for
+        limit (int): most rows to return, 1 to MATCHUP_MAX_LIMIT
+
+    Returns:
+        dict: meal names and battle scores for every column, the page's offset,
+            both matrices as nested lists with None for self-matchups, and
+            next_offset (None on the last page)
+
+    Raises:
+        ValueError: if a meal is missing or deleted, or offset, limit or samples is invalid
+
+    """
+    if offset < 0:
+        logger.error("Invalid offset: %s", offset)
+        raise ValueError(f"Invalid offset: {offset}. Must be at least 0.")
+    if not 1 <= limit <= MATCHUP_MAX_LIMIT:
+        logger.error("Invalid limit: %s", limit)
+        raise ValueError(f"Invalid limit: {limit}. Must be between 1 and {MATCHUP_MAX_LIMIT}.")
+
+    meals = get_meals_by_names(meal_names) if meal_names else get_all_meals()
+    logger.info("Computing matchup odds for rows %d-%d of %d meals with %d samples per pairing",
+                offset, offset + limit, len(meals), samples)
+
+    scores = get_battle_scores(meals)
+    analytic = win_probability_matrix(scores, offset, limit)
+    sampled = simulate_win_matrix(scores, samples, seed, offset, limit)
+
+    return {
+        'meals': [meal.meal for meal in meals],
+        'scores': scores.tolist(),
+        'offset': offset,
+        'analytic': _to_nested_list(analytic, offset),
+        'sampled': _to_nested_list(sampled, offset),
+        'samples': samples,
+        'next_offset': offset + limit if offset + limit < len(meals) else None,
+    }
+
+
+def _win_thresholds(scores: np.ndarray, offset: int, limit: Optional[int]) -> np.ndarray:
+    # For each pairing, how many DRAW_VALUES lie below the normalized delta, i.e. how many draws the first meal wins
+    end = len(scores) if limit is None else offset + limit
+    deltas = np.abs(scores[offset:end, np.newaxis] - scores[np.newaxis, :]) / 100
+    return np.searchsorted(DRAW_VALUES, deltas, side="left")
+
+
+def _blank_self_matchups(matrix: np.ndarray, offset: int) -> None:
+    # Row i of the page is meal offset + i, which cannot fight itself
+    rows = np.arange(len(matrix))
+    matrix[rows, offset + rows] = np.nan
+
+
+def _to_nested_list(matrix: np.ndarray, offset: int) -> list[list[Optional[float]]]:
+    # JSON has no NaN, so self-matchups become None
+    rows = matrix.tolist()
+    for i in range(len(rows)):
+        rows[i][offset + i] = None
+    return rows
@@ -0,0 +1,135 @@
+import logging
+import os
+import sqlite3
+from typing import Any
+
+from meal_max.models.battle_event_model import get_battle_event_log
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Rating every meal starts from; must match the meals.rating column default
+RATING_INITIAL = 1500.0
+
+# Largest rating change a single battle can cause
+RATING_K_FACTOR = float(os.getenv("RATING_K_FACTOR", "32"))
+
+# Battle events read per round trip when ratings are recomputed from history
+RATING_RECOMPUTE_BATCH_SIZE = int(os.getenv("RATING_RECOMPUTE_BATCH_SIZE", "5000"))
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """Returns the Elo probability that a meal beats its opponent
+
+    Args:
+        rating (float): the meal's rating
+        opponent_rating (float): the opponent's rating
+
+    Returns:
+        float: expected score between 0 and 1
+
+    """
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def apply_elo(ratings: dict[int, float], winner_id: int, loser_id: int, k_factor: float = RATING_K_FACTOR) -> None:
+    """Updates two ratings in place for one battle
+
+    The winner gains what the loser gives up, scaled by how unexpected the
+    result was.
+
+    Args:
+        ratings (dict[int, float]): meal id -> rating; missing meals start at RATING_INITIAL
+        winner_id (int): ID of the winning meal
+        loser_id (int): ID of the losing meal
+        k_factor (float): largest possible change
+
+    """
+    winner_rating = ratings.get(winner_id, RATING_INITIAL)
+    loser_rating = ratings.get(loser_id, RATING_INITIAL)
+    change = k_factor * (1 - expected_score(winner_rating, loser_rating))
+    ratings[winner_id] = winner_rating + change
+    ratings[loser_id] = loser_rating - change
+
+
+def recompute_ratings(batch_size: int = RATING_RECOMPUTE_BATCH_SIZE) -> dict[str, Any]:
+    """Rebuilds every rating by replaying the battle history
+
+    Events are streamed from battle_events in id order, batch_size rows at a
+    time, so memory holds one rating per meal rather than the whole history.
+    The bulk of the history is read without blocking battles. The events
+    written meanwhile are then replayed under the database write lock, and
+    every rating is reset to RATING_INITIAL and rewritten before it is
+    released, so no battle can land between the replay and the swap. Battles
+    fought before battle_events existed, or still queued in another worker's
+    write-behind buffer, are not in the history; meals with no events
+    restart from RATING_INITIAL. Events fought before one of their combatants
+    was created belong to an earlier meal with the same id and are skipped.
+
+    Args:
+        batch_size (int): events fetched per round trip
+
+    Returns:
+        dict: the number of events replayed and meals rated
+
+    Raises:
+        ValueError: if batch_size is not positive
+        sqlite3.Error: if any database error occurs
+
+    """
+    if batch_size < 1:
+        raise ValueError(f"Invalid batch size: {batch_size}. Must be at least 1.")
+
+    event_log = get_battle_event_log()
+    # Battles still waiting in the write-behind queue belong in the replay
+    event_log.flush()
+
+    ratings: dict[int, float] = {}
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            events, last_id = _replay_events(cursor, ratings, 0, batch_size)
+
+            event_log.flush()
+            cursor.execute("BEGIN IMMEDIATE")
+            tail, last_id = _replay_events(cursor, ratings, last_id, batch_size)
+            events += tail
+
+            cursor.execute("UPDATE meals SET rating = ?", (RATING_INITIAL,))
+            cursor.executemany("UPDATE meals SET rating = ? WHERE id = ?",
+                               [(rating, meal_id) for meal_id, rating in ratings.items()])
+            conn.commit()
+
+        logger.info("Recomputed ratings for %d meals from %d battle events", len(ratings), events)
+        return {'events': events, 'meals': len(ratings)}
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def _replay_events(cursor: sqlite3.Cursor, ratings: dict[int, float], after_id: int, batch_size: int) -> tuple[int, int]:
+    # Applies the events after after_id to ratings; returns how many there were and the last id seen
+    # An event older than one of its combatants was fought by a meal that has since been cleared
+    cursor.execute("""
+        SELECT e.id, e.winner_id, e.combatant_1_id, e.combatant_2_id FROM battle_events e
+        WHERE e.id > ? AND NOT EXISTS (
+            SELECT 1 FROM meals m
+            WHERE m.id IN (e.combatant_1_id, e.combatant_2_id) AND m.created_at > e.battled_at
+        )
+        ORDER BY e.id
+    """, (after_id,))
+    events = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return events, after_id
+        for event_id, winner_id, combatant_1_id, combatant_2_id in rows:
+            loser_id = combatant_2_id if winner_id == combatant_1_id else combatant_1_id
+            apply_elo(ratings, winner_id, loser_id)
+        events += len(rows)
+        after_id = rows[-1][0]
@@ -0,0 +1,148 @@
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+from typing import Any, List, Optional
+
+import numpy as np
+
+from meal_max.models.battle_event_model import BATTLES_RECORDED
+from meal_max.models.kitchen_model import Meal, get_all_meals, record_season_stats
+from meal_max.models.matchup_model import get_battle_scores
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Worker processes for a season; 1 plays it in this process
+SEASON_WORKERS = int(os.getenv("SEASON_WORKERS", str(os.cpu_count() or 1)))
+
+# Roughly how many battles each task plays; fixed so results do not depend on the worker count
+SEASON_CHUNK_BATTLES = int(os.getenv("SEASON_CHUNK_BATTLES", "2000000"))
+
+
+def partition_rows(num_meals: int, chunk_battles: int = SEASON_CHUNK_BATTLES) -> List[tuple[int, int]]:
+    """Splits the round robin into row ranges with about the same number of battles
+
+    Row i plays meal i against every later meal, so early rows are long and
+    late rows are short; cutting on the running battle count keeps the tasks
+    even.
+
+    Args:
+        num_meals (int): size of the field
+        chunk_battles (int): target battles per range
+
+    Returns:
+        List[tuple[int, int]]: (start, stop) row ranges covering every pairing once
+
+    """
+    chunks = []
+    start = 0
+    battles = 0
+    for row in range(num_meals - 1):
+        battles += num_meals - 1 - row
+        if battles >= chunk_battles:
+            chunks.append((start, row + 1))
+            start = row + 1
+            battles = 0
+    if start < num_meals - 1:
+        chunks.append((start, num_meals - 1))
+    return chunks
+
+
+def play_rows(scores: np.ndarray, start: int, stop: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """Plays rows start..stop of the round robin and counts wins per meal
+
+    Meal i is prepped first against every meal j > i, and wins when the
+    normalized score delta beats a uniform draw, as in BattleModel.battle.
+
+    Args:
+        scores (np.ndarray): battle score of every meal in the field
+        start (int): first row to play
+        stop (int): row to stop before
+        seed (np.random.SeedSequence): seed for this range's draws
+
+    Returns:
+        np.ndarray: wins per meal from these rows
+
+    """
+    rng = np.random.default_rng(seed)
+    wins = np.zeros(len(scores), dtype=np.int64)
+    for i in range(start, stop):
+        first_wins = np.abs(scores[i] - scores[i + 1:]) / 100 > rng.random(len(scores) - i - 1)
+        wins[i] += np.count_nonzero(first_wins)
+        wins[i + 1:] += ~first_wins
+    return wins
+
+
+def run_season(workers: int = SEASON_WORKERS, seed: Optional[int] = None,
+               record_results: bool = True) -> dict[str, Any]:
+    """Plays every active meal against every other once and records the totals
+
+    The meals are read once into an in-memory snapshot and scored once. The
+    pairings are split into row ranges that a process pool plays in parallel;
+    each range returns only its per-meal win counts, which are summed and
+    written in a single transaction. Draws come from numpy rather than the
+    battle random source, and each range gets its own child of the season
+    seed, so a seeded season gives the same result with any worker count.
+
+    Seasons are unrated: there are N(N-1)/2 battles and only per-meal totals
+    come back, so there is no battle order to apply Elo in and nothing for the
+    battle history. The totals go to season_battles and season_wins, leaving
+    battles, wins, ratings and the leaderboard to rated battles.
+
+    Args:
+        workers (int): processes to play on; 1 plays in this process
+        seed (int, optional): seed for a reproducible season
+        record_results (bool): add the totals to the meals' season stats
+
+    Returns:
+        dict: the number of meals and battles, rated (always False), and
+            standings sorted by wins
+
+    Raises:
+        ValueError: if workers is not positive, there are fewer than two
+            meals, or a meal is deleted before the totals are written
+
+    """
+    if workers < 1:
+        logger.error("Invalid number of workers: %s", workers)
+        raise ValueError(f"Invalid number of workers: {workers}. Must be at least 1.")
+
+    meals = get_all_meals()
+    if len(meals) < 2:
+        logger.error("Not enough meals for a season: %d", len(meals))
+        raise ValueError("A season needs at least two meals.")
+
+    scores = get_battle_scores(meals)
+    chunks = partition_rows(len(meals))
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    logger.info("Playing a season of %d meals in %d chunks on %d worker(s)", len(meals), len(chunks), workers)
+
+    if workers == 1 or len(chunks) == 1:
+        chunk_wins = [play_rows(scores, start, stop, chunk_seed)
+                      for (start, stop), chunk_seed in zip(chunks, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            chunk_wins = list(pool.map(play_rows, [scores] * len(chunks),
+                                       *zip(*chunks), seeds))
+    wins = np.sum(chunk_wins, axis=0)
+
+    battles_per_meal = len(meals) - 1
+    if record_results:
+        record_season_stats({meal.id: (battles_per_meal, int(meal_wins)) for meal, meal_wins in zip(meals, wins)})
+        BATTLES_RECORDED.inc(amount=len(meals) * battles_per_meal // 2)
+
+    return {
+        'meals': len(meals),
+        'battles': len(meals) * battles_per_meal // 2,
+        'rated': False,
+        'standings': _standings(meals, wins, battles_per_meal),
+    }
+
+
+def _standings(meals: List[Meal], wins: np.ndarray, battles_per_meal: int) -> List[dict[str, Any]]:
+    order = sorted(range(len(meals)), key=lambda i: (-wins[i], meals[i].id))
+    return [{'id': meals[i].id, 'meal': meals[i].meal, 'wins': int(wins[i]),
+             'losses': battles_per_meal - int(wins[i])} for i in order]
@@ -0,0 +1,275 @@
+from dataclasses import dataclass, field
+import logging
+import math
+import os
+from typing import Any, List, Optional
+
+from meal_max.models.battle_event_model import BattleEvent, record_battle_events
+from meal_max.models.battle_model import BattleModel, first_combatant_wins
+from meal_max.models.kitchen_model import Meal, get_meals_by_names, record_battle_results
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.random_utils import get_randoms
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Most meals one tournament can enter; a round robin of 128 is 8,128 battles
+TOURNAMENT_MAX_ENTRANTS = int(os.getenv("TOURNAMENT_MAX_ENTRANTS", "128"))
+
+
+@dataclass
+class Match:
+    round: int
+    combatant_1: Meal
+    combatant_2: Meal
+    winner: Meal
+    loser: Meal
+    random_number: float
+
+
+@dataclass
+class Standing:
+    meal: Meal
+    wins: int = 0
+    losses: int = 0
+    byes: int = 0
+    opponents: set = field(default_factory=set)
+
+    @property
+    def points(self) -> int:
+        return self.wins + self.byes
+
+
+class TournamentModel:
+    """A class to run whole tournaments between many meals in memory
+
+    Entrants are loaded with one query, every battle is resolved in memory
+    with the same rule as BattleModel.battle, and all stat changes are
+    written in one transaction at the end. Random numbers are fetched in
+    bulk: once per round, or once for the whole round robin schedule.
+
+    Attributes:
+        entrants (List[Meal]): the meals taking part, in seed order
+        tournament_format (str): single_elimination, round_robin or swiss
+        rounds (int): number of Swiss rounds
+        matches (List[Match]): every battle fought so far
+    """
+
+    FORMATS = ("single_elimination", "round_robin", "swiss")
+
+    def __init__(self, entrants: List[Meal], tournament_format: str = "single_elimination", rounds: Optional[int] = None):
+        """Initializes a tournament between already loaded meals
+
+        Args:
+            entrants (List[Meal]): the meals taking part, best seed first
+            tournament_format (str): single_elimination, round_robin or swiss
+            rounds (int, optional): Swiss rounds, defaults to ceil(log2(entrants))
+
+        Raises:
+            ValueError: if the format is unknown, there are fewer than two or
+                more than TOURNAMENT_MAX_ENTRANTS entrants, a meal is entered
+                twice or rounds is invalid
+
+        """
+        _check_entrant_count(len(entrants))
+        if tournament_format not in self.FORMATS:
+            logger.error("Invalid tournament format: %s", tournament_format)
+            raise ValueError(f"Invalid tournament format: {tournament_format}. Must be one of {', '.join(self.FORMATS)}.")
+        if len({meal.id for meal in entrants}) != len(entrants):
+            logger.error("Tournament entrants contain duplicates")
+            raise ValueError("Each meal can only enter a tournament once.")
+
+        if rounds is None:
+            rounds = math.ceil(math.log2(len(entrants)))
+        if tournament_format == "swiss" and not 1 <= rounds < len(entrants):
+            logger.error("Invalid number of Swiss rounds: %s", rounds)
+            raise ValueError(f"Invalid number of rounds: {rounds}. Must be between 1 and {len(entrants) - 1}.")
+
+        self.entrants = list(entrants)
+        self.tournament_format = tournament_format
+        self.rounds = rounds
+        self.matches: List[Match] = []
+
+        # Scores never change during a tournament, so compute each one once
+        battle_model = BattleModel()
+        self._scores = {meal.id: battle_model.get_battle_score(meal) for meal in self.entrants}
+        self._standings = {meal.id: Standing(meal) for meal in self.entrants}
+
+    @classmethod
+    def from_meal_names(cls, meal_names: List[str], tournament_format: str = "single_elimination",
+                        rounds: Optional[int] = None) -> "TournamentModel":
+        """Loads the entrants by name in one query and builds the tournament
+
+        Args:
+            meal_names (List[str]): names of the entrants, best seed first
+            tournament_format (str): single_elimination, round_robin or swiss
+            rounds (int, optional): Swiss rounds
+
+        Returns:
+            TournamentModel: the tournament, ready to run
+
+        Raises:
+            ValueError: if a meal is missing or deleted, or the tournament is invalid
+
+        """
+        # Checked before the lookup so an oversized field never reaches the database
+        _check_entrant_count(len(meal_names))
+        if len(set(meal_names)) != len(meal_names):
+            logger.error("Tournament entrants contain duplicates")
+            raise ValueError("Each meal can only enter a tournament once.")
+        return cls(get_meals_by_names(meal_names), tournament_format, rounds)
+
+    def run(self, record_results: bool = True) -> dict[str, Any]:
+        """Fights every battle of the tournament
+
+        Args:
+            record_results (bool): write the battle outcomes to the meals table
+                in one transaction once all battles are fought
+
+        Returns:
+            dict: format, champion, standings and the list of matches
+
+        Raises:
+            RuntimeError: if the tournament has already been run
+
+        """
+        if self.matches:
+            raise RuntimeError("This tournament has already been run.")
+
+        logger.info("Starting %s tournament with %d entrants", self.tournament_format, len(self.entrants))
+
+        if self.tournament_format == "single_elimination":
+            champion = self._run_single_elimination()
+        elif self.tournament_format == "round_robin":
+            self._run_round_robin()
+            champion = self.get_standings()[0].meal
+        else:
+            self._run_swiss()
+            champion = self.get_standings()[0].meal
+
+        if record_results:
+            record_battle_results([(match.winner.id, match.loser.id) for match in self.matches])
+            record_battle_events([
+                BattleEvent(match.combatant_1.id, match.combatant_2.id, self._scores[match.combatant_1.id],
+                            self._scores[match.combatant_2.id], match.random_number, match.winner.id)
+                for match in self.matches
+            ])
+
+        logger.info("Tournament finished after %d battles, champion: %s", len(self.matches), champion.meal)
+        return {
+            'format': self.tournament_format,
+            'champion': champion.meal,
+            'standings': [
+                {'meal': standing.meal.meal, 'wins': standing.wins, 'losses': standing.losses, 'byes': standing.byes}
+                for standing in self.get_standings()
+            ],
+            'matches': [
+                {'round': match.round, 'combatant_1': match.combatant_1.meal, 'combatant_2': match.combatant_2.meal,
+                 'winner': match.winner.meal}
+                for match in self.matches
+            ],
+        }
+
+    def get_standings(self) -> List[Standing]:
+        """Returns the standings, best first
+
+        Ranked by points (wins plus byes), then fewest losses, then seed.
+
+        Returns:
+            List[Standing]: one entry per entrant
+
+        """
+        seeds = {meal.id: seed for seed, meal in enumerate(self.entrants)}
+        return sorted(self._standings.values(), key=lambda s: (-s.points, s.losses, seeds[s.meal.id]))
+
+    def _fight_all(self, pairings: List[tuple[int, Meal, Meal]]) -> List[Meal]:
+        # One bulk fetch covers every battle in the list
+        random_numbers = get_randoms(len(pairings))
+        return [self._fight(round_number, combatant_1, combatant_2, random_number)
+                for (round_number, combatant_1, combatant_2), random_number in zip(pairings, random_numbers)]
+
+    def _fight(self, round_number: int, combatant_1: Meal, combatant_2: Meal, random_number: float) -> Meal:
+        if first_combatant_wins(self._scores[combatant_1.id], self._scores[combatant_2.id], random_number):
+            winner, loser = combatant_1, combatant_2
+        else:
+            winner, loser = combatant_2, combatant_1
+
+        self.matches.append(Match(round_number, combatant_1, combatant_2, winner, loser, random_number))
+        self._standings[winner.id].wins += 1
+        self._standings[loser.id].losses += 1
+        self._standings[combatant_1.id].opponents.add(combatant_2.id)
+        self._standings[combatant_2.id].opponents.add(combatant_1.id)
+        return winner
+
+    def _run_single_elimination(self) -> Meal:
+        # Top seeds get byes so the second round has a power-of-two field
+        bracket_size = 2 ** math.ceil(math.log2(len(self.entrants)))
+        num_byes = bracket_size - len(self.entrants)
+        for meal in self.entrants[:num_byes]:
+            self._standings[meal.id].byes += 1
+
+        remaining = self.entrants
+        round_number = 1
+        while len(remaining) > 1:
+            if round_number == 1 and num_byes:
+                advancing, fighting = remaining[:num_byes], remaining[num_byes:]
+            else:
+                advancing, fighting = [], remaining
+
+            # Best remaining seed meets the worst, second best the second worst...
+            half = len(fighting) // 2
+            winners = self._fight_all([(round_number, fighting[i], fighting[-1 - i]) for i in range(half)])
+            remaining = advancing + winners
+            round_number += 1
+
+        return remaining[0]
+
+    def _run_round_robin(self) -> None:
+        # Circle method: every meal meets every other exactly once over n-1 rounds
+        field_ = list(self.entrants)
+        if len(field_) % 2:
+            field_.append(None)
+        num_rounds = len(field_) - 1
+        half = len(field_) // 2
+
+        # The pairings do not depend on results, so the whole schedule is fought with one fetch
+        schedule = []
+        for round_index in range(num_rounds):
+            for i in range(half):
+                combatant_1, combatant_2 = field_[i], field_[-1 - i]
+                if combatant_1 is None or combatant_2 is None:
+                    continue
+                schedule.append((round_index + 1, combatant_1, combatant_2))
+            field_ = [field_[0], field_[-1]] + field_[1:-1]
+        self._fight_all(schedule)
+
+    def _run_swiss(self) -> None:
+        for round_number in range(1, self.rounds + 1):
+            ranked = [standing.meal for standing in self.get_standings()]
+
+            # With an odd field the lowest-ranked meal without a bye sits out
+            if len(ranked) % 2:
+                bye = next((meal for meal in reversed(ranked) if not self._standings[meal.id].byes), ranked[-1])
+                ranked.remove(bye)
+                self._standings[bye.id].byes += 1
+
+            # Pair neighbours in the standings, skipping rematches where possible
+            pairings = []
+            while ranked:
+                combatant_1 = ranked.pop(0)
+                opponents = self._standings[combatant_1.id].opponents
+                partner_index = next((i for i, meal in enumerate(ranked) if meal.id not in opponents), 0)
+                combatant_2 = ranked.pop(partner_index)
+                pairings.append((round_number, combatant_1, combatant_2))
+            self._fight_all(pairings)
+
+
+def _check_entrant_count(num_entrants: int) -> None:
+    if num_entrants < 2:
+        logger.error("Tournament needs at least two entrants, got %d", num_entrants)
+        raise ValueError("A tournament needs at least two entrants.")
+    if num_entrants > TOURNAMENT_MAX_ENTRANTS:
+        logger.error("Tournament of %d entrants is too large", num_entrants)
+        raise ValueError(f"Too many entrants: {num_entrants}. At most {TOURNAMENT_MAX_ENTRANTS} can enter a tournament.")
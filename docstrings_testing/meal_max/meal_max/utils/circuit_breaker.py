@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from meal_max.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class CircuitBreaker:
+    """Stops calling a failing upstream until it has had time to recover
+
+    The breaker starts closed. After failure_threshold consecutive failures it
+    opens and rejects every call for reset_timeout seconds. It then goes
+    half-open and lets a single trial call through: success closes it again,
+    failure re-opens it for another reset_timeout.
+
+    Attributes:
+        name (str): label used in logs and monitoring output
+        failure_threshold (int): consecutive failures that open the breaker
+        reset_timeout (float): seconds to stay open before a trial call
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        if failure_threshold < 1:
+            raise ValueError(f"Invalid failure threshold: {failure_threshold}. Must be at least 1.")
+
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._last_failure: Optional[float] = None
+        self._stats = {"successes": 0, "failures": 0, "rejected": 0, "times_opened": 0}
+
+    def allow_request(self) -> bool:
+        """Checks whether a call may go through right now
+
+        Returns:
+            bool: False if the breaker is open, or half-open with a trial call
+            already in flight
+
+        """
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                logger.info("Circuit breaker '%s' is half-open, allowing a trial call", self.name)
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        """Records a successful call, closing the breaker if it was half-open
+
+        """
+        with self._lock:
+            self._stats["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state != self.CLOSED:
+                logger.info("Circuit breaker '%s' closed", self.name)
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Records a failed call, opening the breaker once the threshold is hit
+
+        """
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_failure = time.time()
+
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._stats["times_opened"] += 1
+                    logger.error("Circuit breaker '%s' opened after %d consecutive failures",
+                                 self.name, self._consecutive_failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def reset(self) -> None:
+        """Forces the breaker closed and clears the failure count
+
+        """
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def get_state(self) -> dict[str, Any]:
+        """Returns the breaker state for monitoring
+
+        Returns:
+            dict: state, consecutive failures, counters and the time of the last failure
+
+        """
+        with self._lock:
+            state = dict(self._stats)
+            state["name"] = self.name
+            state["state"] = self._state
+            state["consecutive_failures"] = self._consecutive_failures
+            state["failure_threshold"] = self.failure_threshold
+            state["reset_timeout"] = self.reset_timeout
+            state["last_failure"] = self._last_failure
+        return state
@@ -1,26 +1,228 @@
+import atexit
+from collections import Counter
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import os
+import queue
 import sys
+import threading
+import time
 
 from flask import current_app, has_request_context
 
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+# Level for every logger set up by configure_logger (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+
+# Per-logger overrides, e.g. "meal_max.utils.sql_utils=WARNING,meal_max.models.battle_model=INFO"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+# Most records waiting for the background writer; new records are dropped beyond this
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Fraction of INFO and DEBUG records kept per logger, e.g. "meal_max.utils.sql_utils=0.1"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+# INFO and DEBUG records per second allowed for each message template, with
+# bursts of up to LOG_RATE_BURST; 0 turns rate limiting off
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", "20"))
+LOG_RATE_BURST = float(os.getenv("LOG_RATE_BURST", "100"))
+
+# Seconds between "suppressed N messages" summaries
+LOG_SUMMARY_INTERVAL = float(os.getenv("LOG_SUMMARY_INTERVAL", "10"))
+
+# Message templates tracked per logger before the rate limit buckets are reset
+LOG_MAX_TEMPLATES = 1000
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking
+
+    Only the message arguments are merged on the calling thread; the
+    timestamped formatting and the write to stderr happen on the listener
+    thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Thins out repetitive INFO and DEBUG records for one logger
+
+    A record is kept when it passes the logger's sample rate and its message
+    template (the format string, before arguments are merged) still has a
+    token in its bucket. Everything else is counted, and once every
+    summary_interval seconds the next record triggers a single
+    "suppressed N messages" line. Warnings and errors are never dropped, nor
+    are records logged with extra={"sampling_exempt": True}.
+
+    Attributes:
+        sample_rate (float): fraction of records kept, between 0 and 1
+        rate_limit (float): records per second per template; 0 for no limit
+        burst (float): most records per template let through at once
+        summary_interval (float): seconds between suppression summaries
+    """
+
+    def __init__(self, logger: logging.Logger, sample_rate: float = 1.0, rate_limit: float = LOG_RATE_LIMIT,
+                 burst: float = LOG_RATE_BURST, summary_interval: float = LOG_SUMMARY_INTERVAL, clock=time.monotonic):
+        super().__init__()
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.summary_interval = summary_interval
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._credit = 0.0
+        self._buckets: dict[str, list[float]] = {}
+        self._suppressed: Counter = Counter()
+        self._last_summary = clock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record, "sampling_exempt", False):
+            return True
+
+        template = str(record.msg)
+        with self._lock:
+            now = self._clock()
+            kept = self._sample() and self._take_token(template, now)
+            if not kept:
+                self._suppressed[template] += 1
+            summary = self._due_summary(now)
+
+        if summary:
+            self.logger.handle(summary)
+        return kept
 
-    # Create a console handler that logs to stderr
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
+    def _sample(self) -> bool:
+        # Keeps exactly sample_rate of the records, evenly spaced
+        self._credit += self.sample_rate
+        if self._credit < 1:
+            return False
+        self._credit -= 1
+        return True
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    def _take_token(self, template: str, now: float) -> bool:
+        if self.rate_limit <= 0:
+            return True
+        bucket = self._buckets.get(template)
+        if bucket is None:
+            if len(self._buckets) >= LOG_MAX_TEMPLATES:
+                self._buckets.clear()
+            bucket = self._buckets[template] = [self.burst, now]
+        tokens, updated = bucket
+        tokens = min(self.burst, tokens + (now - updated) * self.rate_limit)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def _due_summary(self, now: float):
+        elapsed = now - self._last_summary
+        if not self._suppressed or elapsed < self.summary_interval:
+            return None
+        total = sum(self._suppressed.values())
+        top = ", ".join(f"'{template}' x{count}" for template, count in self._suppressed.most_common(3))
+        self._suppressed.clear()
+        self._last_summary = now
+        return self.logger.makeRecord(self.logger.name, logging.INFO, __file__, 0,
+                                      "Suppressed %d log messages in the last %.0fs (most frequent: %s)",
+                                      (total, elapsed, top), None, extra={"sampling_exempt": True})
+
+
+_lock = threading.Lock()
+_handler = None
+_listener = None
+
+
+def _parse_overrides(overrides: str) -> dict[str, str]:
+    parsed = {}
+    for item in overrides.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            parsed[name.strip()] = value.strip()
+    return parsed
+
+
+def _start_listener() -> None:
+    global _handler, _listener
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    if _handler is None:
+        _handler = DroppingQueueHandler(log_queue)
+    else:
+        # After a fork the old listener thread is gone; keep the handler that
+        # loggers already hold and give it a fresh queue
+        _handler.queue = log_queue
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _after_fork() -> None:
+    global _lock
+    _lock = threading.Lock()
+    if _listener is not None:
+        _start_listener()
+
+
+def get_queue_handler() -> DroppingQueueHandler:
+    """Returns the shared handler, starting the background writer on first use
+
+    Returns:
+        DroppingQueueHandler: the handler every configured logger writes to
+
+    """
+    with _lock:
+        if _listener is None:
+            _start_listener()
+        return _handler
+
+
+def stop_logging() -> None:
+    """Writes every queued record and stops the background writer
+
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def configure_logger(logger):
+    # Safe to call repeatedly: the shared handler and the sampling filter are only attached once
+    logger.setLevel(_parse_overrides(LOG_LEVELS).get(logger.name, LOG_LEVEL).upper())
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
+    if not any(isinstance(log_filter, SamplingFilter) for log_filter in logger.filters):
+        sample_rate = float(_parse_overrides(LOG_SAMPLE_RATES).get(logger.name, "1"))
+        logger.addFilter(SamplingFilter(logger, sample_rate))
 
-    # Add the handler to the logger
-    logger.addHandler(handler)
+    handler = get_queue_handler()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
 
     if has_request_context():
         app_logger = current_app.logger
         for handler in app_logger.handlers:
-            logger.addHandler(handler)
\ No newline at end of file
+            if handler not in logger.handlers:
+                logger.addHandler(handler)
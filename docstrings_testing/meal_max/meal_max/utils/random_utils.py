@@ -1,17 +1,176 @@
+from abc import ABC, abstractmethod
+from collections import deque
 import logging
+import os
+import random
+import secrets
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
 import requests
+from requests.adapters import HTTPAdapter
 
+from meal_max.utils.circuit_breaker import CircuitBreaker
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import RANDOM_ORG_FAILURES, RANDOM_ORG_REQUEST_DURATION
+from meal_max.utils.request_timing import timed
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+T = TypeVar("T")
+
+
+# Which RandomSource backs get_random: random_org, local or seeded
+RANDOM_SOURCE = os.getenv("RANDOM_SOURCE", "random_org")
+RANDOM_SEED = int(os.getenv("RANDOM_SEED", "0"))
+
+# Base URL of the random.org API; point it at random_org_stub for offline runs
+RANDOM_ORG_URL = os.getenv("RANDOM_ORG_URL", "https://www.random.org").rstrip("/")
+
+# How many numbers to request from random.org at a time, and how low the
+# buffer may run before a background refill is started
+RANDOM_BUFFER_SIZE = int(os.getenv("RANDOM_BUFFER_SIZE", "100"))
+RANDOM_BUFFER_LOW_WATER = int(os.getenv("RANDOM_BUFFER_LOW_WATER", "20"))
+
+# Most numbers random.org will return from a single request
+RANDOM_ORG_MAX_BATCH = 10000
+
+# Per-attempt timeout, retry budget and base backoff (seconds) for random.org calls
+RANDOM_ORG_TIMEOUT = float(os.getenv("RANDOM_ORG_TIMEOUT", "2"))
+RANDOM_ORG_RETRIES = int(os.getenv("RANDOM_ORG_RETRIES", "2"))
+RANDOM_ORG_BACKOFF = float(os.getenv("RANDOM_ORG_BACKOFF", "0.2"))
+
+# Seconds one call may spend across all its attempts and backoff sleeps
+RANDOM_ORG_DEADLINE = float(os.getenv("RANDOM_ORG_DEADLINE", "5"))
+
+# Consecutive failures before the circuit opens, and how long it stays open
+RANDOM_ORG_FAILURE_THRESHOLD = int(os.getenv("RANDOM_ORG_FAILURE_THRESHOLD", "5"))
+RANDOM_ORG_RESET_TIMEOUT = float(os.getenv("RANDOM_ORG_RESET_TIMEOUT", "30"))
+
+# Set to "local" to serve from the local CSPRNG while random.org is unavailable
+RANDOM_ORG_FALLBACK = os.getenv("RANDOM_ORG_FALLBACK", "none")
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    # Retries are handled by request_random_org so they can feed the breaker
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared keep-alive session, so repeat calls skip the DNS/TCP/TLS setup
+_session = _create_session()
+_breaker = CircuitBreaker("random.org", RANDOM_ORG_FAILURE_THRESHOLD, RANDOM_ORG_RESET_TIMEOUT)
+
+
+def _is_retryable(error: requests.exceptions.RequestException) -> bool:
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+
+def _get(url: str, timeout: float) -> requests.Response:
+    # One HTTP attempt, charged to the current request and the latency histogram
+    started = time.perf_counter()
+    try:
+        with timed("random_org"):
+            return _session.get(url, timeout=timeout)
+    finally:
+        RANDOM_ORG_REQUEST_DURATION.observe(time.perf_counter() - started)
 
-def get_random() -> float:
-    """Fetch and returns a random float value generated from url provided
+
+def request_random_org(url: str, parse: Callable[[requests.Response], T]) -> T:
+    """GET a random.org url through the shared session with retries and a circuit breaker, and parse the response
+
+    Transient failures (timeouts, connection errors, 429 and 5xx) are retried
+    up to RANDOM_ORG_RETRIES times with full-jitter exponential backoff, as
+    long as the call stays within RANDOM_ORG_DEADLINE and the circuit breaker
+    stays closed. Each failed attempt counts toward the breaker, and so does a
+    response that cannot be parsed, which is not retried.
+
+    Args:
+        url (str): the random.org url to fetch
+        parse (Callable[[requests.Response], T]): turns the response into the result
 
     Returns:
-        float: the random number fetched from random.org
+        T: whatever parse returned
+
+    Raises:
+        RuntimeError: If the circuit breaker is open
+        requests.exceptions.RequestException: If the last attempt failed
+        ValueError: If parse rejected the response
+
+    """
+    if not _breaker.allow_request():
+        logger.error("random.org circuit breaker is open, failing fast.")
+        raise RuntimeError("random.org circuit breaker is open, failing fast.")
+
+    deadline = time.monotonic() + RANDOM_ORG_DEADLINE
+    for attempt in range(RANDOM_ORG_RETRIES + 1):
+        recorded = False
+        try:
+            response = _get(url, min(RANDOM_ORG_TIMEOUT, deadline - time.monotonic()))
+            response.raise_for_status()
+            result = parse(response)
+        except requests.exceptions.RequestException as e:
+            RANDOM_ORG_FAILURES.inc()
+            # Every failed attempt counts, so an outage opens the breaker after
+            # failure_threshold attempts rather than that many whole calls
+            _breaker.record_failure()
+            recorded = True
+            delay = random.uniform(0, RANDOM_ORG_BACKOFF * 2 ** attempt)
+            if (attempt == RANDOM_ORG_RETRIES or not _is_retryable(e)
+                    or time.monotonic() + delay >= deadline or not _breaker.allow_request()):
+                raise
+            logger.warning("Request to random.org failed (%s), retrying in %.2fs", e, delay)
+            time.sleep(delay)
+        else:
+            _breaker.record_success()
+            recorded = True
+            return result
+        finally:
+            # Anything else raised, such as a body that does not parse, is a
+            # failure too; otherwise a half-open breaker keeps its trial slot
+            if not recorded:
+                RANDOM_ORG_FAILURES.inc()
+                _breaker.record_failure()
+
+
+def get_random_org_status() -> dict[str, Any]:
+    """Returns the random.org circuit breaker state and the active source for monitoring
+
+    Returns:
+        dict: the active source name and the circuit breaker state
+
+    """
+    return {"source": _source.name, "circuit_breaker": _breaker.get_state()}
+
+
+def _parse_decimal_fractions(response: requests.Response) -> list[float]:
+    try:
+        random_numbers = [float(value) for value in response.text.split()]
+    except ValueError:
+        raise ValueError("Invalid response from random.org: %s" % response.text.strip())
+    if not random_numbers:
+        raise ValueError("Invalid response from random.org: %s" % response.text.strip())
+    return random_numbers
+
+
+def fetch_random_numbers(num: int, base_url: Optional[str] = None) -> list[float]:
+    """Fetch a batch of random floats from random.org in a single request
+
+    Args:
+        num (int): how many numbers to request (random.org allows 1 to 10000)
+        base_url (str, optional): API root to call instead of RANDOM_ORG_URL
+
+    Returns:
+        list[float]: the random numbers fetched from random.org
 
     Raises:
         RuntimeError: If the request to random.org fails or timed out
@@ -21,26 +180,16 @@ def get_random() -> float:
         Error: if request to random.org timed out or failed
 
     """
-    url = "https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+    url = f"{base_url or RANDOM_ORG_URL}/decimal-fractions/?num={num}&dec=2&col=1&format=plain&rnd=new"
 
     try:
         # Log the request to random.org
         logger.info("Fetching random number from %s", url)
 
-        response = requests.get(url, timeout=5)
-
-        # Check if the request was successful
-        response.raise_for_status()
-
-        random_number_str = response.text.strip()
+        random_numbers = request_random_org(url, _parse_decimal_fractions)
 
-        try:
-            random_number = float(random_number_str)
-        except ValueError:
-            raise ValueError("Invalid response from random.org: %s" % random_number_str)
-
-        logger.info("Received random number: %.3f", random_number)
-        return random_number
+        logger.info("Received %d random number(s)", len(random_numbers))
+        return random_numbers
 
     except requests.exceptions.Timeout:
         logger.error("Request to random.org timed out.")
@@ -49,3 +198,323 @@ def get_random() -> float:
     except requests.exceptions.RequestException as e:
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+class RandomBuffer:
+    """An in-process queue of prefetched random numbers
+
+    Numbers are fetched in bulk and served from memory. When the queue drops
+    below the low-water mark a background thread tops it back up, so callers
+    only wait on the network when the buffer has run completely dry.
+
+    Attributes:
+        fetch (Callable[[int], list[float]]): fetches a batch of numbers
+        batch_size (int): how many numbers the buffer holds when full
+        low_water (int): refill threshold; 0 disables background refills
+    """
+
+    def __init__(self, fetch: Callable[[int], list[float]], batch_size: int = 100, low_water: int = 20):
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size}. Must be at least 1.")
+        if not 0 <= low_water < batch_size:
+            raise ValueError(f"Invalid low-water mark: {low_water}. Must be between 0 and {batch_size - 1}.")
+
+        self.fetch = fetch
+        self.batch_size = batch_size
+        self.low_water = low_water
+
+        self._numbers: deque = deque()
+        self._lock = threading.Lock()
+        self._refill_needed = threading.Event()
+        self._refill_thread: Optional[threading.Thread] = None
+
+    def get(self) -> float:
+        """Pops the next random number, fetching synchronously if the buffer is empty
+
+        Returns:
+            float: the next buffered random number
+
+        Raises:
+            RuntimeError: If the buffer is empty and fetching fails
+            ValueError: If the buffer is empty and the fetched response is invalid
+
+        """
+        with self._lock:
+            if not self._numbers:
+                logger.info("Random number buffer is empty, fetching synchronously.")
+                self._numbers.extend(self.fetch(self.batch_size))
+            number = self._numbers.popleft()
+            remaining = len(self._numbers)
+
+        if remaining < self.low_water:
+            self._request_refill()
+
+        return number
+
+    def get_many(self, num: int) -> list[float]:
+        """Pops several numbers at once, fetching whatever the buffer is short in one go
+
+        Args:
+            num (int): how many numbers to return
+
+        Returns:
+            list[float]: the next num buffered random numbers
+
+        Raises:
+            RuntimeError: If the buffer is short and fetching fails
+            ValueError: If the buffer is short and the fetched response is invalid
+
+        """
+        with self._lock:
+            missing = num - len(self._numbers)
+            if missing > 0:
+                logger.info("Random number buffer is %d short, fetching synchronously.", missing)
+                self._numbers.extend(self.fetch(missing))
+            numbers = [self._numbers.popleft() for _ in range(num)]
+            remaining = len(self._numbers)
+
+        if remaining < self.low_water:
+            self._request_refill()
+
+        return numbers
+
+    def size(self) -> int:
+        """Returns how many numbers are currently buffered
+
+        Returns:
+            int: the number of buffered random numbers
+
+        """
+        return len(self._numbers)
+
+    def clear(self) -> None:
+        """Discards every buffered number
+
+        """
+        with self._lock:
+            self._numbers.clear()
+
+    def _request_refill(self) -> None:
+        if self._refill_thread is None or not self._refill_thread.is_alive():
+            with self._lock:
+                if self._refill_thread is None or not self._refill_thread.is_alive():
+                    self._refill_thread = threading.Thread(target=self._refill_loop, name="random-buffer-refill", daemon=True)
+                    self._refill_thread.start()
+        self._refill_needed.set()
+
+    def _refill_loop(self) -> None:
+        while True:
+            self._refill_needed.wait()
+            self._refill_needed.clear()
+
+            missing = self.batch_size - len(self._numbers)
+            if missing <= 0:
+                continue
+            try:
+                numbers = self.fetch(missing)
+            except (RuntimeError, ValueError) as e:
+                # The next get() on an empty buffer will retry and surface the error
+                logger.error("Background refill of random numbers failed: %s", e)
+                continue
+            with self._lock:
+                self._numbers.extend(numbers)
+            logger.info("Refilled random number buffer to %d numbers", len(self._numbers))
+
+
+class RandomSource(ABC):
+    """Base class for the backends that supply get_random
+
+    Subclasses produce floats in [0, 1) rounded to two decimals, the same
+    shape random.org returns for the battle draw.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get_random(self) -> float:
+        """Returns the next random float
+
+        Returns:
+            float: a random number in [0, 1)
+
+        """
+
+    def get_randoms(self, num: int) -> list[float]:
+        """Returns the next num random floats
+
+        Returns:
+            list[float]: random numbers in [0, 1)
+
+        """
+        return [self.get_random() for _ in range(num)]
+
+
+class RandomOrgSource(RandomSource):
+    """Fetches numbers from random.org (or a stand-in) through a RandomBuffer
+
+    Attributes:
+        base_url (str): API root the numbers are fetched from
+        buffer (RandomBuffer): prefetched numbers served to callers
+        fallback (RandomSource, optional): used when random.org is unavailable
+    """
+
+    name = "random_org"
+
+    def __init__(self, base_url: Optional[str] = None, batch_size: int = RANDOM_BUFFER_SIZE,
+                 low_water: int = RANDOM_BUFFER_LOW_WATER, fallback: Optional["RandomSource"] = None):
+        self.base_url = base_url
+        self.buffer = RandomBuffer(self._fetch, batch_size, low_water)
+        self.fallback = fallback
+
+    def _fetch(self, num: int) -> list[float]:
+        numbers = []
+        while len(numbers) < num:
+            numbers.extend(fetch_random_numbers(min(num - len(numbers), RANDOM_ORG_MAX_BATCH), self.base_url))
+        return numbers
+
+    def get_random(self) -> float:
+        try:
+            return self.buffer.get()
+        except RuntimeError as e:
+            if self.fallback is None:
+                raise
+            logger.warning("random.org unavailable (%s), falling back to %s source", e, self.fallback.name)
+            return self.fallback.get_random()
+
+    def get_randoms(self, num: int) -> list[float]:
+        try:
+            return self.buffer.get_many(num)
+        except RuntimeError as e:
+            if self.fallback is None:
+                raise
+            logger.warning("random.org unavailable (%s), falling back to %s source", e, self.fallback.name)
+            return self.fallback.get_randoms(num)
+
+
+class LocalSource(RandomSource):
+    """Draws numbers from the operating system CSPRNG via the secrets module
+
+    """
+
+    name = "local"
+
+    def get_random(self) -> float:
+        return secrets.randbelow(100) / 100
+
+
+class SeededSource(RandomSource):
+    """Draws a reproducible sequence of numbers from a seeded PRNG, for load tests
+
+    Attributes:
+        seed (int): the seed the sequence was started from
+    """
+
+    name = "seeded"
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def get_random(self) -> float:
+        with self._lock:
+            return self._rng.randrange(100) / 100
+
+
+RANDOM_SOURCES = {
+    RandomOrgSource.name: RandomOrgSource,
+    LocalSource.name: LocalSource,
+    SeededSource.name: SeededSource,
+}
+
+
+def create_random_source(name: str, seed: int = RANDOM_SEED) -> RandomSource:
+    """Builds the RandomSource registered under the given name
+
+    Args:
+        name (str): random_org, local or seeded
+        seed (int): the seed used by the seeded source
+
+    Returns:
+        RandomSource: a new source instance
+
+    Raises:
+        ValueError: If no source is registered under that name
+
+    """
+    if name not in RANDOM_SOURCES:
+        logger.error("Invalid random source: %s", name)
+        raise ValueError(f"Invalid random source: {name}. Must be one of {', '.join(RANDOM_SOURCES)}.")
+    if name == SeededSource.name:
+        return SeededSource(seed)
+    if name == RandomOrgSource.name and RANDOM_ORG_FALLBACK == LocalSource.name:
+        return RandomOrgSource(fallback=LocalSource())
+    return RANDOM_SOURCES[name]()
+
+
+_source: RandomSource = create_random_source(RANDOM_SOURCE)
+
+
+def get_random_source() -> RandomSource:
+    """Returns the RandomSource currently backing get_random
+
+    Returns:
+        RandomSource: the active source
+
+    """
+    return _source
+
+
+def set_random_source(source: RandomSource) -> None:
+    """Replaces the RandomSource backing get_random
+
+    Args:
+        source (RandomSource): the source to use from now on
+
+    """
+    global _source
+    logger.info("Switching random source to %s", source.name)
+    _source = source
+
+
+def get_random() -> float:
+    """Returns a random float from the configured RandomSource
+
+    With the default random_org source numbers are served from the prefetch
+    buffer, so most calls never touch the network.
+
+    Returns:
+        float: the random number
+
+    Raises:
+        RuntimeError: If the request to random.org fails or timed out
+        ValueError: If the response from random.org is invalid
+
+    """
+    random_number = _source.get_random()
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
+
+
+def get_randoms(num: int) -> list[float]:
+    """Returns several random floats from the configured RandomSource at once
+
+    The random_org source serves them from the prefetch buffer and fetches any
+    shortfall in a single request, instead of one round trip per number.
+
+    Args:
+        num (int): how many numbers to return
+
+    Returns:
+        list[float]: the random numbers
+
+    Raises:
+        RuntimeError: If the request to random.org fails or timed out
+        ValueError: If num is negative or the response from random.org is invalid
+
+    """
+    if num < 0:
+        raise ValueError(f"Invalid count: {num}. Must not be negative.")
+    random_numbers = _source.get_randoms(num)
+    logger.info("Received %d random numbers", len(random_numbers))
+    return random_numbers
@@ -1,9 +1,16 @@
+from collections import deque
 from contextlib import contextmanager
 import logging
 import os
 import sqlite3
+import threading
+import time
+from typing import Any, Optional
 
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import DB_CONNECTIONS_OPENED
+from meal_max.utils.request_timing import TimedConnection
+from meal_max.utils.sql_profiler import SQL_PROFILER
 
 
 logger = logging.getLogger(__name__)
@@ -13,6 +20,258 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/meal_max.db")
 
+# connection pool settings, also overridable from the environment
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "5"))
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of SQLite connections.
+
+    Connections are opened lazily up to max_size and handed back to the pool
+    when released instead of being closed. Idle connections older than
+    idle_timeout are closed on the next checkout, and every checkout runs a
+    cheap health check so a broken connection is never handed out.
+
+    Attributes:
+        db_path (str): Path to the SQLite database file.
+        max_size (int): Maximum number of open connections.
+        idle_timeout (float): Seconds an idle connection may stay in the pool.
+        checkout_timeout (float): Seconds to wait for a free connection.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 5, idle_timeout: float = 300.0, checkout_timeout: float = 5.0):
+        if max_size < 1:
+            raise ValueError(f"Invalid pool size: {max_size}. Must be at least 1.")
+
+        self.db_path = db_path
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: deque = deque()  # (connection, released_at) pairs, most recent last
+        self._in_use: dict[int, int] = {}  # id(connection) -> thread ident
+        self._open = 0
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "health_check_failures": 0,
+        }
+
+    def acquire(self) -> sqlite3.Connection:
+        """Checks a connection out of the pool, opening one if there is room.
+
+        Returns:
+            sqlite3.Connection: A healthy connection owned by the calling thread
+            until it is released.
+
+        Raises:
+            RuntimeError: If the pool is closed or no connection became free
+                within checkout_timeout.
+            sqlite3.Error: If a new connection could not be opened.
+        """
+        deadline = None
+        waited_since = None
+
+        while True:
+            conn = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed.")
+
+                    self._evict_idle_locked()
+
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        break
+
+                    if self._open < self.max_size:
+                        # Reserve the slot before releasing the lock to connect
+                        self._open += 1
+                        break
+
+                    if waited_since is None:
+                        waited_since = time.monotonic()
+                        deadline = waited_since + self.checkout_timeout
+                        self._stats["waits"] += 1
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        self._stats["wait_time"] += time.monotonic() - waited_since
+                        logger.error("Timed out waiting %.1fs for a database connection", self.checkout_timeout)
+                        raise RuntimeError("Timed out waiting for a database connection.")
+                    self._cond.wait(remaining)
+
+            # The idle connection is ours now, so a slow health check only
+            # holds up this checkout rather than everyone behind the lock
+            if conn is None or self._is_healthy(conn):
+                break
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+                self._discard_locked(conn)
+                self._cond.notify()
+
+        if waited_since is not None:
+            with self._cond:
+                self._stats["wait_time"] += time.monotonic() - waited_since
+
+        if conn is None:
+            # Opening a file can be slow, so other checkouts are not held up by it
+            try:
+                conn = self._connect()
+            except sqlite3.Error:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+            self._in_use[id(conn)] = threading.get_ident()
+
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Returns a connection to the pool.
+
+        Any transaction left open by the caller is rolled back, matching the
+        behaviour of closing the connection outright.
+
+        Args:
+            conn (sqlite3.Connection): A connection previously returned by acquire.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            reusable = True
+        except sqlite3.Error:
+            reusable = False
+
+        with self._cond:
+            self._in_use.pop(id(conn), None)
+            if reusable and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard_locked(conn)
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Closes every idle connection and refuses further checkouts.
+
+        Connections still checked out are closed as they are released.
+        """
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard_locked(conn)
+            self._cond.notify_all()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Returns a snapshot of the pool counters.
+
+        Returns:
+            dict: checkouts, waits, wait_time (seconds), timeouts, connection
+            open/close counts, health check failures and current pool occupancy.
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["wait_time"] = round(stats["wait_time"], 6)
+            stats["avg_wait_time"] = round(self._stats["wait_time"] / self._stats["waits"], 6) if self._stats["waits"] else 0.0
+            stats["max_size"] = self.max_size
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = len(self._in_use)
+        return stats
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections move between request threads, so disable the same-thread
+        # check; the pool guarantees only one thread uses a connection at a time.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=TimedConnection)
+        with self._cond:
+            self._stats["connections_opened"] += 1
+            open_count = self._open
+        DB_CONNECTIONS_OPENED.inc()
+        logger.info("Opened new pooled database connection (%d/%d).", open_count, self.max_size)
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1;").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logger.warning("Discarding unhealthy pooled connection: %s", str(e))
+            return False
+
+    def _evict_idle_locked(self) -> None:
+        # The oldest idle connections sit at the left of the deque
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.popleft()
+            self._discard_locked(conn)
+
+    def _discard_locked(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._open -= 1
+        self._stats["connections_closed"] += 1
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Returns the process-wide connection pool, creating it on first use.
+
+    Returns:
+        ConnectionPool: The pool backing get_db_connection.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    DB_PATH,
+                    max_size=DB_POOL_MAX_SIZE,
+                    idle_timeout=DB_POOL_IDLE_TIMEOUT,
+                    checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT,
+                )
+    return _pool
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Returns the counters of the process-wide connection pool.
+
+    Returns:
+        dict: See ConnectionPool.get_stats.
+    """
+    return get_pool().get_stats()
+
+
+def reset_pool() -> None:
+    """Closes the process-wide pool so the next checkout builds a fresh one.
+
+    Useful after DB_PATH changes or after the database file was recreated.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
 
 def check_database_connection():
     try:
@@ -37,22 +296,31 @@ def check_table_exists(tablename: str):
         logger.error(error_message)
         raise Exception(error_message) from e
 
-###################################################
-#
-# This one yields rather than returns.
-# What is the type of the yielded value?
-#
-###################################################
 @contextmanager
 def get_db_connection():
+    """
+    Context manager that checks a connection out of the pool.
+
+    While SQL profiling is on, the statements run on the connection are
+    traced until it is returned.
+
+    Yields:
+        sqlite3.Connection: A pooled SQLite connection. It is returned to the
+        pool (with any uncommitted work rolled back) when the block exits.
+    """
+    pool = get_pool()
     conn = None
+    trace = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = pool.acquire()
+        trace = SQL_PROFILER.trace(conn)
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
+        if trace:
+            trace.close()
         if conn:
-            conn.close()
-            logger.info("Database connection closed.")
+            pool.release(conn)
+            logger.info("Database connection returned to pool.")
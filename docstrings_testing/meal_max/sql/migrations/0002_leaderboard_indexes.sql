@@ -0,0 +1,8 @@
+-- win_pct is computed by SQLite from wins and battles, so it never drifts.
+ALTER TABLE meals ADD COLUMN win_pct REAL GENERATED ALWAYS AS (CASE WHEN battles > 0 THEN wins * 1.0 / battles END) VIRTUAL;
+
+-- Leaderboard indexes: only ranked (non-deleted, battled) meals are indexed,
+-- so get_leaderboard reads them in order instead of sorting the whole table.
+-- get_leaderboard must filter with exactly "deleted = FALSE AND battles > 0".
+CREATE INDEX IF NOT EXISTS idx_meals_leaderboard_wins ON meals(wins DESC, id) WHERE deleted = FALSE AND battles > 0;
+CREATE INDEX IF NOT EXISTS idx_meals_leaderboard_win_pct ON meals(win_pct DESC, id) WHERE deleted = FALSE AND battles > 0;
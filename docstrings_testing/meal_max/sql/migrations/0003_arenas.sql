@@ -0,0 +1,12 @@
+-- Battle arenas shared by every worker process. combatants holds a JSON list
+-- of the prepped meals; version is bumped on every write so concurrent
+-- updates can be detected with compare-and-swap instead of locks.
+CREATE TABLE IF NOT EXISTS arenas (
+    arena_id TEXT PRIMARY KEY,
+    combatants TEXT NOT NULL DEFAULT '[]',
+    version INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL
+);
+
+-- Expiry and least-recently-used eviction scan arenas by last use.
+CREATE INDEX IF NOT EXISTS idx_arenas_last_used ON arenas(last_used);
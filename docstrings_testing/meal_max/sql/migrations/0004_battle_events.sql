@@ -0,0 +1,17 @@
+-- Append-only history of every battle, written in batches by the
+-- battle_event_model write-behind queue. Rows are never updated or deleted,
+-- so the id order is the order the battles were flushed in.
+CREATE TABLE IF NOT EXISTS battle_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    combatant_1_id INTEGER NOT NULL,
+    combatant_2_id INTEGER NOT NULL,
+    score_1 REAL NOT NULL,
+    score_2 REAL NOT NULL,
+    random_number REAL NOT NULL,
+    winner_id INTEGER NOT NULL,
+    battled_at REAL NOT NULL
+);
+
+-- Per-meal history lookups.
+CREATE INDEX IF NOT EXISTS idx_battle_events_combatant_1 ON battle_events(combatant_1_id);
+CREATE INDEX IF NOT EXISTS idx_battle_events_combatant_2 ON battle_events(combatant_2_id);
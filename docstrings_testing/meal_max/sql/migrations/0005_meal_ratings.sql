@@ -0,0 +1,7 @@
+-- Elo rating per meal, updated with every recorded battle. The default must
+-- match rating_model.RATING_INITIAL.
+ALTER TABLE meals ADD COLUMN rating REAL NOT NULL DEFAULT 1500;
+
+-- Same partial-index shape as the other leaderboard orders, so
+-- get_leaderboard(sort_by="rating") is an index scan.
+CREATE INDEX IF NOT EXISTS idx_meals_leaderboard_rating ON meals(rating DESC, id) WHERE deleted = FALSE AND battles > 0;
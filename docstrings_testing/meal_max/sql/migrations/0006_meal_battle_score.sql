@@ -0,0 +1,14 @@
+-- Battle score is computed once by create_meal and stored, instead of on
+-- every battle. Meals never change price, cuisine or difficulty, so it
+-- cannot drift. The formula must match kitchen_model.compute_battle_score.
+ALTER TABLE meals ADD COLUMN battle_score REAL;
+
+UPDATE meals SET battle_score = price * LENGTH(cuisine) - CASE difficulty
+    WHEN 'HIGH' THEN 1
+    WHEN 'MED' THEN 2
+    WHEN 'LOW' THEN 3
+END;
+
+-- Finding opponents with a similar score is a range seek on this index.
+-- Queries must filter with exactly "deleted = FALSE".
+CREATE INDEX IF NOT EXISTS idx_meals_battle_score ON meals(battle_score, id) WHERE deleted = FALSE;
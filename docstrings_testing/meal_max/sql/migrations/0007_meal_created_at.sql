@@ -0,0 +1,6 @@
+-- When each meal row was inserted, on the same clock as
+-- battle_events.battled_at. recompute_ratings skips events fought before one
+-- of their combatants existed, which only happens once an id is reused.
+-- Meals created before this migration stay NULL and are treated as having
+-- always existed.
+ALTER TABLE meals ADD COLUMN created_at REAL;
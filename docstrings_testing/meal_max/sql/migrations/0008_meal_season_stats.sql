@@ -0,0 +1,5 @@
+-- Round-robin season totals, kept apart from battles and wins. Seasons are
+-- unrated and leave no battle history, so counting them with the rated
+-- battles would let the leaderboard's win counts drift from its ratings.
+ALTER TABLE meals ADD COLUMN season_battles INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE meals ADD COLUMN season_wins INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,30 @@
+from contextlib import contextmanager
+import os
+import sqlite3
+
+import pytest
+
+from meal_max.utils.migrations import run_migrations
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "sql", "migrations")
+
+# Every model that opens its own connections through sql_utils
+DB_MODELS = ("arena_model", "battle_event_model", "kitchen_model", "rating_model")
+
+@pytest.fixture
+def sqlite_db(mocker, tmp_path):
+    """Point the models at a real, empty database built from the migrations"""
+    db_path = str(tmp_path / "meal_max.db")
+    run_migrations(db_path, MIGRATIONS_DIR)
+
+    @contextmanager
+    def real_get_db_connection():
+        conn = sqlite3.connect(db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    for module in DB_MODELS:
+        mocker.patch(f"meal_max.models.{module}.get_db_connection", real_get_db_connection)
+    return db_path
@@ -0,0 +1,287 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.models.battle_event_model import BattleEventLog
+from meal_max.models.arena_model import (
+    ArenaConflictError,
+    ArenaNotFoundError,
+    ArenaRegistry,
+    SqliteArenaRegistry,
+    create_arena_registry,
+)
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import Meal, create_meal, get_meal_by_id
+
+@pytest.fixture(autouse=True)
+def event_log(mocker):
+    """Queue battle events in a private log that is never flushed"""
+    log = BattleEventLog(flush_interval=3600, batch_size=10000, max_buffer=10000)
+    mocker.patch("meal_max.models.battle_event_model._event_log", log)
+    return log
+
+@pytest.fixture
+def registry():
+    return ArenaRegistry(ttl=60, max_arenas=3)
+
+@pytest.fixture
+def sample_combatant():
+    return Meal(1, 'sushi', 'japanese', 3.95, 'MED')
+
+@pytest.fixture
+def sqlite_db(sqlite_db):
+    """Add the two meals the arena tests fight with"""
+    create_meal('sushi', 'japanese', 3.95, 'MED')
+    create_meal('pizza', 'italian', 24.95, 'LOW')
+    return sqlite_db
+
+def test_arenas_are_isolated(registry, sample_combatant):
+    """Test that combatants prepped in one arena do not leak into another"""
+    first = registry.create()
+    second = registry.create()
+
+    with registry.use(first) as battle_model:
+        battle_model.prep_combatant(sample_combatant)
+
+    with registry.use(first) as battle_model:
+        assert battle_model.get_combatants() == [sample_combatant]
+    with registry.use(second) as battle_model:
+        assert battle_model.get_combatants() == []
+
+def test_use_unknown_arena(registry):
+    """Test error when using an arena that was never opened"""
+    with pytest.raises(ArenaNotFoundError, match="Arena nope not found"):
+        with registry.use("nope"):
+            pass
+
+def test_use_creates_when_asked(registry):
+    """Test that the shared default arena is opened on first use"""
+    with registry.use("default", create=True) as battle_model:
+        assert battle_model.get_combatants() == []
+    assert registry.get_stats()["open"] == 1
+
+def test_create_duplicate_arena(registry):
+    """Test error when opening an arena id twice"""
+    registry.create("lobby")
+    with pytest.raises(ValueError, match="Arena lobby already exists"):
+        registry.create("lobby")
+
+def test_delete_arena(registry):
+    """Test that a closed arena can no longer be used"""
+    arena_id = registry.create()
+    registry.delete(arena_id)
+
+    with pytest.raises(ArenaNotFoundError):
+        with registry.use(arena_id):
+            pass
+    with pytest.raises(ArenaNotFoundError):
+        registry.delete(arena_id)
+
+def test_idle_arenas_expire():
+    """Test that arenas idle past the TTL are evicted"""
+    registry = ArenaRegistry(ttl=0, max_arenas=3)
+    arena_id = registry.create()
+
+    with pytest.raises(ArenaNotFoundError):
+        with registry.use(arena_id):
+            pass
+    assert registry.get_stats()["expired"] == 1
+
+def test_least_recently_used_arena_is_evicted(registry):
+    """Test that the memory cap evicts the arena unused for longest"""
+    first, second, third = registry.create(), registry.create(), registry.create()
+    with registry.use(first):
+        pass
+
+    registry.create()
+
+    with pytest.raises(ArenaNotFoundError):
+        with registry.use(second):
+            pass
+    with registry.use(first), registry.use(third):
+        pass
+    stats = registry.get_stats()
+    assert stats["open"] == 3
+    assert stats["evicted"] == 1
+
+def test_invalid_max_arenas():
+    """Test error when the registry could not hold a single arena"""
+    with pytest.raises(ValueError, match="Invalid max arenas: 0. Must be at least 1."):
+        ArenaRegistry(max_arenas=0)
+
+def test_arena_lock_serializes_one_arena(registry):
+    """Test that a second request for the same arena waits for the first"""
+    arena_id = registry.create()
+    other_id = registry.create()
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with registry.use(arena_id):
+            entered.set()
+            release.wait(1)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    assert entered.wait(1)
+
+    # A different arena is not blocked
+    with registry.use(other_id):
+        pass
+
+    blocked = threading.Event()
+    def wait_for_arena():
+        with registry.use(arena_id):
+            blocked.set()
+    waiter = threading.Thread(target=wait_for_arena)
+    waiter.start()
+    assert not blocked.wait(0.1)
+
+    release.set()
+    holder.join()
+    waiter.join()
+    assert blocked.is_set()
+
+
+##SQLite store
+
+def test_create_arena_registry():
+    """Test building registries by store name"""
+    assert isinstance(create_arena_registry("memory"), ArenaRegistry)
+    assert isinstance(create_arena_registry("sqlite"), SqliteArenaRegistry)
+    with pytest.raises(ValueError, match="Invalid arena store: redis"):
+        create_arena_registry("redis")
+
+def test_sqlite_arena_shared_between_registries(sqlite_db):
+    """Test that two workers with their own registry see the same combatants"""
+    worker_1 = SqliteArenaRegistry(ttl=60)
+    worker_2 = SqliteArenaRegistry(ttl=60)
+    arena_id = worker_1.create()
+
+    worker_1.prep_combatant(arena_id, get_meal_by_id(1))
+    worker_2.prep_combatant(arena_id, get_meal_by_id(2))
+
+    assert [meal.meal for meal in worker_1.get_combatants(arena_id)] == ['sushi', 'pizza']
+    with pytest.raises(ValueError, match="Combatant list is full"):
+        worker_1.prep_combatant(arena_id, get_meal_by_id(1))
+
+def test_set_combatants_replaces_both(registry, sample_combatant):
+    """Test that a matched pair replaces whatever the arena held"""
+    other = Meal(2, 'pizza', 'italian', 24.95, 'LOW')
+    arena_id = registry.create()
+    registry.prep_combatant(arena_id, other)
+
+    assert registry.set_combatants(arena_id, [sample_combatant, other]) == [sample_combatant, other]
+    with pytest.raises(ValueError, match="Cannot set 3 combatants, an arena holds two."):
+        registry.set_combatants(arena_id, [sample_combatant, other, sample_combatant])
+    assert registry.get_combatants(arena_id) == [sample_combatant, other]
+
+def test_sqlite_set_combatants(sqlite_db):
+    """Test replacing both combatants of a shared arena in one write"""
+    registry = SqliteArenaRegistry(ttl=60)
+    registry.prep_combatant("default", get_meal_by_id(1), create=True)
+
+    combatants = registry.set_combatants("default", [get_meal_by_id(2), get_meal_by_id(1)])
+
+    assert [meal.meal for meal in combatants] == ['pizza', 'sushi']
+    assert [meal.meal for meal in SqliteArenaRegistry(ttl=60).get_combatants("default")] == ['pizza', 'sushi']
+
+def test_sqlite_arena_battle_records_stats(mocker, sqlite_db):
+    """Test that a battle updates the stats and the arena together"""
+    mocker.patch("meal_max.models.battle_model.get_random", return_value=0.0)
+    registry = SqliteArenaRegistry(ttl=60)
+    registry.prep_combatant("default", get_meal_by_id(1), create=True)
+    registry.prep_combatant("default", get_meal_by_id(2))
+
+    winner = registry.battle("default")
+
+    assert [meal.meal for meal in registry.get_combatants("default")] == [winner]
+    conn = sqlite3.connect(sqlite_db)
+    assert conn.execute("SELECT SUM(battles), SUM(wins) FROM meals").fetchone() == (2, 1)
+    conn.close()
+
+def test_sqlite_arena_battle_draws_outside_write_lock(mocker, sqlite_db):
+    """Test that the random draw happens before the battle takes the database write lock"""
+    writable = []
+
+    def draw():
+        # Another worker must still be able to write while the number is fetched
+        conn = sqlite3.connect(sqlite_db, timeout=0)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.rollback()
+            writable.append(True)
+        finally:
+            conn.close()
+        return 0.0
+
+    mocker.patch("meal_max.models.battle_model.get_random", side_effect=draw)
+    registry = SqliteArenaRegistry(ttl=60)
+    registry.prep_combatant("default", get_meal_by_id(1), create=True)
+    registry.prep_combatant("default", get_meal_by_id(2), create=True)
+
+    registry.battle("default", create=True)
+
+    assert writable == [True]
+
+def test_sqlite_arena_retries_lost_race(mocker, sqlite_db):
+    """Test that a write losing a compare-and-swap race is retried on fresh state"""
+    registry = SqliteArenaRegistry(ttl=60)
+    arena_id = registry.create()
+    original_load = registry._load
+    calls = []
+
+    def racing_load(cursor, arena_id, create):
+        loaded = original_load(cursor, arena_id, create)
+        if not calls:
+            # Another worker writes between our read and our write
+            SqliteArenaRegistry(ttl=60).prep_combatant(arena_id, get_meal_by_id(2))
+        calls.append(1)
+        return loaded
+
+    mocker.patch.object(registry, "_load", side_effect=racing_load)
+    combatants = registry.prep_combatant(arena_id, get_meal_by_id(1))
+
+    assert [meal.meal for meal in combatants] == ['pizza', 'sushi']
+    assert registry.get_stats()["conflicts"] == 1
+
+def test_sqlite_arena_gives_up_after_retries(mocker, sqlite_db):
+    """Test error when every attempt loses the race"""
+    registry = SqliteArenaRegistry(ttl=60, max_retries=1)
+    arena_id = registry.create()
+    # A stale version never matches, as if another worker always wrote first
+    mocker.patch.object(registry, "_load", side_effect=lambda cursor, arena_id, create: (BattleModel(), -1))
+
+    with pytest.raises(ArenaConflictError, match=f"Arena {arena_id} is being modified concurrently"):
+        registry.clear_combatants(arena_id)
+    assert registry.get_stats()["conflicts"] == 2
+
+def test_sqlite_arena_expiry_and_eviction(sqlite_db):
+    """Test that expired arenas are gone and the cap evicts the oldest"""
+    expired = SqliteArenaRegistry(ttl=0)
+    arena_id = expired.create()
+    with pytest.raises(ArenaNotFoundError):
+        expired.get_combatants(arena_id)
+
+    registry = SqliteArenaRegistry(ttl=60, max_arenas=2)
+    first = registry.create()
+    registry.create()
+    registry.create()
+    with pytest.raises(ArenaNotFoundError):
+        registry.get_combatants(first)
+    assert registry.get_stats()["open"] == 2
+
+def test_sqlite_create_on_use_respects_arena_limit(sqlite_db):
+    """Test that arenas opened on first use are held to max_arenas like created ones"""
+    registry = SqliteArenaRegistry(ttl=60, max_arenas=2)
+    for arena_id in ("a", "b", "c"):
+        registry.get_combatants(arena_id, create=True)
+    registry.get_combatants("c", create=True)
+
+    with pytest.raises(ArenaNotFoundError):
+        registry.get_combatants("a")
+    stats = registry.get_stats()
+    assert stats["open"] == 2
+    assert stats["created"] == 3
+    assert stats["evicted"] == 1
@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.models.battle_event_model import BattleEvent, BattleEventLog, get_battle_events
+
+def make_event(winner_id=1):
+    return BattleEvent(1, 2, 29.6, 171.65, 0.39, winner_id)
+
+def test_flush_writes_in_order(sqlite_db):
+    """Test that buffered events are written in the order they were appended"""
+    log = BattleEventLog(flush_interval=3600, batch_size=2, max_buffer=10)
+    for winner_id in (1, 2, 1):
+        log.append(make_event(winner_id))
+
+    assert log.flush() == 3
+
+    events = get_battle_events()
+    assert [event['winner_id'] for event in events] == [1, 2, 1]
+    assert events[0]['score_2'] == 171.65
+    assert log.get_stats()["flushes"] == 2
+
+def test_get_battle_events_pages(sqlite_db):
+    """Test reading the history after a given id"""
+    log = BattleEventLog(flush_interval=3600, batch_size=10, max_buffer=10)
+    for _ in range(5):
+        log.append(make_event())
+    log.flush()
+
+    first_page = get_battle_events(limit=2)
+    second_page = get_battle_events(after_id=first_page[-1]['id'], limit=10)
+    assert [event['id'] for event in first_page + second_page] == [1, 2, 3, 4, 5]
+
+def test_get_battle_events_invalid_limit():
+    """Test error when asking for an empty page or more than BATTLE_EVENTS_MAX_LIMIT events"""
+    with pytest.raises(ValueError, match="Invalid limit: 0. Must be between 1 and 1000."):
+        get_battle_events(limit=0)
+    with pytest.raises(ValueError, match="Invalid limit: 1001. Must be between 1 and 1000."):
+        get_battle_events(limit=1001)
+
+def test_background_flush(sqlite_db):
+    """Test that a full batch is written by the background thread"""
+    log = BattleEventLog(flush_interval=3600, batch_size=2, max_buffer=10)
+    written = threading.Event()
+    original_write = log._write
+
+    def write(batch):
+        original_write(batch)
+        written.set()
+
+    log._write = write
+    log.append(make_event())
+    log.append(make_event())
+
+    assert written.wait(1)
+    assert len(get_battle_events()) == 2
+    log.close()
+
+def test_buffer_is_bounded():
+    """Test that events beyond the buffer limit are dropped and counted"""
+    log = BattleEventLog(flush_interval=3600, batch_size=2, max_buffer=2)
+    log._ensure_thread = lambda: None
+
+    assert log.append(make_event())
+    assert log.append(make_event())
+    assert not log.append(make_event())
+
+    stats = log.get_stats()
+    assert stats["buffered"] == 2
+    assert stats["dropped"] == 1
+
+def test_close_flushes_remaining_events(sqlite_db):
+    """Test that shutting down writes what is still buffered"""
+    log = BattleEventLog(flush_interval=3600, batch_size=10, max_buffer=10)
+    log.append(make_event())
+
+    log.close()
+
+    assert len(get_battle_events()) == 1
+    assert not log.append(make_event())
+
+def test_failed_flush_keeps_events(mocker):
+    """Test that a batch that cannot be written goes back in the buffer"""
+    log = BattleEventLog(flush_interval=3600, batch_size=10, max_buffer=10)
+    log._ensure_thread = lambda: None
+    mocker.patch.object(log, "_write", side_effect=sqlite3.OperationalError("database is locked"))
+    log.append(make_event(1))
+    log.append(make_event(2))
+
+    with pytest.raises(sqlite3.OperationalError):
+        log.flush()
+
+    assert [event.winner_id for event in log._buffer] == [1, 2]
+    assert log.get_stats()["flush_failures"] == 1
+
+def test_pool_timeout_keeps_events(mocker):
+    """Test that a batch is put back when no connection could be checked out"""
+    log = BattleEventLog(flush_interval=3600, batch_size=10, max_buffer=10)
+    log._ensure_thread = lambda: None
+    mocker.patch.object(log, "_write", side_effect=RuntimeError("Timed out waiting for a database connection."))
+    log.append(make_event(1))
+
+    with pytest.raises(RuntimeError):
+        log.flush()
+
+    assert [event.winner_id for event in log._buffer] == [1]
+    assert log.get_stats()["flush_failures"] == 1
+
+def test_background_flush_survives_errors(sqlite_db):
+    """Test that the flush thread keeps running after a failed write"""
+    log = BattleEventLog(flush_interval=0.01, batch_size=1, max_buffer=10)
+    written = threading.Event()
+    original_write = log._write
+    attempts = []
+
+    def write(batch):
+        attempts.append(len(batch))
+        if len(attempts) == 1:
+            raise RuntimeError("Connection pool is closed.")
+        original_write(batch)
+        written.set()
+
+    log._write = write
+    log.append(make_event())
+
+    assert written.wait(1)
+    assert log._thread.is_alive()
+    assert len(get_battle_events()) == 1
+    log.close()
+
+def test_invalid_max_buffer():
+    """Test error when the buffer cannot hold a single batch"""
+    with pytest.raises(ValueError, match="Invalid max buffer: 1. Must be at least the batch size"):
+        BattleEventLog(batch_size=2, max_buffer=1)
@@ -3,9 +3,17 @@ import re
 import sqlite3
 from contextlib import contextmanager
 
+from meal_max.models.battle_event_model import BattleEvent, BattleEventLog
 from meal_max.models.battle_model import BattleModel
 from meal_max.models.kitchen_model import Meal
 
+@pytest.fixture(autouse=True)
+def event_log(mocker):
+    """Queue battle events in a private log that is never flushed"""
+    log = BattleEventLog(flush_interval=3600, batch_size=10000, max_buffer=10000)
+    mocker.patch("meal_max.models.battle_event_model._event_log", log)
+    return log
+
 @pytest.fixture()
 def battle_model():
     """fixture to provide new instance of BattleModel for each test"""
@@ -85,6 +93,10 @@ def test_get_battle_score(battle_model, sample_combatant1):
     #24.95*len("italian")-3 = 171.65
     assert battle_model.get_battle_score(sample_combatant1) == ans
 
+def test_get_battle_score_uses_stored_score(battle_model):
+    """tests that the score loaded with a meal is used as is"""
+    assert battle_model.get_battle_score(Meal(1, 'sushi', 'japanese', 3.95, 'MED', battle_score=5.0)) == 5.0
+
 
 #Unit tests for clear combatants
 def test_clear_combatants(battle_model, sample_combatant_list):
@@ -103,14 +115,13 @@ def test_battle(battle_model, mocker, sample_combatant_list):
     assert len(battle_model.combatants) == 2
 
     mocker.patch.object(battle_model, "get_battle_score", side_effect=[29.6, 171.65])
-    mock_random = mocker.patch("meal_max.utils.random_utils.get_random", return_value=0.39)
-    mock_update_meal_stats = mocker.patch("meal_max.models.battle_model.update_meal_stats")
+    mock_random = mocker.patch("meal_max.models.battle_model.get_random", return_value=0.39)
+    mock_record_battle_result = mocker.patch("meal_max.models.battle_model.record_battle_result")
 
 
     assert battle_model.battle() == 'sushi'
 
-    mock_update_meal_stats.assert_any_call(1, 'win')
-    mock_update_meal_stats.assert_any_call(2, 'loss')
+    mock_record_battle_result.assert_called_once_with(1, 2)
 
     #check loser has been removed and winner stays
     assert battle_model.combatants[0].meal == 'sushi'
@@ -130,3 +141,48 @@ def test_battle_not_enough_combatants(battle_model, sample_combatant1):
 
 
 
+
+
+#Unit tests for battle batch
+def test_battle_batch(battle_model, mocker, sample_combatant_list):
+    """tests resolving several battles with one lookup, one draw and one write"""
+    mock_get_meals = mocker.patch("meal_max.models.battle_model.get_meals_by_names", return_value=sample_combatant_list)
+    mocker.patch.object(battle_model, "get_battle_score", side_effect=[29.6, 100.0])
+    mock_randoms = mocker.patch("meal_max.models.battle_model.get_randoms", return_value=[0.39, 0.99, 0.1])
+    mock_record_battle_results = mocker.patch("meal_max.models.battle_model.record_battle_results")
+
+    results = battle_model.battle_batch([('sushi', 'pizza'), ('sushi', 'pizza'), ('pizza', 'sushi')])
+
+    # delta is 0.704, so the first combatant wins unless the draw is higher
+    assert [result['winner'] for result in results] == ['sushi', 'pizza', 'pizza']
+    mock_get_meals.assert_called_once_with(['sushi', 'pizza'])
+    mock_randoms.assert_called_once_with(3)
+    mock_record_battle_results.assert_called_once_with([(1, 2), (2, 1), (2, 1)])
+    assert battle_model.combatants == []
+
+def test_battle_batch_empty(battle_model):
+    """tests batch battle with no pairs"""
+    with pytest.raises(ValueError, match="At least one pair of meals is required."):
+        battle_model.battle_batch([])
+
+def test_battle_batch_self_battle(battle_model):
+    """tests batch battle with a meal fighting itself"""
+    with pytest.raises(ValueError, match=re.escape("Invalid pair: ['sushi', 'sushi']")):
+        battle_model.battle_batch([('sushi', 'sushi')])
+
+def test_battle_batch_too_large(battle_model, mocker):
+    """tests batch battle over the size limit"""
+    mocker.patch("meal_max.models.battle_model.BATTLE_BATCH_MAX_SIZE", 1)
+    with pytest.raises(ValueError, match="Too many pairs: 2. At most 1 can be battled at once."):
+        battle_model.battle_batch([('sushi', 'pizza'), ('pizza', 'sushi')])
+
+def test_battle_queues_event(battle_model, mocker, event_log, sample_combatant_list):
+    """tests that a battle is queued for the history log with its scores and draw"""
+    battle_model.combatants.extend(sample_combatant_list)
+    mocker.patch.object(battle_model, "get_battle_score", side_effect=[29.6, 171.65])
+    mocker.patch("meal_max.models.battle_model.get_random", return_value=0.39)
+    mocker.patch("meal_max.models.battle_model.record_battle_result")
+
+    battle_model.battle()
+
+    assert list(event_log._buffer) == [BattleEvent(1, 2, 29.6, 171.65, 0.39, 1, event_log._buffer[0].battled_at)]
@@ -0,0 +1,87 @@
+import pytest
+
+from meal_max.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def breaker():
+    """fixture to provide a breaker that opens after two failures"""
+    return CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+
+
+@pytest.fixture
+def tripped_breaker():
+    """fixture to provide an open breaker whose reset timeout has already passed"""
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_starts_closed(breaker):
+    """tests that a new breaker lets calls through"""
+    assert breaker.allow_request()
+    assert breaker.get_state()["state"] == "closed"
+
+
+def test_breaker_opens_after_threshold(breaker):
+    """tests that consecutive failures open the breaker"""
+    breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+    state = breaker.get_state()
+    assert state["state"] == "open"
+    assert state["times_opened"] == 1
+    assert state["rejected"] == 1
+
+
+def test_success_resets_failure_count(breaker):
+    """tests that a success in between failures keeps the breaker closed"""
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.allow_request()
+    assert breaker.get_state()["consecutive_failures"] == 1
+
+
+def test_half_open_allows_single_trial(tripped_breaker):
+    """tests that only one trial call goes through after the reset timeout"""
+    assert tripped_breaker.allow_request()
+    assert not tripped_breaker.allow_request()
+    assert tripped_breaker.get_state()["state"] == "half_open"
+
+
+def test_half_open_success_closes(tripped_breaker):
+    """tests that a successful trial call closes the breaker"""
+    tripped_breaker.allow_request()
+
+    tripped_breaker.record_success()
+    assert tripped_breaker.get_state()["state"] == "closed"
+    assert tripped_breaker.allow_request()
+
+
+def test_half_open_failure_reopens(tripped_breaker):
+    """tests that a failed trial call re-opens the breaker"""
+    tripped_breaker.allow_request()
+
+    tripped_breaker.record_failure()
+    assert tripped_breaker.get_state()["state"] == "open"
+    assert tripped_breaker.get_state()["times_opened"] == 2
+
+
+def test_reset(breaker):
+    """tests forcing the breaker closed"""
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.reset()
+    assert breaker.allow_request()
+
+
+def test_invalid_threshold():
+    """tests error when the breaker could never open"""
+    with pytest.raises(ValueError, match="Invalid failure threshold: 0. Must be at least 1."):
+        CircuitBreaker("test", failure_threshold=0)
@@ -10,12 +10,16 @@ from meal_max.models.kitchen_model import (
     clear_meals,
     delete_meal,
     get_leaderboard,
+    get_leaderboard_page,
     get_meal_by_id,
     get_meal_by_name,
+    get_meals_by_names,
+    record_battle_result,
+    record_battle_results,
+    record_season_stats,
     update_meal_stats,
 
 
-
 )
 
 @pytest.fixture
@@ -64,13 +68,14 @@ def mock_cursor(mocker):
 
 ##Create Meal 
 
-def test_create_meal(mock_cursor):
+def test_create_meal(mocker, mock_cursor):
     "Creating a meal"
+    mocker.patch("meal_max.models.kitchen_model.time.time", return_value=1700000000.0)
     create_meal(meal ='steak', cuisine = 'american', price = 33.3, difficulty ='MED')
 
     expected_query = normalize_whitespace("""
-        INSERT INTO meals (meal, cuisine, price, difficulty)
-        VALUES (?, ?, ?, ?)
+        INSERT INTO meals (meal, cuisine, price, difficulty, battle_score, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
     """)
 
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
@@ -82,7 +87,7 @@ def test_create_meal(mock_cursor):
     actual_arguments = mock_cursor.execute.call_args[0][1]
 
     # Assert that the SQL query was executed with the correct arguments
-    expected_arguments = ('steak', 'american', 33.3, 'MED')
+    expected_arguments = ('steak', 'american', 33.3, 'MED', 264.4, 1700000000.0)
     assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
 
 
@@ -174,7 +179,7 @@ def test_delete_meal_already_deleted(mock_cursor):
 
 def test_get_meal_by_id(mock_cursor):
     # Simulate that the meal exists (id = 1)
-    mock_cursor.fetchone.return_value = (1, 'steak', 'american', 33.3, 'MED', 0)
+    mock_cursor.fetchone.return_value = (1, 'steak', 'american', 33.3, 'MED', 0, 264.4)
 
     # Call the function and check the result
     result = get_meal_by_id(1)
@@ -186,7 +191,7 @@ def test_get_meal_by_id(mock_cursor):
     assert result == expected_result, f"Expected {expected_result}, got {result}"
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id = ?")
+    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, deleted, battle_score FROM meals WHERE id = ?")
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
 
     # Assert that the SQL query was correct
@@ -212,7 +217,7 @@ def test_get_meal_by_id_bad_id(mock_cursor):
 
 def test_get_meal_by_name(mock_cursor):
     # Simulate that the meal exists (1, 'steak', 'american', 33.3, 'MED')
-    mock_cursor.fetchone.return_value = (1, 'steak', 'american', 33.3, 'MED', False)
+    mock_cursor.fetchone.return_value = (1, 'steak', 'american', 33.3, 'MED', False, 264.4)
 
     # Call the function and check the result
     result = get_meal_by_name("meal")
@@ -224,7 +229,7 @@ def test_get_meal_by_name(mock_cursor):
     assert result == expected_result, f"Expected {expected_result}, got {result}"
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE meal = ? ")
+    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, deleted, battle_score FROM meals WHERE meal = ? ")
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
 
     # Assert that the SQL query was correct
@@ -249,12 +254,37 @@ def test_get_meal_already_deleted(mock_cursor):
 
 
     # Simulate that the meal exists but is already marked as deleted
-    mock_cursor.fetchone.return_value = (1, 'steak', 'american', 33.3, 'MED', True)
+    mock_cursor.fetchone.return_value = (1, 'steak', 'american', 33.3, 'MED', True, 264.4)
 
     # Expect a ValueError when attempting to delete a meal that's already been deleted
     with pytest.raises(ValueError, match="Meal with name steak has been deleted"):
         get_meal_by_name("steak")
 
+def test_get_meals_by_names(mock_cursor):
+    """Test loading several meals with one query, in the order asked for"""
+    mock_cursor.fetchall.return_value = [(1, 'steak', 'american', 33.3, 'MED', False, 264.4), (2, 'salmon', 'norwegian', 27.3, 'LOW', False, 242.7)]
+
+    result = get_meals_by_names(["salmon", "steak"])
+
+    assert result == [Meal(2, 'salmon', 'norwegian', 27.3, 'LOW'), Meal(1, 'steak', 'american', 33.3, 'MED')]
+    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, deleted, battle_score FROM meals WHERE meal IN (?, ?)")
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == expected_query
+    assert mock_cursor.execute.call_count == 1
+
+def test_get_meals_by_names_missing(mock_cursor):
+    """Test error when one of the meals does not exist"""
+    mock_cursor.fetchall.return_value = [(1, 'steak', 'american', 33.3, 'MED', False, 264.4)]
+
+    with pytest.raises(ValueError, match="Meal with name tofu not found"):
+        get_meals_by_names(["steak", "tofu"])
+
+def test_get_meals_by_names_deleted(mock_cursor):
+    """Test error when one of the meals has been deleted"""
+    mock_cursor.fetchall.return_value = [(1, 'steak', 'american', 33.3, 'MED', True, 264.4)]
+
+    with pytest.raises(ValueError, match="Meal with name steak has been deleted"):
+        get_meals_by_names(["steak"])
+
 
 ## update meal stats
 
@@ -316,6 +346,78 @@ def test_update_meal_stats_invalid_result(mock_cursor):
     
 
 
+## record battle results
+
+def test_record_battle_result(mock_cursor):
+    """Test recording a single battle in one transaction"""
+    mock_cursor.fetchall.return_value = [(1, False, 1500.0), (2, False, 1500.0)]
+
+    record_battle_result(1, 2)
+
+    expected_select = normalize_whitespace("SELECT id, deleted, rating FROM meals WHERE id IN (?, ?)")
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == expected_select
+    assert mock_cursor.execute.call_args[0][1] == [1, 2]
+
+    expected_update = normalize_whitespace("UPDATE meals SET battles = battles + ?, wins = wins + ?, rating = ? WHERE id = ?")
+    assert normalize_whitespace(mock_cursor.executemany.call_args[0][0]) == expected_update
+    assert mock_cursor.executemany.call_args[0][1] == [(1, 1, 1516.0, 1), (1, 0, 1484.0, 2)]
+
+def test_record_battle_results_aggregates_per_meal(mock_cursor):
+    """Test that repeated meals in a batch collapse into one update each"""
+    mock_cursor.fetchall.return_value = [(1, False, 1500.0), (2, False, 1500.0), (3, False, 1500.0)]
+
+    record_battle_results([(1, 2), (1, 3), (3, 2)])
+
+    params = mock_cursor.executemany.call_args[0][1]
+    assert [(battles, wins, meal_id) for battles, wins, _, meal_id in params] == [(2, 2, 1), (2, 0, 2), (2, 1, 3)]
+
+def test_record_battle_results_commits_once(mocker, mock_cursor):
+    """Test that a batch is committed exactly once"""
+    mock_cursor.fetchall.return_value = [(1, False, 1500.0), (2, False, 1500.0)]
+    mock_conn = mocker.Mock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    @contextmanager
+    def mock_get_db_connection():
+        yield mock_conn
+
+    mocker.patch("meal_max.models.kitchen_model.get_db_connection", mock_get_db_connection)
+
+    record_battle_results([(1, 2), (2, 1)])
+
+    mock_conn.commit.assert_called_once()
+
+def test_record_battle_results_deleted_meal(mock_cursor):
+    """Test error when a combatant has been deleted"""
+    mock_cursor.fetchall.return_value = [(1, False, 1500.0), (2, True, 1500.0)]
+
+    with pytest.raises(ValueError, match="Meal with ID 2 has been deleted"):
+        record_battle_result(1, 2)
+
+    mock_cursor.executemany.assert_not_called()
+
+def test_record_battle_results_missing_meal(mock_cursor):
+    """Test error when a combatant does not exist"""
+    mock_cursor.fetchall.return_value = [(1, False, 1500.0)]
+
+    with pytest.raises(ValueError, match="Meal with ID 800 not found"):
+        record_battle_result(1, 800)
+
+    mock_cursor.executemany.assert_not_called()
+
+def test_record_battle_results_self_battle(mock_cursor):
+    """Test error when a meal is recorded as battling itself"""
+    with pytest.raises(ValueError, match="Meal with ID 1 cannot battle itself"):
+        record_battle_result(1, 1)
+
+    mock_cursor.execute.assert_not_called()
+
+def test_record_battle_results_empty(mock_cursor):
+    """Test that an empty batch does not touch the database"""
+    record_battle_results([])
+    mock_cursor.execute.assert_not_called()
+
+
 #Figure out leaderboard
     ##bad sort parameetr 
     #leaderboard
@@ -326,9 +428,9 @@ def test_get_leaderboard(mock_cursor):
 
     # Simulate that there are multiple songs in the database
     mock_cursor.fetchall.return_value = [
-        (2, 'salmon', 'norwegian', 27.3, 'LOW',100, 80, 0.8),
-        (1, 'steak', 'american', 33.3, 'MED',100,  50, 0.5),
-        (3, 'omlette', 'french', 12.1, 'MED',100, 30, 0.3)
+        (2, 'salmon', 'norwegian', 27.3, 'LOW',100, 80, 0.8, 1500.0),
+        (1, 'steak', 'american', 33.3, 'MED',100,  50, 0.5, 1500.0),
+        (3, 'omlette', 'french', 12.1, 'MED',100, 30, 0.3, 1500.0)
     ]
 
     # Call the get_all_songs function with sort_by_play_count = True
@@ -336,9 +438,9 @@ def test_get_leaderboard(mock_cursor):
 
     # Ensure the results are sorted by play count
     expected_result = [
-        {"id": 2, "meal": "salmon", "cuisine": "norwegian", "price": 27.3, "difficulty": "LOW", "battles": 100, "wins": 80, "win_pct":80.0},
-        {"id": 1, "meal": "steak", "cuisine": "american", "price": 33.3, "difficulty": "MED", "battles": 100, "wins": 50, "win_pct":50.0},
-        {"id": 3, "meal": "omlette", "cuisine": "french", "price": 12.1, "difficulty": "MED", "battles": 100, "wins": 30, "win_pct":30.0}
+        {"id": 2, "meal": "salmon", "cuisine": "norwegian", "price": 27.3, "difficulty": "LOW", "battles": 100, "wins": 80, "win_pct":80.0, "rating": 1500.0},
+        {"id": 1, "meal": "steak", "cuisine": "american", "price": 33.3, "difficulty": "MED", "battles": 100, "wins": 50, "win_pct":50.0, "rating": 1500.0},
+        {"id": 3, "meal": "omlette", "cuisine": "french", "price": 12.1, "difficulty": "MED", "battles": 100, "wins": 30, "win_pct":30.0, "rating": 1500.0}
     ]
 
     assert leaderboard == expected_result, f"Expected {expected_result}, but got {leaderboard}"
@@ -348,9 +450,9 @@ def test_get_leaderboard_sort_by_win_pct(mock_cursor):
 
     # Simulate that there are multiple songs in the database
     mock_cursor.fetchall.return_value = [
-        (2, 'salmon', 'norwegian', 27.3, 'LOW',100, 80, 0.8),
-        (1, 'steak', 'american', 33.3, 'MED',100,  50, 0.5),
-        (3, 'omlette', 'french', 12.1, 'MED',100, 30, 0.3)
+        (2, 'salmon', 'norwegian', 27.3, 'LOW',100, 80, 0.8, 1500.0),
+        (1, 'steak', 'american', 33.3, 'MED',100,  50, 0.5, 1500.0),
+        (3, 'omlette', 'french', 12.1, 'MED',100, 30, 0.3, 1500.0)
     ]
 
     # Call the get_all_songs function with sort_by_play_count = True
@@ -358,9 +460,9 @@ def test_get_leaderboard_sort_by_win_pct(mock_cursor):
 
     # Ensure the results are sorted by play count
     expected_result = [
-        {"id": 2, "meal": "salmon", "cuisine": "norwegian", "price": 27.3, "difficulty": "LOW", "battles": 100, "wins": 80, "win_pct":80.0},
-        {"id": 1, "meal": "steak", "cuisine": "american", "price": 33.3, "difficulty": "MED", "battles": 100, "wins": 50, "win_pct":50.0},
-        {"id": 3, "meal": "omlette", "cuisine": "french", "price": 12.1, "difficulty": "MED", "battles": 100, "wins": 30, "win_pct":30.0}
+        {"id": 2, "meal": "salmon", "cuisine": "norwegian", "price": 27.3, "difficulty": "LOW", "battles": 100, "wins": 80, "win_pct":80.0, "rating": 1500.0},
+        {"id": 1, "meal": "steak", "cuisine": "american", "price": 33.3, "difficulty": "MED", "battles": 100, "wins": 50, "win_pct":50.0, "rating": 1500.0},
+        {"id": 3, "meal": "omlette", "cuisine": "french", "price": 12.1, "difficulty": "MED", "battles": 100, "wins": 30, "win_pct":30.0, "rating": 1500.0}
     ]
 
     assert leaderboard == expected_result, f"Expected {expected_result}, but got {leaderboard}"
@@ -370,9 +472,9 @@ def test_get_leaderboard_sort_by_badt(mock_cursor):
 
     # Simulate that there are multiple songs in the database
     mock_cursor.fetchall.return_value = [
-        (2, 'salmon', 'norwegian', 27.3, 'LOW',100, 80, 0.8),
-        (1, 'steak', 'american', 33.3, 'MED',100,  50, 0.5),
-        (3, 'omlette', 'french', 12.1, 'MED',100, 30, 0.3)
+        (2, 'salmon', 'norwegian', 27.3, 'LOW',100, 80, 0.8, 1500.0),
+        (1, 'steak', 'american', 33.3, 'MED',100,  50, 0.5, 1500.0),
+        (3, 'omlette', 'french', 12.1, 'MED',100, 30, 0.3, 1500.0)
     ]
 
     # Call the get_all_songs function with sort_by_play_count = True
@@ -383,3 +485,143 @@ def test_get_leaderboard_sort_by_badt(mock_cursor):
     # assert leaderboard == expected_result, f"Expected {expected_result}, but got {leaderboard}"
     with pytest.raises(ValueError, match="Invalid sort_by parameter: meal"):
          get_leaderboard(sort_by = "meal")
+
+def test_get_leaderboard_uses_index(sqlite_db):
+    """Test that every leaderboard order is an index scan rather than a sort"""
+    conn = sqlite3.connect(sqlite_db)
+    for sort_by, index in (("wins", "idx_meals_leaderboard_wins"), ("win_pct", "idx_meals_leaderboard_win_pct"),
+                           ("rating", "idx_meals_leaderboard_rating")):
+        query = f"""
+            SELECT id, meal, cuisine, price, difficulty, battles, wins, win_pct, rating
+            FROM meals WHERE deleted = FALSE AND battles > 0 ORDER BY {sort_by} DESC, id
+        """
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query))
+        assert index in plan, f"Expected {index} in plan, got {plan}"
+        assert "TEMP B-TREE" not in plan, f"Leaderboard sorted in a temp b-tree: {plan}"
+    conn.close()
+
+def test_get_leaderboard_tracks_results_and_deletes(sqlite_db):
+    """Test that the leaderboard reflects battle results and soft deletes"""
+    create_meal('steak', 'american', 33.3, 'MED')
+    create_meal('salmon', 'norwegian', 27.3, 'LOW')
+    create_meal('omlette', 'french', 12.1, 'MED')
+
+    record_battle_results([(1, 2), (1, 3), (2, 3), (3, 1)])
+
+    assert [row["meal"] for row in get_leaderboard("wins")] == ['steak', 'salmon', 'omlette']
+    assert get_leaderboard("win_pct")[0]["win_pct"] == 66.7
+
+    delete_meal(1)
+    assert [row["meal"] for row in get_leaderboard("wins")] == ['salmon', 'omlette']
+
+    clear_meals()
+    assert get_leaderboard("win_pct") == []
+
+def test_record_battle_results_updates_ratings(sqlite_db):
+    """Test that ratings move with every result and an upset is worth more"""
+    create_meal('steak', 'american', 33.3, 'MED')
+    create_meal('salmon', 'norwegian', 27.3, 'LOW')
+
+    record_battle_results([(1, 2)])
+    first = {row["meal"]: row["rating"] for row in get_leaderboard("rating")}
+    assert first == {'steak': 1516.0, 'salmon': 1484.0}
+
+    # salmon is now the underdog, so beating steak gains more than 16
+    record_battle_results([(2, 1)])
+    second = {row["meal"]: row["rating"] for row in get_leaderboard("rating")}
+    assert second['salmon'] - first['salmon'] > 16
+    assert second['steak'] + second['salmon'] == 3000.0
+
+def test_record_season_stats(sqlite_db):
+    """Test adding season totals apart from the rated stats, and that a deleted meal discards the batch"""
+    create_meal('steak', 'american', 33.3, 'MED')
+    create_meal('salmon', 'norwegian', 27.3, 'LOW')
+
+    record_season_stats({1: (3, 2), 2: (3, 1)})
+    conn = sqlite3.connect(sqlite_db)
+    season_stats = "SELECT meal, battles, wins, season_battles, season_wins, rating FROM meals ORDER BY id"
+    assert conn.execute(season_stats).fetchall() == [('steak', 0, 0, 3, 2, 1500.0), ('salmon', 0, 0, 3, 1, 1500.0)]
+    assert get_leaderboard("wins") == []
+
+    delete_meal(2)
+    with pytest.raises(ValueError, match="1 meal\\(s\\) were not found or have been deleted"):
+        record_season_stats({1: (1, 1), 2: (1, 0)})
+    assert conn.execute("SELECT season_battles FROM meals WHERE id = 1").fetchone() == (3,)
+    conn.close()
+
+def test_battle_score_is_stored(sqlite_db):
+    """Test that the battle score is computed at creation and loaded with the meal"""
+    create_meal('steak', 'american', 33.3, 'MED')
+
+    conn = sqlite3.connect(sqlite_db)
+    assert conn.execute("SELECT battle_score FROM meals WHERE id = 1").fetchone() == (264.4,)
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM meals WHERE deleted = FALSE AND battle_score BETWEEN ? AND ?", (250, 270)))
+    conn.close()
+
+    assert get_meal_by_name('steak').battle_score == 264.4
+    assert "idx_meals_battle_score" in plan, f"Expected a range seek on the score index, got {plan}"
+
+def test_clear_meals_restarts_ids(sqlite_db):
+    """Test that clearing keeps the table but starts IDs over"""
+    create_meal('steak', 'american', 33.3, 'MED')
+    create_meal('salmon', 'norwegian', 27.3, 'LOW')
+
+    clear_meals()
+    create_meal('omlette', 'french', 12.1, 'MED')
+
+    assert get_meal_by_id(1).meal == 'omlette'
+
+def test_get_leaderboard_page_keyset(sqlite_db):
+    """Test walking the leaderboard with limit and cursor"""
+    for name in ('a', 'b', 'c', 'd', 'e'):
+        create_meal(name, 'test', 10.0, 'LOW')
+    # wins: a=2, b=1, c=1, d=1, e=0 (e still ranks, it has battled)
+    record_battle_results([(1, 5), (1, 5), (2, 5), (3, 5), (4, 5)])
+
+    for sort_by in ("wins", "win_pct", "rating"):
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            page = get_leaderboard_page(sort_by, limit=2, cursor=cursor)
+            assert len(page['leaderboard']) <= 2
+            seen += [row['meal'] for row in page['leaderboard']]
+            pages += 1
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+        assert seen == [row['meal'] for row in get_leaderboard(sort_by)]
+        assert seen == ['a', 'b', 'c', 'd', 'e']
+        assert pages == 3
+
+def test_get_leaderboard_page_last_page_has_no_cursor(mock_cursor):
+    """Test that a short page does not hand out a cursor"""
+    mock_cursor.fetchall.return_value = [(2, 'salmon', 'norwegian', 27.3, 'LOW', 100, 80, 0.8, 1500.0)]
+
+    page = get_leaderboard_page("wins", limit=10)
+
+    assert page['next_cursor'] is None
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]).endswith("ORDER BY wins DESC, id LIMIT ?")
+    assert mock_cursor.execute.call_args[0][1] == [11]
+
+def test_get_leaderboard_page_invalid_limit(mock_cursor):
+    """Test error when the page size is out of range"""
+    with pytest.raises(ValueError, match="Invalid limit: 0. Must be between 1 and 1000."):
+        get_leaderboard_page("wins", limit=0)
+
+def test_get_leaderboard_page_invalid_cursor(mock_cursor):
+    """Test error when the cursor is garbage"""
+    with pytest.raises(ValueError, match="Invalid cursor: not-a-cursor"):
+        get_leaderboard_page("wins", limit=10, cursor="not-a-cursor")
+
+def test_get_leaderboard_page_cursor_wrong_sort(sqlite_db):
+    """Test error when a cursor from one sort order is used with the other"""
+    create_meal('a', 'test', 10.0, 'LOW')
+    create_meal('b', 'test', 10.0, 'LOW')
+    record_battle_results([(1, 2)])
+
+    cursor = get_leaderboard_page("wins", limit=1)['next_cursor']
+    with pytest.raises(ValueError, match="Cursor was issued for sort_by 'wins', not 'win_pct'"):
+        get_leaderboard_page("win_pct", limit=1, cursor=cursor)
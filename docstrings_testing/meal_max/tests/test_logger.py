@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+
+import pytest
+
+from meal_max.utils import logger as logger_module
+from meal_max.utils.logger import DroppingQueueHandler, SamplingFilter, configure_logger, get_queue_handler
+
+
+@pytest.fixture
+def fresh_logger():
+    logger = logging.getLogger("meal_max.tests.logger")
+    yield logger
+    logger.handlers.clear()
+    logger.filters.clear()
+    logger.propagate = True
+
+@pytest.fixture
+def captured(fresh_logger):
+    """Send the test logger's records to a plain list"""
+    log_queue = queue.Queue()
+    fresh_logger.setLevel(logging.DEBUG)
+    fresh_logger.addHandler(DroppingQueueHandler(log_queue))
+    return log_queue
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def messages(log_queue):
+    records = []
+    while not log_queue.empty():
+        records.append(log_queue.get_nowait().getMessage())
+    return records
+
+def test_configure_logger_is_idempotent(fresh_logger):
+    """Test that configuring a logger twice does not duplicate its handler"""
+    configure_logger(fresh_logger)
+    configure_logger(fresh_logger)
+
+    assert fresh_logger.handlers == [get_queue_handler()]
+    assert len([f for f in fresh_logger.filters if isinstance(f, SamplingFilter)]) == 1
+
+def test_configure_logger_levels(mocker, fresh_logger):
+    """Test the global level and a per-logger override"""
+    mocker.patch.object(logger_module, "LOG_LEVEL", "WARNING")
+    configure_logger(fresh_logger)
+    assert fresh_logger.level == logging.WARNING
+
+    mocker.patch.object(logger_module, "LOG_LEVELS", "other=DEBUG, meal_max.tests.logger=ERROR")
+    configure_logger(fresh_logger)
+    assert fresh_logger.level == logging.ERROR
+
+def test_records_are_written_by_the_listener(mocker, fresh_logger):
+    """Test that the stream write happens on the listener thread, not the thread that logged"""
+    logger_module.stop_logging()
+    written = []
+    mocker.patch.object(logging.StreamHandler, "emit", autospec=True,
+                        side_effect=lambda handler, record: written.append((record.getMessage(), threading.current_thread())))
+    # Keep the records away from pytest's own capture handlers on the root logger
+    fresh_logger.propagate = False
+    configure_logger(fresh_logger)
+
+    fresh_logger.info("Battle score for %s: %.3f", "sushi", 29.6)
+    logger_module.stop_logging()
+
+    assert [message for message, _ in written] == ["Battle score for sushi: 29.600"]
+    assert written[0][1] is not threading.current_thread()
+    # Later tests and modules keep logging through a running listener
+    get_queue_handler()
+
+def test_full_queue_drops_instead_of_blocking(fresh_logger):
+    """Test that a logger never waits when the writer falls behind"""
+    handler = DroppingQueueHandler(queue.Queue(1))
+    fresh_logger.setLevel(logging.INFO)
+    fresh_logger.addHandler(handler)
+
+    fresh_logger.info("first")
+    fresh_logger.info("second")
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+def test_sample_rate_keeps_a_fraction(fresh_logger, captured):
+    """Test that a sample rate keeps evenly spaced records"""
+    fresh_logger.addFilter(SamplingFilter(fresh_logger, sample_rate=0.25, rate_limit=0))
+
+    for i in range(8):
+        fresh_logger.info("row %d", i)
+
+    assert messages(captured) == ["row 3", "row 7"]
+
+def test_rate_limit_per_template(fresh_logger, captured):
+    """Test that a noisy template is capped while a different one still gets through"""
+    clock = FakeClock()
+    fresh_logger.addFilter(SamplingFilter(fresh_logger, rate_limit=1, burst=2, summary_interval=60, clock=clock))
+
+    for _ in range(5):
+        fresh_logger.info("Database connection returned to pool.")
+    fresh_logger.info("something else")
+    clock.now = 1.0
+    fresh_logger.info("Database connection returned to pool.")
+
+    assert messages(captured) == ["Database connection returned to pool.", "Database connection returned to pool.", "something else", "Database connection returned to pool."]
+
+def test_warnings_are_never_suppressed(fresh_logger, captured):
+    """Test that warnings and errors bypass sampling and rate limits"""
+    fresh_logger.addFilter(SamplingFilter(fresh_logger, sample_rate=0, rate_limit=1, burst=1))
+
+    fresh_logger.info("dropped")
+    fresh_logger.warning("kept")
+    fresh_logger.error("kept too")
+
+    assert messages(captured) == ["kept", "kept too"]
+
+def test_suppressed_summary(fresh_logger, captured):
+    """Test that suppressed records are reported once per interval"""
+    clock = FakeClock()
+    fresh_logger.addFilter(SamplingFilter(fresh_logger, rate_limit=1, burst=1, summary_interval=10, clock=clock))
+
+    for _ in range(4):
+        fresh_logger.info("Database connection returned to pool.")
+    clock.now = 10.0
+    fresh_logger.info("Database connection returned to pool.")
+
+    assert messages(captured) == [
+        "Database connection returned to pool.",
+        "Suppressed 3 log messages in the last 10s (most frequent: 'Database connection returned to pool.' x3)",
+        "Database connection returned to pool.",
+    ]
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from meal_max.models.kitchen_model import create_meal, delete_meal, find_closest_meal, get_meal_by_name, get_random_meal
+from meal_max.models.matchmaking_model import find_match
+
+@pytest.fixture
+def sqlite_db(sqlite_db):
+    """Add meals spread over the score range"""
+    # Cuisine 'x' and HIGH difficulty make the battle score price - 1
+    for name, price in (('a', 11.0), ('b', 21.0), ('c', 24.0), ('d', 41.0)):
+        create_meal(name, 'x', price, 'HIGH')
+    return sqlite_db
+
+def test_find_closest_meal(sqlite_db):
+    """Test that the nearest score wins, looking both up and down"""
+    assert find_closest_meal(get_meal_by_name('b')).meal == 'c'
+    assert find_closest_meal(get_meal_by_name('d')).meal == 'c'
+    assert find_closest_meal(get_meal_by_name('a')).meal == 'b'
+
+def test_find_closest_meal_skips_deleted(sqlite_db):
+    """Test that deleted meals are never offered as opponents"""
+    meal = get_meal_by_name('b')
+    delete_meal(3)
+    assert find_closest_meal(meal).meal == 'a'
+
+def test_find_closest_meal_max_gap(sqlite_db):
+    """Test error when no opponent is close enough"""
+    with pytest.raises(ValueError, match="No opponent found for meal d"):
+        find_closest_meal(get_meal_by_name('d'), max_gap=10)
+
+def test_matchmaking_queries_use_index(sqlite_db):
+    """Test that both opponent lookups are seeks on the battle score index"""
+    conn = sqlite3.connect(sqlite_db)
+    for direction in ("", " DESC"):
+        op = ">=" if not direction else "<="
+        plan = " ".join(row[3] for row in conn.execute(f"""
+            EXPLAIN QUERY PLAN SELECT id FROM meals WHERE deleted = FALSE AND battle_score {op} ? AND id != ?
+            ORDER BY battle_score{direction}, id{direction} LIMIT 1
+        """, (20.0, 2)))
+        assert "idx_meals_battle_score" in plan, f"Expected the score index in plan, got {plan}"
+        assert "TEMP B-TREE" not in plan, f"Opponent lookup sorted in a temp b-tree: {plan}"
+    conn.close()
+
+def test_get_random_meal(sqlite_db):
+    """Test that the draw picks the meal at that point of the id range, wrapping past deleted ones"""
+    assert get_random_meal(0.0).meal == 'a'
+    assert get_random_meal(0.5).meal == 'c'
+    delete_meal(4)
+    assert get_random_meal(0.99).meal == 'a'
+
+def test_get_random_meal_empty(sqlite_db):
+    """Test error when every meal has been deleted"""
+    for meal_id in range(1, 5):
+        delete_meal(meal_id)
+    with pytest.raises(ValueError, match="No meals available"):
+        get_random_meal(0.5)
+
+def test_find_match_named(sqlite_db):
+    """Test pairing a named meal with its closest opponent"""
+    meal, opponent = find_match('c')
+    assert (meal.meal, opponent.meal) == ('c', 'b')
+
+def test_find_match_random(mocker, sqlite_db):
+    """Test pairing a random meal when none is named"""
+    mocker.patch("meal_max.models.matchmaking_model.random.random", return_value=0.0)
+    meal, opponent = find_match()
+    assert (meal.meal, opponent.meal) == ('a', 'b')
+
+def test_find_match_invalid_max_gap():
+    """Test error when the allowed gap is negative"""
+    with pytest.raises(ValueError, match="Invalid max gap: -1. Must be at least 0."):
+        find_match('a', max_gap=-1)
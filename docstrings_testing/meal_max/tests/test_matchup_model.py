@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from meal_max.models.battle_model import BattleModel, first_combatant_wins
+from meal_max.models.kitchen_model import Meal
+from meal_max.models.matchup_model import (
+    DRAW_VALUES,
+    get_battle_scores,
+    get_matchup_odds,
+    simulate_win_matrix,
+    win_probability_matrix,
+)
+
+@pytest.fixture
+def sample_meals():
+    return [
+        Meal(1, 'sushi', 'japanese', 3.95, 'MED'),
+        Meal(2, 'pizza', 'italian', 24.95, 'LOW'),
+        Meal(3, 'ramen', 'japanese', 4.5, 'HIGH'),
+    ]
+
+def test_get_battle_scores_matches_battle_model(sample_meals):
+    """Test that the vectorized scores agree with BattleModel.get_battle_score"""
+    expected = [BattleModel().get_battle_score(meal) for meal in sample_meals]
+    np.testing.assert_allclose(get_battle_scores(sample_meals), expected)
+
+def test_win_probability_matrix():
+    """Test the closed-form odds: normalized delta, capped at 1"""
+    odds = win_probability_matrix(np.array([10.0, 40.0, 250.0]))
+
+    assert np.isnan(odds).sum() == 3
+    assert odds[0, 1] == pytest.approx(0.3)
+    assert odds[1, 0] == pytest.approx(0.3)
+    assert odds[0, 2] == 1.0
+
+def test_win_probability_matrix_follows_battle_rule():
+    """Test that the odds are the share of two-decimal draws the battle rule awards to the first meal"""
+    scores = np.array([10.0, 40.5, 11.0, 10.001])
+    odds = win_probability_matrix(scores)
+
+    for i, j in [(0, 1), (1, 2), (0, 2), (0, 3)]:
+        wins = sum(first_combatant_wins(scores[i], scores[j], draw) for draw in DRAW_VALUES)
+        assert odds[i, j] == wins / len(DRAW_VALUES)
+    assert odds[0, 1] == pytest.approx(0.31)
+
+def test_win_probability_matrix_page():
+    """Test that a page of rows matches the same rows of the full matrix"""
+    scores = np.array([10.0, 40.0, 75.0, 12.5])
+
+    page = win_probability_matrix(scores, offset=1, limit=2)
+
+    np.testing.assert_array_equal(page, win_probability_matrix(scores)[1:3])
+
+def test_simulate_win_matrix_converges():
+    """Test that the sampled odds land close to the analytic ones"""
+    scores = np.array([10.0, 40.0, 75.0, 12.5])
+    analytic = win_probability_matrix(scores)
+    sampled = simulate_win_matrix(scores, samples=100000, seed=1)
+
+    mask = ~np.isnan(analytic)
+    np.testing.assert_allclose(sampled[mask], analytic[mask], atol=0.01)
+    assert np.isnan(sampled.diagonal()).all()
+
+def test_simulate_win_matrix_is_reproducible():
+    """Test that a seed gives the same estimate twice"""
+    scores = np.array([10.0, 40.0, 75.0])
+    np.testing.assert_array_equal(simulate_win_matrix(scores, 100, seed=9), simulate_win_matrix(scores, 100, seed=9))
+
+def test_simulate_win_matrix_invalid_samples(mocker):
+    """Test error when asking for no samples or more than MATCHUP_MAX_SAMPLES"""
+    mocker.patch("meal_max.models.matchup_model.MATCHUP_MAX_SAMPLES", 10)
+    with pytest.raises(ValueError, match="Invalid number of samples: 0. Must be between 1 and 10."):
+        simulate_win_matrix(np.array([1.0, 2.0]), samples=0)
+    with pytest.raises(ValueError, match="Invalid number of samples: 11. Must be between 1 and 10."):
+        simulate_win_matrix(np.array([1.0, 2.0]), samples=11)
+
+def test_simulate_win_matrix_in_blocks(mocker):
+    """Test that rows simulated a few at a time keep every pairing's odds and self-matchups"""
+    mocker.patch("meal_max.models.matchup_model.MATCHUP_BLOCK_DRAWS", 20000)
+    scores = np.array([10.0, 40.0, 75.0, 12.5, 200.0])
+
+    sampled = simulate_win_matrix(scores, samples=10000, seed=3, offset=1)
+
+    analytic = win_probability_matrix(scores, offset=1)
+    mask = ~np.isnan(analytic)
+    assert sampled.shape == (4, 5)
+    np.testing.assert_array_equal(np.isnan(sampled), ~mask)
+    np.testing.assert_allclose(sampled[mask], analytic[mask], atol=0.03)
+
+def test_get_matchup_odds(mocker, sample_meals):
+    """Test the JSON-ready odds for a named set of meals"""
+    mock_get = mocker.patch("meal_max.models.matchup_model.get_meals_by_names", return_value=sample_meals[:2])
+
+    odds = get_matchup_odds(["sushi", "pizza"], samples=10, seed=0)
+
+    mock_get.assert_called_once_with(["sushi", "pizza"])
+    assert odds['meals'] == ["sushi", "pizza"]
+    assert odds['analytic'][0][0] is None and odds['sampled'][1][1] is None
+    assert odds['analytic'][0][1] == odds['analytic'][1][0]
+
+def test_get_matchup_odds_defaults_to_all_meals(mocker, sample_meals):
+    """Test that every active meal is compared when none are named"""
+    mocker.patch("meal_max.models.matchup_model.get_all_meals", return_value=sample_meals)
+
+    assert get_matchup_odds(samples=10)['meals'] == ["sushi", "pizza", "ramen"]
+
+def test_get_matchup_odds_pages(mocker, sample_meals):
+    """Test walking the rows a page at a time while every meal stays a column"""
+    mocker.patch("meal_max.models.matchup_model.get_all_meals", return_value=sample_meals)
+    full = get_matchup_odds(samples=10)
+
+    first = get_matchup_odds(samples=10, limit=2)
+    last = get_matchup_odds(samples=10, offset=first['next_offset'], limit=2)
+
+    assert first['meals'] == last['meals'] == ["sushi", "pizza", "ramen"]
+    assert first['analytic'] + last['analytic'] == full['analytic']
+    assert last['offset'] == 2 and last['analytic'][0][2] is None and last['sampled'][0][2] is None
+    assert last['next_offset'] is None
+
+def test_get_matchup_odds_invalid_page(mocker):
+    """Test error when the offset is negative or the page is empty or too large"""
+    mocker.patch("meal_max.models.matchup_model.MATCHUP_MAX_LIMIT", 2)
+
+    with pytest.raises(ValueError, match="Invalid offset: -1. Must be at least 0."):
+        get_matchup_odds(offset=-1)
+    with pytest.raises(ValueError, match="Invalid limit: 3. Must be between 1 and 2."):
+        get_matchup_odds(limit=3)
+    with pytest.raises(ValueError, match="Invalid limit: 0. Must be between 1 and 2."):
+        get_matchup_odds(limit=0)
+
+def test_thousands_of_meals():
+    """Test that a 2000-meal field is simulated in one pass with sane odds"""
+    scores = np.random.default_rng(0).uniform(0, 300, size=2000)
+
+    analytic = win_probability_matrix(scores)
+    sampled = simulate_win_matrix(scores, samples=1000, seed=0)
+
+    assert analytic.shape == sampled.shape == (2000, 2000)
+    mask = ~np.isnan(analytic)
+    assert mask.sum() == 2000 * 1999
+    np.testing.assert_array_equal(analytic[mask], analytic.T[mask])
+    assert ((sampled[mask] >= 0) & (sampled[mask] <= 1)).all()
+    np.testing.assert_allclose(sampled[mask].mean(), analytic[mask].mean(), atol=0.01)
@@ -0,0 +1,60 @@
+from flask import Flask
+import pytest
+
+from meal_max.utils.metrics import Counter, Histogram, MetricsRegistry, REGISTRY
+from meal_max.utils.request_timing import init_request_timing
+
+
+def test_counter_render():
+    """Test that counters render one line per label set"""
+    counter = Counter("battles_total", "Battles", ("arena",))
+    counter.inc("default")
+    counter.inc("default", amount=2)
+    counter.inc('quo"te')
+
+    assert counter.get("default") == 3
+    assert counter.render() == ['battles_total{arena="default"} 3', 'battles_total{arena="quo\\"te"} 1']
+
+def test_histogram_buckets_are_cumulative():
+    """Test bucket counts, sum and count in the exposition"""
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.render() == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        'latency_seconds_sum 3.65',
+        'latency_seconds_count 4',
+    ]
+
+def test_registry_render_and_reuse():
+    """Test that registering a name twice returns the same metric"""
+    registry = MetricsRegistry()
+    counter = registry.counter("plays_total", "Plays")
+    assert registry.counter("plays_total", "Plays") is counter
+    counter.inc()
+
+    assert registry.render() == "# HELP plays_total Plays\n# TYPE plays_total counter\nplays_total 1\n"
+    with pytest.raises(ValueError, match="Metric plays_total is already registered as a counter"):
+        registry.histogram("plays_total", "Plays")
+
+def test_request_metrics():
+    """Test that each request is counted by route template and timed"""
+    app = Flask(__name__)
+    init_request_timing(app)
+
+    @app.route('/api/metrics-test/<int:item_id>')
+    def item(item_id):
+        return {'id': item_id}
+
+    requests_total = REGISTRY.get("http_requests_total")
+    before = requests_total.get("/api/metrics-test/<int:item_id>", "GET", "200")
+    client = app.test_client()
+    client.get('/api/metrics-test/1')
+    client.get('/api/metrics-test/2')
+
+    assert requests_total.get("/api/metrics-test/<int:item_id>", "GET", "200") == before + 2
+    assert REGISTRY.get("http_request_duration_seconds").get_count("/api/metrics-test/<int:item_id>") >= 2
+    assert 'http_requests_total{route="/api/metrics-test/<int:item_id>",method="GET",status="200"}' in REGISTRY.render()
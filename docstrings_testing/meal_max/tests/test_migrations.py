@@ -0,0 +1,93 @@
+import os
+import sqlite3
+
+import pytest
+
+from meal_max.utils.migrations import get_schema_version, load_migrations, run_migrations
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "sql", "migrations")
+
+ORIGINAL_SCHEMA = """
+    DROP TABLE IF EXISTS meals;
+    CREATE TABLE meals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        meal TEXT NOT NULL UNIQUE,
+        cuisine TEXT NOT NULL,
+        price REAL NOT NULL,
+        difficulty TEXT CHECK(difficulty IN ('HIGH', 'MED', 'LOW')),
+        battles INTEGER DEFAULT 0,
+        wins INTEGER DEFAULT 0,
+        deleted BOOLEAN DEFAULT FALSE
+    );
+"""
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "meal_max.db")
+
+
+def test_load_migrations_in_order():
+    """tests that migration files are read in version order"""
+    versions = [version for version, _, _ in load_migrations(MIGRATIONS_DIR)]
+    assert versions == sorted(versions)
+    assert versions[0] == 1
+
+
+def test_load_migrations_duplicate_version(tmp_path):
+    """tests error when two migrations share a version"""
+    (tmp_path / "0001_a.sql").write_text("SELECT 1;")
+    (tmp_path / "1_b.sql").write_text("SELECT 1;")
+    with pytest.raises(ValueError, match="Duplicate migration version 1"):
+        load_migrations(str(tmp_path))
+
+
+def test_run_migrations_fresh_database(db_path):
+    """tests building a new database from the migrations"""
+    applied = run_migrations(db_path, MIGRATIONS_DIR)
+
+    conn = sqlite3.connect(db_path)
+    assert applied == [version for version, _, _ in load_migrations(MIGRATIONS_DIR)]
+    assert get_schema_version(conn) == applied[-1]
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_meals_leaderboard_wins" in indexes
+    assert "idx_meals_leaderboard_win_pct" in indexes
+
+
+def test_run_migrations_is_idempotent(db_path):
+    """tests that a second run applies nothing"""
+    run_migrations(db_path, MIGRATIONS_DIR)
+    assert run_migrations(db_path, MIGRATIONS_DIR) == []
+
+
+def test_run_migrations_keeps_existing_data(db_path):
+    """tests upgrading a database created by the original create table script"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(ORIGINAL_SCHEMA)
+    conn.execute("INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins) VALUES ('steak', 'american', 33.3, 'MED', 4, 3)")
+    conn.commit()
+    conn.close()
+
+    run_migrations(db_path, MIGRATIONS_DIR)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT meal, wins, win_pct FROM meals").fetchall() == [('steak', 3, 0.75)]
+    # Existing meals get their battle score backfilled
+    assert conn.execute("SELECT battle_score FROM meals").fetchone() == (264.4,)
+
+
+def test_failed_migration_rolls_back(db_path, tmp_path):
+    """tests that a broken migration leaves no partial changes behind"""
+    migrations_dir = tmp_path / "migrations"
+    migrations_dir.mkdir()
+    (migrations_dir / "0001_ok.sql").write_text("CREATE TABLE a (x INTEGER);")
+    (migrations_dir / "0002_broken.sql").write_text("CREATE TABLE b (x INTEGER);\nINSERT INTO missing VALUES (1);")
+
+    with pytest.raises(sqlite3.OperationalError):
+        run_migrations(db_path, str(migrations_dir))
+
+    conn = sqlite3.connect(db_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "a" in tables
+    assert "b" not in tables
+    assert get_schema_version(conn) == 1
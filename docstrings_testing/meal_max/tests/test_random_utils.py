@@ -1,15 +1,54 @@
+import threading
+
 import pytest
 import requests
 
-from meal_max.utils.random_utils import get_random
+from meal_max.utils import random_utils
+from meal_max.utils.circuit_breaker import CircuitBreaker
+from meal_max.utils.random_org_stub import start_stub_server
+from meal_max.utils.random_utils import (
+    LocalSource,
+    RandomBuffer,
+    RandomOrgSource,
+    RandomSource,
+    SeededSource,
+    create_random_source,
+    fetch_random_numbers,
+    get_random,
+    get_random_org_status,
+    set_random_source,
+)
 
 RANDOM_NUMBER=62
 
+@pytest.fixture(autouse=True)
+def unbuffered(mocker):
+    """Swap in a random.org source with a one-number buffer and no background refills"""
+    source = RandomOrgSource(batch_size=1, low_water=0)
+    mocker.patch.object(random_utils, "_source", source)
+    return source
+
+@pytest.fixture(autouse=True)
+def breaker(mocker):
+    """Give each test a fresh circuit breaker and no backoff delay"""
+    breaker = CircuitBreaker("random.org", failure_threshold=2, reset_timeout=60)
+    mocker.patch.object(random_utils, "_breaker", breaker)
+    mocker.patch.object(random_utils, "RANDOM_ORG_BACKOFF", 0)
+    return breaker
+
+@pytest.fixture
+def stub_server():
+    """Run the random.org stand-in for the duration of a test"""
+    server = start_stub_server(seed=7)
+    yield server
+    server.shutdown()
+    server.server_close()
+
 @pytest.fixture
 def mock_random_org(mocker):
     mock_response = mocker.Mock()
     mock_response.text = f"{RANDOM_NUMBER}"
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch.object(random_utils._session, "get", return_value=mock_response)
     return mock_response
 
 #Unit Tests
@@ -18,11 +57,11 @@ def test_get_random(mock_random_org):
     result = get_random()
     assert result == RANDOM_NUMBER, f"Expected random number {RANDOM_NUMBER}, but got {result}"
 
-    requests.get.assert_called_once_with("https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new", timeout=5)
+    random_utils._session.get.assert_called_once_with("https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new", timeout=2)
 
 def test_get_random_request_failure(mocker):
     """simulate request failure"""
-    mocker.patch("requests.get", side_effect=requests.exceptions.RequestException("Connection error"))
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.RequestException("Connection error"))
 
     with pytest.raises(RuntimeError, match="Request to random.org failed: Connection error"):
         get_random()
@@ -32,4 +71,223 @@ def test_get_random_invalid_response(mock_random_org):
     mock_random_org.text = "invalid_response"
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random()
\ No newline at end of file
+        get_random()
+
+def test_fetch_random_numbers_batch(mock_random_org):
+    """Test fetching several numbers with one request"""
+    mock_random_org.text = "0.12\n0.34\n0.56\n"
+
+    assert fetch_random_numbers(3) == [0.12, 0.34, 0.56]
+    random_utils._session.get.assert_called_once_with("https://www.random.org/decimal-fractions/?num=3&dec=2&col=1&format=plain&rnd=new", timeout=2)
+
+def test_buffer_serves_from_memory(mocker):
+    """Test that one fetch serves a whole batch of numbers"""
+    fetch = mocker.Mock(return_value=[0.1, 0.2, 0.3])
+    buffer = RandomBuffer(fetch, batch_size=3, low_water=0)
+
+    assert [buffer.get(), buffer.get(), buffer.get()] == [0.1, 0.2, 0.3]
+    fetch.assert_called_once_with(3)
+    assert buffer.size() == 0
+
+def test_buffer_refills_in_background(mocker):
+    """Test that dropping below the low-water mark triggers a background refill"""
+    refilled = threading.Event()
+
+    def fetch(num):
+        if fetch.calls:
+            refilled.set()
+        fetch.calls += 1
+        return [0.5] * num
+    fetch.calls = 0
+
+    buffer = RandomBuffer(fetch, batch_size=4, low_water=2)
+    for _ in range(3):
+        buffer.get()
+
+    assert refilled.wait(1)
+
+def test_buffer_invalid_low_water():
+    """Test error when the low-water mark does not fit in the buffer"""
+    with pytest.raises(ValueError, match="Invalid low-water mark: 5. Must be between 0 and 1."):
+        RandomBuffer(fetch_random_numbers, batch_size=2, low_water=5)
+
+def test_seeded_source_is_reproducible():
+    """Test that two seeded sources produce the same sequence"""
+    first = SeededSource(42)
+    second = SeededSource(42)
+
+    draws = [first.get_random() for _ in range(10)]
+    assert draws == [second.get_random() for _ in range(10)]
+    assert all(0 <= draw < 1 for draw in draws)
+
+def test_local_source_range():
+    """Test that the CSPRNG source stays within [0, 1) with two decimals"""
+    source = LocalSource()
+    for _ in range(100):
+        draw = source.get_random()
+        assert 0 <= draw < 1
+        assert round(draw, 2) == draw
+
+def test_incomplete_source_cannot_be_created():
+    """Test that a source without get_random fails when it is built"""
+    class NoDrawSource(RandomSource):
+        name = "no_draw"
+
+    with pytest.raises(TypeError, match="abstract method"):
+        NoDrawSource()
+
+def test_create_random_source():
+    """Test building sources by name"""
+    assert isinstance(create_random_source("random_org"), RandomOrgSource)
+    assert isinstance(create_random_source("local"), LocalSource)
+    assert create_random_source("seeded", seed=3).seed == 3
+
+def test_create_random_source_invalid():
+    """Test error when asking for an unknown source"""
+    with pytest.raises(ValueError, match="Invalid random source: dice"):
+        create_random_source("dice")
+
+def test_set_random_source(mocker):
+    """Test that get_random draws from the active source"""
+    set_random_source(SeededSource(1))
+    expected = SeededSource(1).get_random()
+
+    mocker.patch.object(random_utils._session, "get", side_effect=AssertionError("random.org must not be called"))
+    assert get_random() == expected
+
+def test_random_org_source_against_stub(stub_server):
+    """Test the random.org source end to end against the local stand-in"""
+    source = RandomOrgSource(base_url=stub_server.url, batch_size=5, low_water=0)
+
+    draws = [source.get_random() for _ in range(5)]
+    assert all(0 <= draw < 1 for draw in draws)
+    assert source.buffer.size() == 0
+
+def test_stub_server_rejects_bad_num(stub_server):
+    """Test that the stand-in reports errors like random.org"""
+    response = requests.get(f"{stub_server.url}/decimal-fractions/?num=0&dec=2", timeout=5)
+    assert response.status_code == 503
+    assert response.text.startswith("Error:")
+
+def test_get_random_retries_transient_failure(mocker, mock_random_org):
+    """Test that a timeout is retried on the shared session"""
+    random_utils._session.get.side_effect = [requests.exceptions.Timeout, mock_random_org]
+
+    assert get_random() == RANDOM_NUMBER
+    assert random_utils._session.get.call_count == 2
+
+def test_get_random_gives_up_after_retries(mocker):
+    """Test that retries are bounded"""
+    mocker.patch.object(random_utils, "RANDOM_ORG_RETRIES", 2)
+    mocker.patch.object(random_utils, "_breaker", CircuitBreaker("random.org", failure_threshold=5))
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.Timeout)
+
+    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
+        get_random()
+    assert random_utils._session.get.call_count == 3
+
+def test_failed_attempts_count_toward_breaker(mocker, breaker):
+    """Test that an outage opens the circuit within a single call's retries"""
+    mocker.patch.object(random_utils, "RANDOM_ORG_RETRIES", 5)
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.ConnectionError("down"))
+
+    with pytest.raises(RuntimeError, match="Request to random.org failed: down"):
+        get_random()
+
+    assert random_utils._session.get.call_count == 2
+    assert breaker.get_state()["state"] == "open"
+
+def test_retries_stop_at_deadline(mocker):
+    """Test that no retry starts once the call has used up its deadline"""
+    mocker.patch.object(random_utils, "RANDOM_ORG_RETRIES", 5)
+    mocker.patch.object(random_utils, "RANDOM_ORG_DEADLINE", 5)
+    mocker.patch.object(random_utils, "_breaker", CircuitBreaker("random.org", failure_threshold=10))
+    clock = [100.0]
+    mocker.patch.object(random_utils.time, "monotonic", side_effect=lambda: clock[0])
+    timeouts = []
+
+    def slow_timeout(url, timeout):
+        # Each attempt uses up its whole timeout
+        timeouts.append(timeout)
+        clock[0] += timeout
+        raise requests.exceptions.Timeout
+
+    mocker.patch.object(random_utils._session, "get", side_effect=slow_timeout)
+
+    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
+        get_random()
+    assert timeouts == [2, 2, 1]
+
+def test_circuit_opens_and_fails_fast(mocker, breaker):
+    """Test that repeated failures open the circuit and later calls skip the network"""
+    mocker.patch.object(random_utils, "RANDOM_ORG_RETRIES", 0)
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.ConnectionError("down"))
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="Request to random.org failed: down"):
+            get_random()
+
+    with pytest.raises(RuntimeError, match="random.org circuit breaker is open, failing fast."):
+        get_random()
+
+    assert random_utils._session.get.call_count == 2
+    status = get_random_org_status()
+    assert status["circuit_breaker"]["state"] == "open"
+    assert status["circuit_breaker"]["rejected"] == 1
+
+@pytest.mark.parametrize("body, error", [
+    ("invalid_response", "Invalid response from random.org: invalid_response"),
+    (ValueError("bad body"), "bad body"),
+])
+def test_half_open_trial_always_settles(mocker, body, error):
+    """Test that a trial call failing with anything but a RequestException still re-opens the breaker"""
+    breaker = CircuitBreaker("random.org", failure_threshold=1, reset_timeout=0)
+    mocker.patch.object(random_utils, "_breaker", breaker)
+    breaker.record_failure()
+    if isinstance(body, Exception):
+        mocker.patch.object(random_utils._session, "get", side_effect=body)
+    else:
+        mocker.patch.object(random_utils._session, "get", return_value=mocker.Mock(text=body))
+
+    with pytest.raises(ValueError, match=error):
+        get_random()
+
+    assert breaker.get_state()["state"] == "open"
+    assert breaker.allow_request(), "the trial slot was never released"
+
+def test_random_org_source_falls_back(mocker, breaker):
+    """Test that a random.org source with a fallback keeps serving numbers"""
+    mocker.patch.object(random_utils, "RANDOM_ORG_RETRIES", 0)
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.ConnectionError("down"))
+    source = RandomOrgSource(batch_size=1, low_water=0, fallback=SeededSource(5))
+
+    assert source.get_random() == SeededSource(5).get_random()
+
+def test_get_randoms_single_request(mock_random_org):
+    """Test that a batch of draws is fetched with one request"""
+    mock_random_org.text = "0.12\n0.34\n0.56\n"
+
+    assert random_utils.get_randoms(3) == [0.12, 0.34, 0.56]
+    random_utils._session.get.assert_called_once_with("https://www.random.org/decimal-fractions/?num=3&dec=2&col=1&format=plain&rnd=new", timeout=2)
+
+def test_buffer_get_many_tops_up_once(mocker):
+    """Test that a batch larger than the buffer fetches only the shortfall"""
+    fetch = mocker.Mock(side_effect=[[0.1, 0.2], [0.3, 0.4, 0.5]])
+    buffer = RandomBuffer(fetch, batch_size=2, low_water=0)
+    buffer.get()
+
+    assert buffer.get_many(4) == [0.2, 0.3, 0.4, 0.5]
+    assert fetch.call_args_list == [mocker.call(2), mocker.call(3)]
+
+def test_random_org_source_chunks_large_batches(mocker):
+    """Test that requests above random.org's per-call maximum are split"""
+    mocker.patch.object(random_utils, "RANDOM_ORG_MAX_BATCH", 2)
+    mock_fetch = mocker.patch.object(random_utils, "fetch_random_numbers", side_effect=lambda num, base_url: [0.5] * num)
+
+    assert RandomOrgSource(batch_size=1, low_water=0).get_randoms(5) == [0.5] * 5
+    assert [call.args[0] for call in mock_fetch.call_args_list] == [2, 2, 1]
+
+def test_seeded_source_get_randoms():
+    """Test that batch draws continue the same seeded sequence"""
+    sequential = SeededSource(4)
+    assert SeededSource(4).get_randoms(5) == [sequential.get_random() for _ in range(5)]
@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.models.battle_event_model import BattleEvent, BattleEventLog
+from meal_max.models.kitchen_model import clear_meals, create_meal, get_leaderboard, record_battle_results
+from meal_max.models import rating_model
+from meal_max.models.rating_model import RATING_INITIAL, apply_elo, expected_score, recompute_ratings
+
+@pytest.fixture
+def event_log(mocker):
+    """Queue battle events in a private log that is only flushed on demand"""
+    log = BattleEventLog(flush_interval=3600, batch_size=10000, max_buffer=10000)
+    log._ensure_thread = lambda: None
+    mocker.patch("meal_max.models.battle_event_model._event_log", log)
+    return log
+
+@pytest.fixture
+def sqlite_db(sqlite_db, event_log):
+    """Add three meals on the same footing, logging battles to the private event log"""
+    for name in ('steak', 'salmon', 'omlette'):
+        create_meal(name, 'test', 10.0, 'MED')
+    return sqlite_db
+
+def ratings():
+    return {row["id"]: row["rating"] for row in get_leaderboard("rating")}
+
+def test_expected_score():
+    """Test that equal ratings are a coin flip and 400 points is 10 to 1"""
+    assert expected_score(1500, 1500) == 0.5
+    assert expected_score(1900, 1500) == pytest.approx(10 / 11)
+    assert expected_score(1500, 1900) + expected_score(1900, 1500) == pytest.approx(1)
+
+def test_apply_elo():
+    """Test that an upset moves ratings more than an expected win"""
+    ratings = {1: 1700.0, 2: 1300.0}
+    apply_elo(ratings, 1, 2)
+    favourite_gain = ratings[1] - 1700.0
+
+    ratings = {1: 1700.0, 2: 1300.0}
+    apply_elo(ratings, 2, 1)
+    underdog_gain = ratings[2] - 1300.0
+
+    assert underdog_gain > favourite_gain > 0
+    assert sum(ratings.values()) == 3000.0
+
+def test_apply_elo_new_meals_start_at_initial():
+    """Test that meals missing from the mapping start at the initial rating"""
+    ratings = {}
+    apply_elo(ratings, 1, 2, k_factor=32)
+    assert ratings == {1: RATING_INITIAL + 16, 2: RATING_INITIAL - 16}
+
+def test_recompute_matches_incremental(sqlite_db, event_log):
+    """Test that replaying the history in small batches gives the live ratings"""
+    results = [(1, 2), (1, 3), (2, 3), (3, 1), (1, 2)]
+    record_battle_results(results)
+    for winner_id, loser_id in results:
+        event_log.append(BattleEvent(winner_id, loser_id, 50.0, 40.0, 0.0, winner_id))
+    live = ratings()
+
+    conn = sqlite3.connect(sqlite_db)
+    conn.execute("UPDATE meals SET rating = 0")
+    conn.commit()
+    conn.close()
+
+    # The events are still buffered; recompute flushes them first
+    assert recompute_ratings(batch_size=2) == {'events': 5, 'meals': 3}
+    assert ratings() == live
+
+def test_concurrent_battles_keep_both_rating_updates(mocker, sqlite_db):
+    """Test that a battle reading ratings while another is being recorded waits for it"""
+    read_ratings = threading.Event()
+    release = threading.Event()
+    original_apply_elo = apply_elo
+
+    def paused_apply_elo(ratings, winner_id, loser_id):
+        # The first battle holds its ratings here until the second one has started
+        if not read_ratings.is_set():
+            read_ratings.set()
+            release.wait(5)
+        original_apply_elo(ratings, winner_id, loser_id)
+
+    mocker.patch("meal_max.models.kitchen_model.apply_elo", side_effect=paused_apply_elo)
+    first = threading.Thread(target=record_battle_results, args=([(1, 2)],))
+    first.start()
+    assert read_ratings.wait(5)
+    second = threading.Thread(target=record_battle_results, args=([(1, 3)],))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    expected = {1: RATING_INITIAL, 2: RATING_INITIAL, 3: RATING_INITIAL}
+    apply_elo(expected, 1, 2)
+    apply_elo(expected, 1, 3)
+    assert ratings() == {meal_id: round(rating, 1) for meal_id, rating in expected.items()}
+
+def test_recompute_includes_battles_fought_during_replay(mocker, sqlite_db, event_log):
+    """Test that a battle recorded while the history streams is in the swapped ratings"""
+    original_replay = rating_model._replay_events
+    calls = []
+
+    def replay_with_battle(cursor, ratings, after_id, batch_size):
+        replayed = original_replay(cursor, ratings, after_id, batch_size)
+        if not calls:
+            # Another request fights a battle before the write lock is taken
+            record_battle_results([(2, 3)])
+            event_log.append(BattleEvent(2, 3, 50.0, 40.0, 0.0, 2))
+        calls.append(after_id)
+        return replayed
+
+    mocker.patch.object(rating_model, "_replay_events", side_effect=replay_with_battle)
+    record_battle_results([(1, 2)])
+    event_log.append(BattleEvent(1, 2, 50.0, 40.0, 0.0, 1))
+
+    assert recompute_ratings() == {'events': 2, 'meals': 3}
+    assert calls == [0, 1]
+
+    expected = {}
+    apply_elo(expected, 1, 2)
+    apply_elo(expected, 2, 3)
+    assert ratings() == {meal_id: round(rating, 1) for meal_id, rating in expected.items()}
+
+def test_recompute_resets_meals_without_history(sqlite_db):
+    """Test that meals with no logged battles go back to the initial rating"""
+    record_battle_results([(1, 2)])
+
+    assert recompute_ratings() == {'events': 0, 'meals': 0}
+    assert set(ratings().values()) == {RATING_INITIAL}
+
+def test_recompute_after_clear_ignores_old_history(sqlite_db, event_log):
+    """Test that meals reusing cleared ids do not inherit the old meals' battles"""
+    record_battle_results([(1, 2)])
+    event_log.append(BattleEvent(1, 2, 50.0, 40.0, 0.0, 1))
+    event_log.flush()
+    # Still buffered when the catalog is cleared
+    event_log.append(BattleEvent(2, 1, 50.0, 40.0, 0.0, 2))
+
+    clear_meals()
+    create_meal('tofu', 'test', 10.0, 'MED')
+    create_meal('ramen', 'test', 10.0, 'MED')
+
+    assert recompute_ratings() == {'events': 0, 'meals': 0}
+    conn = sqlite3.connect(sqlite_db)
+    assert conn.execute("SELECT rating FROM meals").fetchall() == [(RATING_INITIAL,), (RATING_INITIAL,)]
+    assert conn.execute("SELECT COUNT(*) FROM battle_events").fetchone() == (0,)
+    conn.close()
+
+def test_recompute_skips_events_older_than_their_meals(sqlite_db, event_log):
+    """Test that an event fought before one of its combatants was created is not replayed"""
+    event_log.append(BattleEvent(1, 2, 50.0, 40.0, 0.0, 1, battled_at=0.0))
+    event_log.append(BattleEvent(2, 3, 50.0, 40.0, 0.0, 2))
+
+    assert recompute_ratings() == {'events': 1, 'meals': 2}
+
+def test_recompute_invalid_batch_size():
+    """Test error when the batch size is not positive"""
+    with pytest.raises(ValueError, match="Invalid batch size: 0. Must be at least 1."):
+        recompute_ratings(batch_size=0)
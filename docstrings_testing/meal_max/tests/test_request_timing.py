@@ -0,0 +1,64 @@
+import json
+import sqlite3
+
+from flask import Flask, jsonify
+import pytest
+
+from meal_max.utils.request_timing import TimedConnection, get_request_id, init_request_timing, timed
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    init_request_timing(app)
+
+    @app.route('/meals')
+    def meals():
+        conn = sqlite3.connect(":memory:", factory=TimedConnection)
+        conn.execute("CREATE TABLE meals (meal TEXT)")
+        conn.executemany("INSERT INTO meals VALUES (?)", [("sushi",), ("pizza",)])
+        rows = conn.execute("SELECT meal FROM meals ORDER BY meal").fetchall()
+        conn.close()
+        return jsonify({'meals': [row[0] for row in rows], 'request_id': get_request_id()})
+
+    return app
+
+@pytest.fixture
+def timing_lines(mocker):
+    mock_log = mocker.patch("meal_max.utils.request_timing.logger.info")
+    return lambda: [json.loads(call.args[1]) for call in mock_log.call_args_list]
+
+def test_request_gets_an_id(app, timing_lines):
+    """Test that each request gets its own id, echoed in the response header"""
+    client = app.test_client()
+    first = client.get('/meals')
+    second = client.get('/meals')
+
+    assert first.headers["X-Request-ID"] == first.json["request_id"]
+    assert first.headers["X-Request-ID"] != second.headers["X-Request-ID"]
+
+def test_incoming_request_id_is_kept(app, timing_lines):
+    """Test that a caller's request id is reused"""
+    response = app.test_client().get('/meals', headers={"X-Request-ID": "abc123"})
+
+    assert response.headers["X-Request-ID"] == "abc123"
+    assert timing_lines()[0]["request_id"] == "abc123"
+
+def test_timing_line_breakdown(app, timing_lines):
+    """Test that one JSON line per request reports SQL, random.org and serialization time"""
+    app.test_client().get('/meals')
+
+    [line] = timing_lines()
+    assert line["path"] == "/meals"
+    assert line["endpoint"] == "meals"
+    assert line["status"] == 200
+    assert line["sql_calls"] == 3
+    assert line["serialization_calls"] == 1
+    assert line["random_org_calls"] == 0
+    assert 0 < line["sql_ms"] <= line["duration_ms"]
+
+def test_timed_outside_a_request():
+    """Test that timing is a no-op when no request is being handled"""
+    with timed("sql"):
+        pass
+    assert get_request_id() is None
@@ -0,0 +1,87 @@
+
+import sqlite3
+
+import pytest
+
+from meal_max.models.kitchen_model import create_meal, delete_meal, get_leaderboard
+from meal_max.models.matchup_model import get_battle_scores
+from meal_max.models.season_model import partition_rows, run_season
+
+@pytest.fixture
+def sqlite_db(sqlite_db):
+    """Add a small field of meals"""
+    for i in range(1, 9):
+        create_meal(f'meal{i}', 'fusion', 5.0 * i, ('LOW', 'MED', 'HIGH')[i % 3])
+    return sqlite_db
+
+def season_battles(db_path):
+    conn = sqlite3.connect(db_path)
+    total = conn.execute("SELECT SUM(season_battles) FROM meals").fetchone()[0]
+    conn.close()
+    return total
+
+@pytest.mark.parametrize("num_meals, chunk_battles", [(2, 1), (8, 5), (50, 100), (50, 10**6)])
+def test_partition_rows_covers_every_pair(num_meals, chunk_battles):
+    """Test that the row ranges are contiguous and cover the whole round robin"""
+    chunks = partition_rows(num_meals, chunk_battles)
+
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == num_meals - 1
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(chunks, chunks[1:]))
+
+def test_season_records_totals(sqlite_db):
+    """Test that every meal plays every other once and the totals go to the season stats"""
+    result = run_season(workers=1, seed=7)
+
+    assert result['meals'] == 8
+    assert result['battles'] == 28
+    assert result['rated'] is False
+    assert sum(standing['wins'] for standing in result['standings']) == 28
+    assert all(standing['wins'] + standing['losses'] == 7 for standing in result['standings'])
+
+    conn = sqlite3.connect(sqlite_db)
+    stats = {row[0]: row[1:] for row in conn.execute(
+        "SELECT id, season_battles, season_wins, battles, wins, rating FROM meals")}
+    conn.close()
+    for standing in result['standings']:
+        assert stats[standing['id']] == (7, standing['wins'], 0, 0, 1500.0)
+    # Unrated battles stay off the leaderboard
+    assert get_leaderboard("rating") == []
+
+def test_season_same_result_on_any_worker_count(mocker, sqlite_db):
+    """Test that a seeded season does not depend on how it was split across processes"""
+    mocker.patch("meal_max.models.season_model.partition_rows",
+                 side_effect=lambda num_meals: partition_rows(num_meals, 5))
+
+    serial = run_season(workers=1, seed=7, record_results=False)
+    parallel = run_season(workers=2, seed=7, record_results=False)
+
+    assert serial == parallel
+
+def test_season_without_recording(sqlite_db):
+    """Test that a season can be played without touching the stats"""
+    run_season(workers=1, seed=7, record_results=False)
+    assert season_battles(sqlite_db) == 0
+
+def test_season_meal_deleted_before_merge(mocker, sqlite_db):
+    """Test that nothing is written if a meal disappears during the season"""
+    def delete_during_season(meals):
+        delete_meal(meals[0].id)
+        return get_battle_scores(meals)
+
+    mocker.patch("meal_max.models.season_model.get_battle_scores", side_effect=delete_during_season)
+
+    with pytest.raises(ValueError, match="1 meal\\(s\\) were not found or have been deleted"):
+        run_season(workers=1, seed=7)
+    assert season_battles(sqlite_db) == 0
+
+def test_season_too_few_meals(mocker):
+    """Test error when there is nobody to play"""
+    mocker.patch("meal_max.models.season_model.get_all_meals", return_value=[])
+    with pytest.raises(ValueError, match="A season needs at least two meals."):
+        run_season(workers=1)
+
+def test_season_invalid_workers():
+    """Test error when asking for no worker processes"""
+    with pytest.raises(ValueError, match="Invalid number of workers: 0. Must be at least 1."):
+        run_season(workers=0)
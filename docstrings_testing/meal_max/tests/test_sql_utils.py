@@ -0,0 +1,183 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.utils.sql_utils import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """fixture to provide a small pool over a throwaway database"""
+    pool = ConnectionPool(str(tmp_path / "test.db"), max_size=2, idle_timeout=60, checkout_timeout=0.2)
+    yield pool
+    pool.close()
+
+
+def test_acquire_reuses_released_connection(pool):
+    """tests that a released connection is handed out again instead of reopened"""
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+
+    stats = pool.get_stats()
+    assert stats["checkouts"] == 2
+    assert stats["connections_opened"] == 1
+    assert stats["in_use"] == 1
+
+
+def test_release_rolls_back_uncommitted_work(pool):
+    """tests that a connection is returned without a dangling transaction"""
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_acquire_times_out_when_exhausted(pool):
+    """tests error when every connection is checked out"""
+    pool.acquire()
+    pool.acquire()
+
+    with pytest.raises(RuntimeError, match="Timed out waiting for a database connection."):
+        pool.acquire()
+
+    stats = pool.get_stats()
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_time"] > 0
+
+
+def test_acquire_waits_for_release(pool):
+    """tests that a waiting thread gets the connection released by another"""
+    first = pool.acquire()
+    pool.acquire()
+    result = {}
+
+    def worker():
+        result["conn"] = pool.acquire()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    pool.release(first)
+    thread.join(1)
+
+    assert result["conn"] is first
+    assert pool.get_stats()["waits"] == 1
+
+
+def test_acquire_discards_unhealthy_connection(pool):
+    """tests that a broken idle connection is replaced on checkout"""
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+
+    fresh = pool.acquire()
+    assert fresh is not conn
+    fresh.execute("SELECT 1")
+
+    stats = pool.get_stats()
+    assert stats["health_check_failures"] == 1
+    assert stats["open"] == 1
+
+
+def test_idle_connections_expire(tmp_path):
+    """tests that idle connections past the timeout are closed"""
+    pool = ConnectionPool(str(tmp_path / "test.db"), max_size=2, idle_timeout=0)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is not conn
+    assert pool.get_stats()["connections_closed"] == 1
+    pool.close()
+
+
+def test_invalid_pool_size(tmp_path):
+    """tests error when the pool cannot hold a connection"""
+    with pytest.raises(ValueError, match="Invalid pool size: 0. Must be at least 1."):
+        ConnectionPool(str(tmp_path / "test.db"), max_size=0)
+
+
+def test_closed_pool_rejects_checkout(pool):
+    """tests error when checking out of a closed pool"""
+    pool.close()
+    with pytest.raises(RuntimeError, match="Connection pool is closed."):
+        pool.acquire()
+
+
+def test_connection_usable_across_threads(pool):
+    """tests that a pooled connection can be used by a different thread"""
+    conn = pool.acquire()
+    pool.release(conn)
+    errors = []
+
+    def worker():
+        try:
+            c = pool.acquire()
+            c.execute("SELECT 1")
+            pool.release(c)
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join(1)
+    assert errors == []
+
+
+def test_connect_runs_outside_the_pool_lock(pool, mocker):
+    """tests that opening a connection does not block other checkouts"""
+    idle = pool.acquire()
+    pool.release(idle)
+    other = pool.acquire()  # keeps the idle one out so the next checkout must connect
+
+    original_connect = sqlite3.connect
+    handed_out = []
+
+    def checkout():
+        pool.release(other)
+        handed_out.append(pool.acquire())
+
+    def connect(*args, **kwargs):
+        # Another thread can still take a connection while this one is opening
+        worker = threading.Thread(target=checkout)
+        worker.start()
+        worker.join(1)
+        return original_connect(*args, **kwargs)
+
+    mocker.patch("meal_max.utils.sql_utils.sqlite3.connect", side_effect=connect)
+    conn = pool.acquire()
+
+    assert handed_out == [other]
+    assert conn is not other
+    assert pool.get_stats()["open"] == 2
+
+
+def test_health_check_runs_outside_the_pool_lock(pool, mocker):
+    """tests that checking an idle connection does not block other checkouts"""
+    idle = pool.acquire()
+    pool.release(idle)
+
+    original_is_healthy = pool._is_healthy
+    handed_out = []
+
+    def checkout():
+        handed_out.append(pool.acquire())
+
+    def is_healthy(conn):
+        # Another thread can still open a connection while this one is checked
+        worker = threading.Thread(target=checkout)
+        worker.start()
+        worker.join(1)
+        return original_is_healthy(conn)
+
+    mocker.patch.object(pool, "_is_healthy", side_effect=is_healthy)
+
+    assert pool.acquire() is idle
+    assert len(handed_out) == 1 and handed_out[0] is not idle
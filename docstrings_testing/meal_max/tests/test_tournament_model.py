@@ -0,0 +1,154 @@
+from itertools import combinations
+
+import pytest
+
+from meal_max.models.battle_event_model import BattleEventLog
+from meal_max.models.kitchen_model import Meal
+from meal_max.models.tournament_model import TournamentModel
+from meal_max.utils.random_utils import SeededSource
+
+
+@pytest.fixture(autouse=True)
+def event_log(mocker):
+    """Queue battle events in a private log that is never flushed"""
+    log = BattleEventLog(flush_interval=3600, batch_size=10000, max_buffer=10000)
+    mocker.patch("meal_max.models.battle_event_model._event_log", log)
+    return log
+
+@pytest.fixture
+def entrants():
+    return [Meal(i, f'meal{i}', 'fusion', 10.0 + i, 'MED') for i in range(1, 9)]
+
+@pytest.fixture(autouse=True)
+def mock_random(mocker):
+    """Draw battle outcomes from a seeded source so brackets are reproducible"""
+    source = SeededSource(3)
+    return mocker.patch("meal_max.models.tournament_model.get_randoms", side_effect=source.get_randoms)
+
+@pytest.fixture
+def mock_record_results(mocker):
+    return mocker.patch("meal_max.models.tournament_model.record_battle_results")
+
+def played_pairs(tournament):
+    return [frozenset((match.combatant_1.id, match.combatant_2.id)) for match in tournament.matches]
+
+##Validation
+
+def test_invalid_format(entrants):
+    """Test error when asking for an unknown tournament format"""
+    with pytest.raises(ValueError, match="Invalid tournament format: ladder"):
+        TournamentModel(entrants, "ladder")
+
+def test_too_few_entrants(entrants):
+    """Test error when a tournament has a single entrant"""
+    with pytest.raises(ValueError, match="A tournament needs at least two entrants."):
+        TournamentModel(entrants[:1])
+
+def test_duplicate_entrants(entrants):
+    """Test error when a meal is entered twice"""
+    with pytest.raises(ValueError, match="Each meal can only enter a tournament once."):
+        TournamentModel(entrants + entrants[:1])
+
+def test_invalid_swiss_rounds(entrants):
+    """Test error when Swiss would need more rounds than there are opponents"""
+    with pytest.raises(ValueError, match="Invalid number of rounds: 8. Must be between 1 and 7."):
+        TournamentModel(entrants, "swiss", rounds=8)
+
+def test_too_many_entrants(mocker, entrants):
+    """Test error when the field is over TOURNAMENT_MAX_ENTRANTS, before any meal is loaded"""
+    mocker.patch("meal_max.models.tournament_model.TOURNAMENT_MAX_ENTRANTS", 7)
+    mock_get = mocker.patch("meal_max.models.tournament_model.get_meals_by_names")
+
+    with pytest.raises(ValueError, match="Too many entrants: 8. At most 7 can enter a tournament."):
+        TournamentModel.from_meal_names([meal.meal for meal in entrants])
+    mock_get.assert_not_called()
+    with pytest.raises(ValueError, match="Too many entrants: 8. At most 7 can enter a tournament."):
+        TournamentModel(entrants)
+
+def test_from_meal_names_loads_in_one_query(mocker, entrants):
+    """Test that entrants are loaded with a single bulk lookup"""
+    mock_get = mocker.patch("meal_max.models.tournament_model.get_meals_by_names", return_value=entrants)
+
+    tournament = TournamentModel.from_meal_names([meal.meal for meal in entrants], "round_robin")
+
+    mock_get.assert_called_once_with([meal.meal for meal in entrants])
+    assert tournament.entrants == entrants
+
+##Formats
+
+@pytest.mark.parametrize("tournament_format, fetches", [("single_elimination", [4, 2, 1]), ("round_robin", [28]),
+                                                        ("swiss", [4, 4, 4])])
+def test_random_numbers_fetched_in_bulk(entrants, mock_record_results, mock_random, tournament_format, fetches):
+    """Test that random numbers come one fetch per round, or one for a whole round robin"""
+    TournamentModel(entrants, tournament_format).run()
+
+    assert [call.args[0] for call in mock_random.call_args_list] == fetches
+
+def test_single_elimination(entrants, mock_record_results):
+    """Test an 8-meal bracket: 7 battles, one champion, one bulk write"""
+    tournament = TournamentModel(entrants)
+    result = tournament.run()
+
+    assert len(result['matches']) == 7
+    assert [match['round'] for match in result['matches']] == [1, 1, 1, 1, 2, 2, 3]
+    assert result['standings'][0]['meal'] == result['champion']
+    assert result['standings'][0]['wins'] == 3
+    assert sum(standing['losses'] for standing in result['standings']) == 7
+    mock_record_results.assert_called_once_with([(m.winner.id, m.loser.id) for m in tournament.matches])
+
+def test_single_elimination_byes(entrants, mock_record_results):
+    """Test that top seeds get byes when the field is not a power of two"""
+    tournament = TournamentModel(entrants[:6])
+    tournament.run()
+
+    first_round = [match for match in tournament.matches if match.round == 1]
+    seeded_ids = {meal.id for match in first_round for meal in (match.combatant_1, match.combatant_2)}
+    assert seeded_ids == {3, 4, 5, 6}
+    assert len(tournament.matches) == 5
+
+def test_round_robin(entrants, mock_record_results):
+    """Test that every meal meets every other exactly once"""
+    tournament = TournamentModel(entrants[:5], "round_robin")
+    tournament.run()
+
+    assert sorted(played_pairs(tournament), key=sorted) == sorted(
+        (frozenset((a.id, b.id)) for a, b in combinations(entrants[:5], 2)), key=sorted)
+
+def test_swiss_avoids_rematches(entrants, mock_record_results):
+    """Test that Swiss pairs every meal once per round without rematches"""
+    tournament = TournamentModel(entrants, "swiss")
+    result = tournament.run()
+
+    assert len(tournament.matches) == 3 * 4
+    assert len(set(played_pairs(tournament))) == len(tournament.matches)
+    assert all(standing['wins'] + standing['losses'] == 3 for standing in result['standings'])
+
+def test_swiss_odd_field_gives_byes(entrants, mock_record_results):
+    """Test that each round with an odd field gives a different meal the bye"""
+    tournament = TournamentModel(entrants[:5], "swiss", rounds=3)
+    result = tournament.run()
+
+    assert len(tournament.matches) == 3 * 2
+    assert sum(standing['byes'] for standing in result['standings']) == 3
+    assert all(standing['byes'] <= 1 for standing in result['standings'])
+
+def test_scores_computed_once_per_entrant(mocker, entrants, mock_record_results):
+    """Test that battle scores are computed once, not once per battle"""
+    mock_score = mocker.patch("meal_max.models.tournament_model.BattleModel.get_battle_score", return_value=50.0)
+
+    TournamentModel(entrants, "round_robin").run()
+
+    assert mock_score.call_count == len(entrants)
+
+def test_run_twice(entrants, mock_record_results):
+    """Test error when running a tournament that has already finished"""
+    tournament = TournamentModel(entrants[:2])
+    tournament.run()
+
+    with pytest.raises(RuntimeError, match="This tournament has already been run."):
+        tournament.run()
+
+def test_run_without_recording(entrants, mock_record_results):
+    """Test that results can be computed without touching the database"""
+    TournamentModel(entrants[:4]).run(record_results=False)
+    mock_record_results.assert_not_called()
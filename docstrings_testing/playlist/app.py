@@ -1,8 +1,15 @@
 from dotenv import load_dotenv
 from flask import Flask, jsonify, make_response, Response, request
+from flask.logging import default_handler
 
 from music_collection.models import song_model
 from music_collection.models.playlist_model import PlaylistModel
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.migrations import run_migrations
+from music_collection.utils.metrics import CONTENT_TYPE, REGISTRY
+from music_collection.utils.random_utils import get_random_org_status
+from music_collection.utils.request_timing import init_request_timing
+from music_collection.utils.sql_profiler import SQL_PROFILER
 from music_collection.utils.sql_utils import check_database_connection, check_table_exists
 
 
@@ -11,6 +18,17 @@ load_dotenv()
 
 app = Flask(__name__)
 
+# Route logs go through the same background writer as the models instead of
+# Flask's handler, which writes to stderr on the request thread
+app.logger.removeHandler(default_handler)
+configure_logger(app.logger)
+
+# Request ids and a JSON timing line (SQL, random.org, serialization) per request
+init_request_timing(app)
+
+# Bring the database schema up to date before serving any requests
+run_migrations()
+
 playlist_model = PlaylistModel()
 
 
@@ -54,6 +72,100 @@ def db_check() -> Response:
         return make_response(jsonify({'error': str(e)}), 404)
 
 
+@app.route('/api/random-status', methods=['GET'])
+def random_status() -> Response:
+    """
+    Route to report the random number source and the random.org circuit breaker state.
+
+    Returns:
+        JSON response with the active source and circuit breaker counters.
+    """
+    try:
+        app.logger.info("Retrieving random source status")
+        return make_response(jsonify({'status': 'success', 'random': get_random_org_status()}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving random source status: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Route to expose request, database, random.org and activity metrics for Prometheus.
+
+    Returns:
+        Plain-text response in the Prometheus exposition format.
+    """
+    try:
+        app.logger.info("Rendering metrics")
+        return make_response(REGISTRY.render(), 200, {'Content-Type': CONTENT_TYPE})
+    except Exception as e:
+        app.logger.error(f"Error rendering metrics: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/sql-profile', methods=['GET'])
+def get_sql_profile() -> Response:
+    """
+    Route to report the SQL statement templates that took the most time while profiling was on.
+
+    Query Parameters:
+        - limit (int, optional): Maximum number of templates to return. Default is all of them.
+
+    Returns:
+        JSON response with per-template counts, time, SQLite VM steps and, for slow
+        statements, the EXPLAIN QUERY PLAN output.
+    Raises:
+        400 error if limit is invalid.
+        500 error if there is an issue building the report.
+    """
+    try:
+        try:
+            limit = request.args.get('limit', type=int)
+            report = SQL_PROFILER.get_report(limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        app.logger.info("Retrieving SQL profile")
+        return make_response(jsonify({'status': 'success', 'profile': report}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving SQL profile: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/sql-profile', methods=['POST'])
+def set_sql_profile() -> Response:
+    """
+    Route to switch SQL profiling on or off, and optionally clear what was recorded.
+
+    Expected JSON Input:
+        - enabled (bool): Whether connections handed out from now on are traced.
+        - reset (bool, optional): Clear the recorded templates first. Default is False.
+
+    Returns:
+        JSON response with the profiler state.
+    Raises:
+        400 error if enabled or reset is not a boolean.
+        500 error if there is an issue switching the profiler.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        enabled = data.get('enabled')
+        reset = data.get('reset', False)
+
+        if not isinstance(enabled, bool) or not isinstance(reset, bool):
+            return make_response(jsonify({'error': 'enabled and reset must be booleans'}), 400)
+
+        if reset:
+            SQL_PROFILER.reset()
+        if enabled:
+            SQL_PROFILER.enable()
+        else:
+            SQL_PROFILER.disable()
+
+        return make_response(jsonify({'status': 'success', 'enabled': SQL_PROFILER.enabled}), 200)
+    except Exception as e:
+        app.logger.error(f"Error switching SQL profiling: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
 ##########################################################
 #
 # Song Management
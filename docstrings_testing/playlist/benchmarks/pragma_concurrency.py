@@ -0,0 +1,117 @@
+"""Benchmark catalog reads running alongside play-count writes, per PRAGMA profile.
+
+One writer thread increments play counts, as update_play_count does, while
+reader threads repeatedly run the get_all_songs query. Each profile gets its
+own database file, because journal_mode=WAL persists in the file.
+
+    python -m benchmarks.pragma_concurrency --songs 5000 --readers 4 --seconds 3
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from music_collection.utils.migrations import run_migrations
+from music_collection.utils.sql_utils import PRAGMA_PROFILES, connect
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "sql", "migrations")
+
+READ_QUERY = """
+    SELECT id, artist, title, year, genre, duration, play_count
+    FROM songs
+    WHERE deleted = FALSE
+"""
+
+
+def build_catalog(db_path: str, num_songs: int, profile: str) -> None:
+    run_migrations(db_path, MIGRATIONS_DIR)
+    conn = connect(db_path, profile)
+    conn.executemany(
+        "INSERT INTO songs (artist, title, year, genre, duration) VALUES (?, ?, ?, ?, ?)",
+        [(f"Artist {i}", f"Song {i}", 2000 + i % 20, "Pop", 180) for i in range(num_songs)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_profile(profile: str, num_songs: int, num_readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        build_catalog(db_path, num_songs, profile)
+
+        stop = threading.Event()
+        read_latencies = []
+        read_errors = [0]
+        writes = [0]
+        lock = threading.Lock()
+
+        def writer():
+            song_id = 0
+            while not stop.is_set():
+                conn = connect(db_path, profile)
+                conn.execute("SELECT deleted FROM songs WHERE id = ?", (song_id % num_songs + 1,))
+                conn.execute("UPDATE songs SET play_count = play_count + 1 WHERE id = ?", (song_id % num_songs + 1,))
+                conn.commit()
+                conn.close()
+                song_id += 1
+                writes[0] += 1
+
+        def reader():
+            latencies = []
+            errors = 0
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    conn = connect(db_path, profile)
+                    conn.execute(READ_QUERY).fetchall()
+                    conn.close()
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+            with lock:
+                read_latencies.extend(latencies)
+                read_errors[0] += errors
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(num_readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    read_latencies.sort()
+    return {
+        "profile": profile,
+        "reads_per_s": len(read_latencies) / seconds,
+        "writes_per_s": writes[0] / seconds,
+        "read_p50_ms": statistics.median(read_latencies) * 1000 if read_latencies else float("nan"),
+        "read_p99_ms": read_latencies[int(len(read_latencies) * 0.99) - 1] * 1000 if read_latencies else float("nan"),
+        "read_max_ms": read_latencies[-1] * 1000 if read_latencies else float("nan"),
+        "read_errors": read_errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--profiles", nargs="+", default=list(PRAGMA_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.songs} songs, {args.readers} readers, 1 writer, {args.seconds:.0f}s per profile")
+    print(f"{'profile':<8} {'reads/s':>9} {'writes/s':>9} {'read p50':>10} {'read p99':>10} {'read max':>10} {'errors':>7}")
+    for profile in args.profiles:
+        result = run_profile(profile, args.songs, args.readers, args.seconds)
+        print(f"{result['profile']:<8} {result['reads_per_s']:>9.1f} {result['writes_per_s']:>9.1f} "
+              f"{result['read_p50_ms']:>8.2f}ms {result['read_p99_ms']:>8.2f}ms {result['read_max_ms']:>8.2f}ms "
+              f"{result['read_errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
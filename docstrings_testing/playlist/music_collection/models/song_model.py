@@ -4,6 +4,7 @@ import sqlite3
 from typing import Any
 
 from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import REGISTRY
 from music_collection.utils.random_utils import get_random
 from music_collection.utils.sql_utils import get_db_connection
 
@@ -11,6 +12,8 @@ from music_collection.utils.sql_utils import get_db_connection
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+PLAYS_RECORDED = REGISTRY.counter("plays_total", "Song plays recorded")
+
 
 @dataclass
 class Song:
@@ -237,10 +240,78 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
         logger.error("Database error while retrieving all songs: %s", str(e))
         raise e
 
+def get_max_song_id() -> int:
+    """
+    Retrieves the largest song id ever assigned, deleted songs included.
+
+    Returns:
+        int: The largest id, or 0 if the catalog has never held a song.
+
+    Raises:
+        sqlite3.Error: If there is a database error.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(id) FROM songs")
+            return cursor.fetchone()[0] or 0
+
+    except sqlite3.Error as e:
+        logger.error("Database error while retrieving the largest song id: %s", str(e))
+        raise e
+
+def get_song_at_or_after(song_id: int) -> Song:
+    """
+    Retrieves the first non-deleted song whose id is at least song_id,
+    wrapping around to the lowest id when there is none.
+
+    Both lookups are a single seek on the id index, so the cost does not
+    grow with the size of the catalog.
+
+    Args:
+        song_id (int): The id to start from.
+
+    Returns:
+        Song: The Song object found.
+
+    Raises:
+        ValueError: If the catalog has no non-deleted songs.
+        sqlite3.Error: If there is a database error.
+    """
+    query = """
+        SELECT id, artist, title, year, genre, duration
+        FROM songs
+        WHERE deleted = FALSE AND id >= ?
+        ORDER BY id
+        LIMIT 1
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (song_id,))
+            row = cursor.fetchone()
+            if not row:
+                cursor.execute(query, (0,))
+                row = cursor.fetchone()
+
+        if not row:
+            logger.info("Cannot retrieve a song because the song catalog is empty.")
+            raise ValueError("The song catalog is empty.")
+        return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+
+    except sqlite3.Error as e:
+        logger.error("Database error while retrieving song at or after id %d: %s", song_id, str(e))
+        raise e
+
 def get_random_song() -> Song:
     """
     Retrieves a random song from the catalog.
 
+    A random id between 1 and the largest id is drawn and the first
+    non-deleted song from there is returned, so only index seeks are needed
+    however large the catalog is. Songs that follow a run of deleted ids are
+    a little more likely to be picked.
+
     Returns:
         Song: A randomly selected Song object.
 
@@ -248,26 +319,17 @@ def get_random_song() -> Song:
         ValueError: If the catalog is empty.
     """
     try:
-        all_songs = get_all_songs()
+        max_id = get_max_song_id()
 
-        if not all_songs:
+        if not max_id:
             logger.info("Cannot retrieve random song because the song catalog is empty.")
             raise ValueError("The song catalog is empty.")
 
-        # Get a random index using the random.org API
-        random_index = get_random(len(all_songs))
-        logger.info("Random index selected: %d (total songs: %d)", random_index, len(all_songs))
-
-        # Return the song at the random index, adjust for 0-based indexing
-        song_data = all_songs[random_index - 1]
-        return Song(
-            id=song_data["id"],
-            artist=song_data["artist"],
-            title=song_data["title"],
-            year=song_data["year"],
-            genre=song_data["genre"],
-            duration=song_data["duration"]
-        )
+        # Get a random id using the random.org API
+        random_id = get_random(max_id)
+        logger.info("Random id selected: %d (largest id: %d)", random_id, max_id)
+
+        return get_song_at_or_after(random_id)
 
     except Exception as e:
         logger.error("Error while retrieving random song: %s", str(e))
@@ -303,6 +365,7 @@ def update_play_count(song_id: int) -> None:
             # Increment the play count
             cursor.execute("UPDATE songs SET play_count = play_count + 1 WHERE id = ?", (song_id,))
             conn.commit()
+            PLAYS_RECORDED.inc()
 
             logger.info("Play count incremented for song with ID: %d", song_id)
 
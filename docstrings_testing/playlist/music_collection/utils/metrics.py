@@ -0,0 +1,195 @@
+from bisect import bisect_left
+import math
+import threading
+from typing import Iterable, Optional
+
+
+# Seconds; the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels
+
+    Updates hold a per-metric lock for a single dictionary update, so
+    recording costs well under a microsecond and never waits on a scrape
+    for long.
+
+    Attributes:
+        name (str): metric name
+        help (str): one-line description
+        label_names (tuple[str, ...]): label names, in the order values are passed
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Adds amount to the series for the given label values
+
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, *label_values: str) -> float:
+        """Returns the current value of one series
+
+        """
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                for labels, value in values]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets, with their sum and count
+
+    Attributes:
+        name (str): metric name
+        help (str): one-line description
+        label_names (tuple[str, ...]): label names, in the order values are passed
+        buckets (tuple[float, ...]): upper bounds, ascending; +Inf is implied
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, label_names: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        # labels -> [count per bucket (not cumulative), sum]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Counts one observation in the series for the given label values
+
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [[0] * len(self.buckets), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def get_count(self, *label_values: str) -> int:
+        """Returns how many observations one series has
+
+        """
+        with self._lock:
+            series = self._values.get(label_values)
+            return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+
+        lines = []
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The set of metrics exposed by one process
+
+    Registering a name twice returns the existing metric, so modules can
+    declare their metrics at import time without coordinating.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, object] = {}
+
+    def counter(self, name: str, help: str, label_names: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, label_names))
+
+    def histogram(self, name: str, help: str, label_names: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, label_names, buckets))
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format
+
+        Returns:
+            str: the exposition, ending with a newline
+
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def get(self, name: str) -> Optional[object]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} is already registered as a {existing.type}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+REGISTRY = MetricsRegistry()
+
+# Prometheus exposition content type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests handled, by route, method and status", ("route", "method", "status"))
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request, by route", ("route",))
+SQL_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "sql_queries_per_request", "SQL statements executed while handling one request, by route", ("route",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500))
+DB_CONNECTIONS_OPENED = REGISTRY.counter(
+    "db_connections_opened_total", "SQLite connections opened")
+RANDOM_ORG_REQUEST_DURATION = REGISTRY.histogram(
+    "random_org_request_duration_seconds", "Time for one HTTP attempt against random.org")
+RANDOM_ORG_FAILURES = REGISTRY.counter(
+    "random_org_failures_total", "random.org HTTP attempts that failed")
@@ -0,0 +1,148 @@
+"""Versioned schema migrations for the song catalog database.
+
+Migrations are plain SQL files named <version>_<name>.sql (for example
+0002_song_indexes.sql) in SQL_MIGRATIONS_PATH. Each file is applied
+once, in version order, inside its own transaction, and recorded in the
+schema_migrations table. Migrations must never drop data; add a new file
+instead of editing one that has shipped.
+
+Run them by hand with:
+
+    python -m music_collection.utils.migrations
+"""
+import logging
+import os
+import re
+import sqlite3
+from typing import Optional
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils import sql_utils
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Directory holding the <version>_<name>.sql migration files
+SQL_MIGRATIONS_PATH = os.getenv("SQL_MIGRATIONS_PATH", "/app/sql/migrations")
+
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def load_migrations(migrations_dir: Optional[str] = None) -> list[tuple[int, str, str]]:
+    """Reads the migration files in version order
+
+    Args:
+        migrations_dir (str, optional): directory to read instead of SQL_MIGRATIONS_PATH
+
+    Returns:
+        list[tuple[int, str, str]]: (version, name, sql) for every migration
+
+    Raises:
+        ValueError: If two files share a version number
+
+    """
+    migrations_dir = migrations_dir or SQL_MIGRATIONS_PATH
+    migrations = {}
+    for filename in os.listdir(migrations_dir):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {filename}")
+        with open(os.path.join(migrations_dir, filename), "r") as fh:
+            migrations[version] = (version, match.group(2), fh.read())
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Returns the highest migration version applied to a database
+
+    Args:
+        conn (sqlite3.Connection): connection to the database
+
+    Returns:
+        int: the current schema version, 0 for a database never migrated
+
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+
+def run_migrations(db_path: Optional[str] = None, migrations_dir: Optional[str] = None) -> list[int]:
+    """Applies every pending migration to the database
+
+    Each migration runs under BEGIN IMMEDIATE, and the version is re-checked
+    inside the transaction, so several workers starting at once apply each
+    migration exactly once.
+
+    Args:
+        db_path (str, optional): database to migrate instead of DB_PATH
+        migrations_dir (str, optional): directory to read instead of SQL_MIGRATIONS_PATH
+
+    Returns:
+        list[int]: the versions applied by this call
+
+    Raises:
+        sqlite3.Error: If a migration fails; it is rolled back and later ones are not run
+
+    """
+    db_path = db_path or sql_utils.DB_PATH
+    migrations = load_migrations(migrations_dir)
+    applied = []
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        for version, name, sql in migrations:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if version <= get_schema_version(conn):
+                    conn.execute("ROLLBACK")
+                    continue
+
+                logger.info("Applying migration %04d_%s", version, name)
+                # executescript would commit the open transaction, so run the
+                # statements one at a time to keep the migration atomic
+                for statement in _split_statements(sql):
+                    conn.execute(statement)
+                conn.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+                conn.execute("COMMIT")
+                applied.append(version)
+            except sqlite3.Error as e:
+                conn.execute("ROLLBACK")
+                logger.error("Migration %04d_%s failed: %s", version, name, str(e))
+                raise e
+    finally:
+        conn.close()
+
+    if applied:
+        logger.info("Database migrated to version %d", applied[-1])
+    else:
+        logger.info("Database schema is up to date.")
+    return applied
+
+
+def _split_statements(sql: str) -> list[str]:
+    statements = []
+    current = ""
+    for line in sql.splitlines(keepends=True):
+        if line.lstrip().startswith("--"):
+            continue
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    if current.strip():
+        statements.append(current.strip())
+    return statements
+
+
+if __name__ == "__main__":
+    run_migrations()
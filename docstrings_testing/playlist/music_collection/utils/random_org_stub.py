@@ -0,0 +1,152 @@
+"""A local stand-in for the random.org plain-text API.
+
+Serves the two endpoints the apps use, /decimal-fractions/ and /integers/,
+with the same query parameters and newline-separated plain-text responses,
+so the random_org source can run without network access:
+
+    python -m music_collection.utils.random_org_stub --port 8089 --seed 42
+    RANDOM_ORG_URL=http://localhost:8089 python app.py
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import random
+import secrets
+import threading
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from music_collection.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+MAX_NUM = 10000
+
+
+class RandomOrgStubHandler(BaseHTTPRequestHandler):
+    """Answers random.org style requests from the server's random generator
+
+    """
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        try:
+            num = int(params.get("num", "1"))
+            if not 1 <= num <= MAX_NUM:
+                raise ValueError(f"The number of values must be between 1 and {MAX_NUM}")
+
+            if parsed.path.rstrip("/") == "/decimal-fractions":
+                dec = int(params.get("dec", "2"))
+                scale = 10 ** dec
+                values = [f"{self.server.randbelow(scale) / scale:.{dec}f}" for _ in range(num)]
+            elif parsed.path.rstrip("/") == "/integers":
+                low = int(params["min"])
+                high = int(params["max"])
+                if low > high:
+                    raise ValueError("The minimum value must be less than or equal to the maximum value")
+                values = [str(low + self.server.randbelow(high - low + 1)) for _ in range(num)]
+            else:
+                self._respond(404, "Error: Unknown endpoint")
+                return
+        except (KeyError, ValueError) as e:
+            self._respond(503, f"Error: {e}")
+            return
+
+        self._respond(200, "\n".join(values) + "\n")
+
+    def _respond(self, status: int, body: str) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class RandomOrgStubServer(ThreadingHTTPServer):
+    """HTTP server mimicking random.org, seeded for reproducibility if asked
+
+    Attributes:
+        seed (int, optional): the PRNG seed, or None to draw from the CSPRNG
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, seed: Optional[int] = None):
+        super().__init__((host, port), RandomOrgStubHandler)
+        self.seed = seed
+        self._rng = random.Random(seed) if seed is not None else None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """Returns the base URL to use as RANDOM_ORG_URL
+
+        Returns:
+            str: http://host:port of the running server
+
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def randbelow(self, n: int) -> int:
+        """Returns a random int in [0, n)
+
+        Args:
+            n (int): exclusive upper bound
+
+        Returns:
+            int: the random value
+
+        """
+        if self._rng is None:
+            return secrets.randbelow(n)
+        with self._lock:
+            return self._rng.randrange(n)
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, seed: Optional[int] = None) -> RandomOrgStubServer:
+    """Starts the stand-in server on a background thread
+
+    Args:
+        host (str): interface to bind
+        port (int): port to bind, 0 picks a free one
+        seed (int, optional): PRNG seed for reproducible numbers
+
+    Returns:
+        RandomOrgStubServer: the running server; call shutdown() to stop it
+
+    """
+    server = RandomOrgStubServer(host, port, seed)
+    thread = threading.Thread(target=server.serve_forever, name="random-org-stub", daemon=True)
+    thread.start()
+    logger.info("random.org stand-in listening on %s", server.url)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the random.org plain-text API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = RandomOrgStubServer(args.host, args.port, args.seed)
+    logger.info("random.org stand-in listening on %s", server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
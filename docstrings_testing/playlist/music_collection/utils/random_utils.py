@@ -1,16 +1,164 @@
+from abc import ABC, abstractmethod
 import logging
+import os
+import random
+import secrets
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
 import requests
+from requests.adapters import HTTPAdapter
 
+from music_collection.utils.circuit_breaker import CircuitBreaker
 from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import RANDOM_ORG_FAILURES, RANDOM_ORG_REQUEST_DURATION
+from music_collection.utils.request_timing import timed
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+T = TypeVar("T")
 
-def get_random(num_songs: int) -> int:
+
+# Which RandomSource backs get_random: random_org, local or seeded
+RANDOM_SOURCE = os.getenv("RANDOM_SOURCE", "random_org")
+RANDOM_SEED = int(os.getenv("RANDOM_SEED", "0"))
+
+# Base URL of the random.org API; point it at random_org_stub for offline runs
+RANDOM_ORG_URL = os.getenv("RANDOM_ORG_URL", "https://www.random.org").rstrip("/")
+
+# Per-attempt timeout, retry budget and base backoff (seconds) for random.org calls
+RANDOM_ORG_TIMEOUT = float(os.getenv("RANDOM_ORG_TIMEOUT", "2"))
+RANDOM_ORG_RETRIES = int(os.getenv("RANDOM_ORG_RETRIES", "2"))
+RANDOM_ORG_BACKOFF = float(os.getenv("RANDOM_ORG_BACKOFF", "0.2"))
+
+# Seconds one call may spend across all its attempts and backoff sleeps
+RANDOM_ORG_DEADLINE = float(os.getenv("RANDOM_ORG_DEADLINE", "5"))
+
+# Consecutive failures before the circuit opens, and how long it stays open
+RANDOM_ORG_FAILURE_THRESHOLD = int(os.getenv("RANDOM_ORG_FAILURE_THRESHOLD", "5"))
+RANDOM_ORG_RESET_TIMEOUT = float(os.getenv("RANDOM_ORG_RESET_TIMEOUT", "30"))
+
+# Set to "local" to serve from the local CSPRNG while random.org is unavailable
+RANDOM_ORG_FALLBACK = os.getenv("RANDOM_ORG_FALLBACK", "none")
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    # Retries are handled by request_random_org so they can feed the breaker
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared keep-alive session, so repeat calls skip the DNS/TCP/TLS setup
+_session = _create_session()
+_breaker = CircuitBreaker("random.org", RANDOM_ORG_FAILURE_THRESHOLD, RANDOM_ORG_RESET_TIMEOUT)
+
+
+def _is_retryable(error: requests.exceptions.RequestException) -> bool:
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+
+def _get(url: str, timeout: float) -> requests.Response:
+    # One HTTP attempt, charged to the current request and the latency histogram
+    started = time.perf_counter()
+    try:
+        with timed("random_org"):
+            return _session.get(url, timeout=timeout)
+    finally:
+        RANDOM_ORG_REQUEST_DURATION.observe(time.perf_counter() - started)
+
+
+def request_random_org(url: str, parse: Callable[[requests.Response], T]) -> T:
+    """
+    GETs a random.org url through the shared session with retries and a circuit breaker, and parses the response.
+
+    Transient failures (timeouts, connection errors, 429 and 5xx) are retried
+    up to RANDOM_ORG_RETRIES times with full-jitter exponential backoff, as
+    long as the call stays within RANDOM_ORG_DEADLINE and the circuit breaker
+    stays closed. Each failed attempt counts toward the breaker, and so does a
+    response that cannot be parsed, which is not retried.
+
+    Args:
+        url (str): The random.org url to fetch.
+        parse (Callable[[requests.Response], T]): Turns the response into the result.
+
+    Returns:
+        T: Whatever parse returned.
+
+    Raises:
+        RuntimeError: If the circuit breaker is open.
+        requests.exceptions.RequestException: If the last attempt failed.
+        ValueError: If parse rejected the response.
+    """
+    if not _breaker.allow_request():
+        logger.error("random.org circuit breaker is open, failing fast.")
+        raise RuntimeError("random.org circuit breaker is open, failing fast.")
+
+    deadline = time.monotonic() + RANDOM_ORG_DEADLINE
+    for attempt in range(RANDOM_ORG_RETRIES + 1):
+        recorded = False
+        try:
+            response = _get(url, min(RANDOM_ORG_TIMEOUT, deadline - time.monotonic()))
+            response.raise_for_status()
+            result = parse(response)
+        except requests.exceptions.RequestException as e:
+            RANDOM_ORG_FAILURES.inc()
+            # Every failed attempt counts, so an outage opens the breaker after
+            # failure_threshold attempts rather than that many whole calls
+            _breaker.record_failure()
+            recorded = True
+            delay = random.uniform(0, RANDOM_ORG_BACKOFF * 2 ** attempt)
+            if (attempt == RANDOM_ORG_RETRIES or not _is_retryable(e)
+                    or time.monotonic() + delay >= deadline or not _breaker.allow_request()):
+                raise
+            logger.warning("Request to random.org failed (%s), retrying in %.2fs", e, delay)
+            time.sleep(delay)
+        else:
+            _breaker.record_success()
+            recorded = True
+            return result
+        finally:
+            # Anything else raised, such as a body that does not parse, is a
+            # failure too; otherwise a half-open breaker keeps its trial slot
+            if not recorded:
+                RANDOM_ORG_FAILURES.inc()
+                _breaker.record_failure()
+
+
+def get_random_org_status() -> dict[str, Any]:
+    """
+    Returns the random.org circuit breaker state and the active source for monitoring.
+
+    Returns:
+        dict: The active source name and the circuit breaker state.
+    """
+    return {"source": _source.name, "circuit_breaker": _breaker.get_state()}
+
+
+def _parse_integer(response: requests.Response) -> int:
+    random_number_str = response.text.strip()
+    try:
+        return int(random_number_str)
+    except ValueError:
+        raise ValueError("Invalid response from random.org: %s" % random_number_str)
+
+
+def fetch_random_int(num_songs: int, base_url: Optional[str] = None) -> int:
     """
     Fetches a random int between 1 and the number of songs in the catalog from random.org.
 
+    Args:
+        num_songs (int): The upper bound (inclusive) of the random number.
+        base_url (str, optional): API root to call instead of RANDOM_ORG_URL.
+
     Returns:
         int: The random number fetched from random.org.
 
@@ -18,26 +166,13 @@ def get_random(num_songs: int) -> int:
         RuntimeError: If the request to random.org fails or returns an invalid response.
         ValueError: If the response from random.org is not a valid float.
     """
-    url = f"https://www.random.org/integers/?num=1&min=1&max={num_songs}&col=1&base=10&format=plain&rnd=new"
+    url = f"{base_url or RANDOM_ORG_URL}/integers/?num=1&min=1&max={num_songs}&col=1&base=10&format=plain&rnd=new"
 
     try:
         # Log the request to random.org
         logger.info("Fetching random number from %s", url)
 
-        response = requests.get(url, timeout=5)
-
-        # Check if the request was successful
-        response.raise_for_status()
-
-        random_number_str = response.text.strip()
-
-        try:
-            random_number = int(random_number_str)
-        except ValueError:
-            raise ValueError("Invalid response from random.org: %s" % random_number_str)
-
-        logger.info("Received random number: %.3f", random_number)
-        return random_number
+        return request_random_org(url, _parse_integer)
 
     except requests.exceptions.Timeout:
         logger.error("Request to random.org timed out.")
@@ -46,3 +181,153 @@ def get_random(num_songs: int) -> int:
     except requests.exceptions.RequestException as e:
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+class RandomSource(ABC):
+    """
+    Base class for the backends that supply get_random.
+
+    Subclasses return an int between 1 and an inclusive upper bound.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get_random(self, num_songs: int) -> int:
+        """
+        Returns a random int between 1 and num_songs.
+
+        Args:
+            num_songs (int): The inclusive upper bound.
+
+        Returns:
+            int: The random number.
+        """
+
+
+class RandomOrgSource(RandomSource):
+    """
+    Fetches numbers from random.org, or a stand-in listening at base_url.
+
+    Attributes:
+        base_url (str): API root the numbers are fetched from.
+        fallback (RandomSource, optional): Used when random.org is unavailable.
+    """
+
+    name = "random_org"
+
+    def __init__(self, base_url: Optional[str] = None, fallback: Optional["RandomSource"] = None):
+        self.base_url = base_url
+        self.fallback = fallback
+
+    def get_random(self, num_songs: int) -> int:
+        try:
+            return fetch_random_int(num_songs, self.base_url)
+        except RuntimeError as e:
+            if self.fallback is None:
+                raise
+            logger.warning("random.org unavailable (%s), falling back to %s source", e, self.fallback.name)
+            return self.fallback.get_random(num_songs)
+
+
+class LocalSource(RandomSource):
+    """
+    Draws numbers from the operating system CSPRNG via the secrets module.
+    """
+
+    name = "local"
+
+    def get_random(self, num_songs: int) -> int:
+        return secrets.randbelow(num_songs) + 1
+
+
+class SeededSource(RandomSource):
+    """
+    Draws a reproducible sequence of numbers from a seeded PRNG, for load tests.
+
+    Attributes:
+        seed (int): The seed the sequence was started from.
+    """
+
+    name = "seeded"
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def get_random(self, num_songs: int) -> int:
+        with self._lock:
+            return self._rng.randint(1, num_songs)
+
+
+RANDOM_SOURCES = {
+    RandomOrgSource.name: RandomOrgSource,
+    LocalSource.name: LocalSource,
+    SeededSource.name: SeededSource,
+}
+
+
+def create_random_source(name: str, seed: int = RANDOM_SEED) -> RandomSource:
+    """
+    Builds the RandomSource registered under the given name.
+
+    Args:
+        name (str): random_org, local or seeded.
+        seed (int): The seed used by the seeded source.
+
+    Returns:
+        RandomSource: A new source instance.
+
+    Raises:
+        ValueError: If no source is registered under that name.
+    """
+    if name not in RANDOM_SOURCES:
+        logger.error("Invalid random source: %s", name)
+        raise ValueError(f"Invalid random source: {name}. Must be one of {', '.join(RANDOM_SOURCES)}.")
+    if name == SeededSource.name:
+        return SeededSource(seed)
+    if name == RandomOrgSource.name and RANDOM_ORG_FALLBACK == LocalSource.name:
+        return RandomOrgSource(fallback=LocalSource())
+    return RANDOM_SOURCES[name]()
+
+
+_source: RandomSource = create_random_source(RANDOM_SOURCE)
+
+
+def get_random_source() -> RandomSource:
+    """
+    Returns the RandomSource currently backing get_random.
+
+    Returns:
+        RandomSource: The active source.
+    """
+    return _source
+
+
+def set_random_source(source: RandomSource) -> None:
+    """
+    Replaces the RandomSource backing get_random.
+
+    Args:
+        source (RandomSource): The source to use from now on.
+    """
+    global _source
+    logger.info("Switching random source to %s", source.name)
+    _source = source
+
+
+def get_random(num_songs: int) -> int:
+    """
+    Fetches a random int between 1 and the number of songs in the catalog from the configured source.
+
+    Returns:
+        int: The random number.
+
+    Raises:
+        RuntimeError: If the request to random.org fails or returns an invalid response.
+        ValueError: If the response from random.org is not a valid float.
+    """
+    random_number = _source.get_random(num_songs)
+    logger.info("Received random number: %d", random_number)
+    return random_number
@@ -0,0 +1,208 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Iterator, Optional
+import uuid
+
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS, SQL_QUERIES_PER_REQUEST
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Header carrying the request id; an id sent by the caller is kept so logs can be joined across services
+REQUEST_ID_HEADER = "X-Request-ID"
+
+TIMING_CATEGORIES = ("sql", "random_org", "serialization")
+
+
+class RequestTimer:
+    """Wall time and call counts spent in each category during one request
+
+    Attributes:
+        request_id (str): id of the request being timed
+        started (float): perf_counter value when the request started
+        seconds (dict[str, float]): time spent per category
+        calls (dict[str, int]): calls made per category
+    """
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.seconds = dict.fromkeys(TIMING_CATEGORIES, 0.0)
+        self.calls = dict.fromkeys(TIMING_CATEGORIES, 0)
+
+    def add(self, category: str, seconds: float, calls: int = 1) -> None:
+        self.seconds[category] += seconds
+        self.calls[category] += calls
+
+
+_current_timer: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    """Returns the id of the request being handled, if any
+
+    Returns:
+        str: the request id, or None outside a timed request
+
+    """
+    timer = _current_timer.get()
+    return timer.request_id if timer is not None else None
+
+
+@contextmanager
+def timed(category: str, calls: int = 1) -> Iterator[None]:
+    """Adds the time spent in the block to the current request's category
+
+    Outside a request this does nothing beyond one context variable lookup.
+
+    Args:
+        category (str): one of TIMING_CATEGORIES
+        calls (int): how many calls the block counts as
+
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(category, time.perf_counter() - start, calls)
+
+
+@contextmanager
+def _timed_sql(conn: sqlite3.Connection, calls: int = 1) -> Iterator[None]:
+    # While the SQL profiler traces the connection, it gets the same time for the statement it last saw
+    trace = getattr(conn, "sql_trace", None)
+    with timed("sql", calls):
+        if trace is None:
+            yield
+        else:
+            with trace.running():
+                yield
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that charges statements and fetches to the current request's SQL time
+
+    The time is also what the SQL profiler charges to the statement, so work the
+    application does between fetches is never counted as SQL.
+    """
+
+    def execute(self, *args, **kwargs):
+        with _timed_sql(self.connection):
+            return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with _timed_sql(self.connection):
+            return super().executemany(*args, **kwargs)
+
+    def executescript(self, *args, **kwargs):
+        with _timed_sql(self.connection):
+            return super().executescript(*args, **kwargs)
+
+    def fetchone(self):
+        with _timed_sql(self.connection, calls=0):
+            return super().fetchone()
+
+    def fetchmany(self, *args, **kwargs):
+        with _timed_sql(self.connection, calls=0):
+            return super().fetchmany(*args, **kwargs)
+
+    def fetchall(self):
+        with _timed_sql(self.connection, calls=0):
+            return super().fetchall()
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors are TimedCursors; pass as factory= to sqlite3.connect
+
+    Attributes:
+        sql_trace (_ConnectionTrace): the SQL profiler's trace while it is profiling this connection, otherwise None
+    """
+
+    sql_trace = None
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # sqlite3.Connection.execute would build a plain Cursor
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    def commit(self):
+        with _timed_sql(self, calls=0):
+            return super().commit()
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that charges encoding to the current request's serialization time"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        with timed("serialization"):
+            return super().dumps(obj, **kwargs)
+
+
+def init_request_timing(app: Flask) -> None:
+    """Gives every request an id, logs one JSON line with its timing breakdown and records request metrics
+
+    The id comes from the X-Request-ID header when the caller sends one and is
+    echoed back on the response.
+
+    Args:
+        app (Flask): the application to instrument
+
+    """
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_request_timer() -> None:
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        _current_timer.set(RequestTimer(request_id))
+
+    @app.after_request
+    def log_request_timing(response: Response) -> Response:
+        timer = _current_timer.get()
+        if timer is None:
+            return response
+
+        duration = time.perf_counter() - timer.started
+        # The route template rather than the path keeps metric labels bounded
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+        HTTP_REQUEST_DURATION.observe(duration, route)
+        SQL_QUERIES_PER_REQUEST.observe(timer.calls["sql"], route)
+
+        response.headers[REQUEST_ID_HEADER] = timer.request_id
+        line = {
+            "request_id": timer.request_id,
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 3),
+        }
+        for category in TIMING_CATEGORIES:
+            line[f"{category}_ms"] = round(timer.seconds[category] * 1000, 3)
+            line[f"{category}_calls"] = timer.calls[category]
+        # One line per request is the point, so it is never sampled away
+        logger.info("%s", json.dumps(line), extra={"sampling_exempt": True})
+        return response
+
+    @app.teardown_request
+    def clear_request_timer(error: Optional[BaseException]) -> None:
+        _current_timer.set(None)
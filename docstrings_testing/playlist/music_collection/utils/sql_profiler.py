@@ -0,0 +1,324 @@
+from contextlib import contextmanager
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Set to true to start with the profiler on; it can also be switched at runtime through /api/sql-profile
+SQL_PROFILE = os.getenv("SQL_PROFILE", "false").lower() in ("1", "true", "yes")
+
+# Statements slower than this get their EXPLAIN QUERY PLAN recorded
+SQL_PROFILE_SLOW_MS = float(os.getenv("SQL_PROFILE_SLOW_MS", "50"))
+
+# SQLite virtual machine instructions between progress handler calls
+SQL_PROFILE_PROGRESS_STEPS = int(os.getenv("SQL_PROFILE_PROGRESS_STEPS", "1000"))
+
+# Distinct statement templates tracked; anything beyond is counted under OTHER_TEMPLATE
+SQL_PROFILE_MAX_TEMPLATES = int(os.getenv("SQL_PROFILE_MAX_TEMPLATES", "500"))
+
+OTHER_TEMPLATE = "(other statements)"
+
+# Only these can be explained; BEGIN, COMMIT and PRAGMA have no plan worth keeping
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(sql: str) -> str:
+    """Reduces a statement to its template by replacing literal values with ?
+
+    The trace callback sees statements with their parameters already bound,
+    so "WHERE id = 3" and "WHERE id = 4" have to be folded back together.
+
+    Args:
+        sql (str): the statement as traced
+
+    Returns:
+        str: the statement with literals replaced, IN lists collapsed and whitespace squeezed
+
+    """
+    template = _STRING_LITERAL.sub("?", sql)
+    template = _NUMBER_LITERAL.sub("?", template)
+    template = _IN_LIST.sub("IN (...)", template)
+    return _WHITESPACE.sub(" ", template).strip()
+
+
+class _ConnectionTrace:
+    """The statement currently running on one traced connection
+
+    The trace callback only says which statement is running. Its time is what
+    TimedCursor and TimedConnection measure inside execute, the fetches and
+    commit, so application work between fetching rows is not charged to it.
+    Fetches are charged to the statement traced last on the connection, and a
+    call that runs several statements, like executemany, is split at each
+    trace callback so every execution gets its own time.
+    """
+
+    def __init__(self, profiler: "SqlProfiler", conn: sqlite3.Connection):
+        self.profiler = profiler
+        self.conn = conn
+        self._sql: Optional[str] = None
+        self._seconds = 0.0
+        self._steps = 0
+        # Clock reading the running block is charged from, and whether a
+        # statement has been traced since the block started
+        self._mark: Optional[float] = None
+        self._traced_in_block = False
+        # Slow statements are explained once the connection is free again
+        self._slow: dict[str, str] = {}
+
+        conn.set_trace_callback(self._on_statement)
+        conn.set_progress_handler(self._on_progress, profiler.progress_steps)
+        conn.sql_trace = self
+
+    def _on_statement(self, sql: str) -> None:
+        if self._mark is not None:
+            if self._traced_in_block:
+                now = self.profiler.clock()
+                self._seconds += now - self._mark
+                self._mark = now
+            # The block's first statement keeps the mark, so the time spent
+            # preparing it before the callback is charged to it
+            self._traced_in_block = True
+        self._finish()
+        self._sql = sql
+        self._seconds = 0.0
+        self._steps = 0
+
+    def _on_progress(self) -> int:
+        self._steps += 1
+        # Anything but 0 would interrupt the statement
+        return 0
+
+    @contextmanager
+    def running(self) -> Iterator[None]:
+        """Charges the time spent in the block to the statements traced in it, or to the one traced last
+
+        """
+        self._mark = self.profiler.clock()
+        self._traced_in_block = False
+        try:
+            yield
+        finally:
+            self._seconds += self.profiler.clock() - self._mark
+            self._mark = None
+
+    def _finish(self) -> None:
+        if self._sql is None:
+            return
+        template = self.profiler.record(self._sql, self._seconds, self._steps * self.profiler.progress_steps)
+        if template is not None:
+            self._slow.setdefault(template, self._sql)
+        self._sql = None
+
+    def close(self) -> None:
+        """Stops tracing the connection and explains any slow statements it ran
+
+        """
+        self._finish()
+        self.conn.sql_trace = None
+        self.conn.set_trace_callback(None)
+        self.conn.set_progress_handler(None, 0)
+
+        for template, sql in self._slow.items():
+            if self.profiler.needs_plan(template):
+                self.profiler.set_plan(template, explain(self.conn, sql))
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> list[str]:
+    """Runs EXPLAIN QUERY PLAN for a statement
+
+    Args:
+        conn (sqlite3.Connection): the connection the statement ran on
+        sql (str): the statement with its values inlined
+
+    Returns:
+        list[str]: one line per plan step, indented under its parent; empty if it cannot be explained
+
+    """
+    try:
+        # A plain cursor keeps the EXPLAIN out of the request's SQL timing
+        rows = conn.cursor(sqlite3.Cursor).execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    except sqlite3.Error as e:
+        logger.warning("Could not explain statement: %s", str(e))
+        return []
+
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+class SqlProfiler:
+    """Per-statement-template counts, time and SQLite VM steps
+
+    While enabled, every connection handed out by get_db_connection gets a
+    trace callback and a progress handler, and its TimedCursors report how long
+    each statement spent in SQLite. While disabled, get_db_connection only
+    checks the enabled flag.
+
+    Attributes:
+        enabled (bool): whether new connections are traced
+        slow_ms (float): statements slower than this get a query plan
+        progress_steps (int): VM instructions between progress handler calls
+        max_templates (int): distinct templates tracked before lumping the rest together
+    """
+
+    def __init__(self, enabled: bool = False, slow_ms: float = SQL_PROFILE_SLOW_MS,
+                 progress_steps: int = SQL_PROFILE_PROGRESS_STEPS, max_templates: int = SQL_PROFILE_MAX_TEMPLATES,
+                 clock=time.perf_counter):
+        if progress_steps < 1:
+            raise ValueError(f"Invalid progress steps: {progress_steps}. Must be at least 1.")
+
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.progress_steps = progress_steps
+        self.max_templates = max_templates
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._templates: dict[str, dict[str, Any]] = {}
+        self._since = time.time()
+
+    def enable(self) -> None:
+        """Traces connections handed out from now on
+
+        """
+        self.enabled = True
+        logger.info("SQL profiling enabled (slow statements over %.1f ms are explained)", self.slow_ms)
+
+    def disable(self) -> None:
+        """Stops tracing new connections; connections already checked out finish their trace
+
+        """
+        self.enabled = False
+        logger.info("SQL profiling disabled")
+
+    def reset(self) -> None:
+        """Forgets everything recorded so far
+
+        """
+        with self._lock:
+            self._templates.clear()
+            self._since = time.time()
+        logger.info("SQL profile reset")
+
+    def trace(self, conn: sqlite3.Connection) -> Optional[_ConnectionTrace]:
+        """Starts tracing a connection if profiling is enabled
+
+        Args:
+            conn (TimedConnection): the connection about to be used
+
+        Returns:
+            _ConnectionTrace: call close() on it before the connection is given back, or None when disabled
+
+        """
+        if not self.enabled:
+            return None
+        return _ConnectionTrace(self, conn)
+
+    def record(self, sql: str, seconds: float, steps: int) -> Optional[str]:
+        """Adds one finished statement to its template's totals
+
+        Args:
+            sql (str): the statement as traced
+            seconds (float): time spent executing it and fetching its rows
+            steps (int): VM instructions it executed, to the nearest progress_steps
+
+        Returns:
+            str: the template when the statement was slow and the template has no plan yet, otherwise None
+
+        """
+        template = normalize_statement(sql)
+        with self._lock:
+            stats = self._templates.get(template)
+            if stats is None:
+                if len(self._templates) >= self.max_templates:
+                    template = OTHER_TEMPLATE
+                stats = self._templates.setdefault(template, {
+                    "count": 0, "total_time": 0.0, "max_time": 0.0, "vm_steps": 0, "slow": 0, "plan": None,
+                })
+            stats["count"] += 1
+            stats["total_time"] += seconds
+            stats["max_time"] = max(stats["max_time"], seconds)
+            stats["vm_steps"] += steps
+
+            if seconds * 1000 < self.slow_ms:
+                return None
+            stats["slow"] += 1
+            needs_plan = stats["plan"] is None and template != OTHER_TEMPLATE
+        if needs_plan and template.upper().startswith(EXPLAINABLE):
+            return template
+        return None
+
+    def needs_plan(self, template: str) -> bool:
+        with self._lock:
+            stats = self._templates.get(template)
+            return stats is not None and stats["plan"] is None
+
+    def set_plan(self, template: str, plan: list[str]) -> None:
+        with self._lock:
+            stats = self._templates.get(template)
+            if stats is not None:
+                stats["plan"] = plan
+
+    def get_report(self, limit: Optional[int] = None) -> dict[str, Any]:
+        """Returns the templates that took the most time, slowest total first
+
+        Args:
+            limit (int, optional): most templates to include
+
+        Returns:
+            dict: enabled, since (epoch seconds), slow_ms, statements, total_ms and
+            templates (count, total_ms, avg_ms, max_ms, vm_steps, slow and plan per template)
+
+        Raises:
+            ValueError: If limit is less than 1.
+
+        """
+        if limit is not None and limit < 1:
+            raise ValueError(f"Invalid limit: {limit}. Must be at least 1.")
+
+        with self._lock:
+            templates = [(template, dict(stats)) for template, stats in self._templates.items()]
+            since = self._since
+
+        templates.sort(key=lambda item: item[1]["total_time"], reverse=True)
+        report = {
+            "enabled": self.enabled,
+            "since": round(since, 3),
+            "slow_ms": self.slow_ms,
+            "statements": sum(stats["count"] for _, stats in templates),
+            "total_ms": round(sum(stats["total_time"] for _, stats in templates) * 1000, 3),
+            "templates": [],
+        }
+        for template, stats in templates[:limit]:
+            report["templates"].append({
+                "template": template,
+                "count": stats["count"],
+                "total_ms": round(stats["total_time"] * 1000, 3),
+                "avg_ms": round(stats["total_time"] * 1000 / stats["count"], 3),
+                "max_ms": round(stats["max_time"] * 1000, 3),
+                "vm_steps": stats["vm_steps"],
+                "slow": stats["slow"],
+                "plan": stats["plan"],
+            })
+        return report
+
+
+SQL_PROFILER = SqlProfiler(enabled=SQL_PROFILE)
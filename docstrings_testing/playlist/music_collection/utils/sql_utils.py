@@ -2,8 +2,12 @@ from contextlib import contextmanager
 import logging
 import os
 import sqlite3
+from typing import Optional
 
 from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import DB_CONNECTIONS_OPENED
+from music_collection.utils.request_timing import TimedConnection
+from music_collection.utils.sql_profiler import SQL_PROFILER
 
 
 logger = logging.getLogger(__name__)
@@ -13,6 +17,86 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/song_catalog.db")
 
+# Connection-initialization profiles. "wal" lets readers proceed while a
+# play-count write is in progress; "legacy" keeps SQLite's defaults
+# (rollback journal), mainly for before/after benchmarks.
+PRAGMA_PROFILES = {
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,  # milliseconds
+        "cache_size": -16000,  # negative means KiB, so 16 MB
+        "mmap_size": 67108864,  # 64 MB
+        "temp_store": "MEMORY",
+    },
+    "legacy": {},
+}
+
+DB_PRAGMA_PROFILE = os.getenv("DB_PRAGMA_PROFILE", "wal")
+
+# Individual settings can be overridden with DB_PRAGMA_<NAME>, e.g. DB_PRAGMA_BUSY_TIMEOUT=10000
+PRAGMA_NAMES = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")
+
+
+def get_pragmas(profile: Optional[str] = None) -> dict:
+    """Build the PRAGMA settings for a profile, applying environment overrides
+
+    Args:
+        profile (str, optional): The profile name. Defaults to DB_PRAGMA_PROFILE.
+
+    Returns:
+        dict: PRAGMA name to value.
+
+    Raises:
+        ValueError: If the profile or an override is invalid.
+    """
+    profile = profile or DB_PRAGMA_PROFILE
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Invalid PRAGMA profile: {profile}. Must be one of {', '.join(PRAGMA_PROFILES)}.")
+
+    pragmas = dict(PRAGMA_PROFILES[profile])
+    for name in PRAGMA_NAMES:
+        override = os.getenv(f"DB_PRAGMA_{name.upper()}")
+        if override is not None:
+            pragmas[name] = override
+
+    for name, value in pragmas.items():
+        # Values are interpolated into the PRAGMA statement, so only allow plain tokens
+        if not str(value).lstrip("-").isalnum():
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value}")
+    return pragmas
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: dict) -> None:
+    """Apply PRAGMA settings to an open connection
+
+    Args:
+        conn (sqlite3.Connection): The connection to configure.
+        pragmas (dict): PRAGMA name to value.
+    """
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def connect(db_path: Optional[str] = None, profile: Optional[str] = None) -> sqlite3.Connection:
+    """Open a connection to the catalog database with the PRAGMA profile applied
+
+    Args:
+        db_path (str, optional): The database file. Defaults to DB_PATH.
+        profile (str, optional): The PRAGMA profile. Defaults to DB_PRAGMA_PROFILE.
+
+    Returns:
+        sqlite3.Connection: The configured connection.
+    """
+    conn = sqlite3.connect(db_path or DB_PATH, factory=TimedConnection)
+    DB_CONNECTIONS_OPENED.inc()
+    try:
+        apply_pragmas(conn, get_pragmas(profile))
+    except (sqlite3.Error, ValueError):
+        conn.close()
+        raise
+    return conn
+
 
 def check_database_connection():
     """Check the database connection
@@ -21,7 +105,7 @@ def check_database_connection():
         Exception: If the database connection is not OK
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
         cursor = conn.cursor()
         # This ensures the connection is actually active
         cursor.execute("SELECT 1;")
@@ -41,7 +125,7 @@ def check_table_exists(tablename: str):
         Exception: If the table does not exist
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute(f"SELECT 1 FROM {tablename} LIMIT 1;")
         conn.close()
@@ -55,17 +139,24 @@ def get_db_connection():
     """
     Context manager for SQLite database connection.
 
+    The connection is configured with the DB_PRAGMA_PROFILE settings. While
+    SQL profiling is on, the statements run on it are traced until it closes.
+
     Yields:
         sqlite3.Connection: The SQLite connection object.
     """
     conn = None
+    trace = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
+        trace = SQL_PROFILER.trace(conn)
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
+        if trace:
+            trace.close()
         if conn:
             conn.close()
             logger.info("Database connection closed.")
@@ -0,0 +1,8 @@
+-- Partial indexes over the non-deleted catalog. Queries must filter with
+-- exactly "deleted = FALSE" for SQLite to pick them.
+
+-- get_all_songs(sort_by_play_count=True) reads this in order instead of sorting.
+CREATE INDEX IF NOT EXISTS idx_songs_play_count ON songs(play_count DESC, id) WHERE deleted = FALSE;
+
+-- get_random_song seeks this small index instead of the table.
+CREATE INDEX IF NOT EXISTS idx_songs_active ON songs(id) WHERE deleted = FALSE;
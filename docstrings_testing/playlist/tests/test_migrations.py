@@ -0,0 +1,76 @@
+import os
+import sqlite3
+
+import pytest
+
+from music_collection.utils.migrations import get_schema_version, load_migrations, run_migrations
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "sql", "migrations")
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "song_catalog.db")
+
+######################################################
+#
+#    Migrations
+#
+######################################################
+
+def test_run_migrations_fresh_database(db_path):
+    """Test building a new database from the migrations."""
+    applied = run_migrations(db_path, MIGRATIONS_DIR)
+
+    conn = sqlite3.connect(db_path)
+    assert applied == [version for version, _, _ in load_migrations(MIGRATIONS_DIR)]
+    assert get_schema_version(conn) == applied[-1]
+
+def test_run_migrations_is_idempotent(db_path):
+    """Test that a second run applies nothing."""
+    run_migrations(db_path, MIGRATIONS_DIR)
+    assert run_migrations(db_path, MIGRATIONS_DIR) == []
+
+def test_run_migrations_keeps_existing_data(db_path):
+    """Test upgrading a database that already holds songs."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE songs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            artist TEXT NOT NULL,
+            title TEXT NOT NULL,
+            year INTEGER NOT NULL CHECK(year >= 1900),
+            genre TEXT NOT NULL,
+            duration INTEGER NOT NULL CHECK(duration > 0),
+            play_count INTEGER DEFAULT 0,
+            deleted BOOLEAN DEFAULT FALSE,
+            UNIQUE(artist, title, year)
+        )
+    """)
+    conn.execute("INSERT INTO songs (artist, title, year, genre, duration) VALUES ('A', 'B', 2000, 'Pop', 100)")
+    conn.commit()
+    conn.close()
+
+    run_migrations(db_path, MIGRATIONS_DIR)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT artist, title FROM songs").fetchall() == [("A", "B")]
+
+@pytest.mark.parametrize("query, index", [
+    ("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE ORDER BY play_count DESC", "idx_songs_play_count"),
+    ("SELECT COUNT(*) FROM songs WHERE deleted = FALSE", "idx_songs_active"),
+])
+def test_hot_queries_use_indexes(db_path, query, index):
+    """Test that the catalog's hot queries are served by the partial indexes."""
+    run_migrations(db_path, MIGRATIONS_DIR)
+    conn = sqlite3.connect(db_path)
+
+    plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query))
+    assert index in plan, f"Expected {index} in plan, got {plan}"
+    assert "TEMP B-TREE" not in plan
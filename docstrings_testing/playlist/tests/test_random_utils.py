@@ -1,20 +1,54 @@
 import pytest
 import requests
 
-from music_collection.utils.random_utils import get_random
+from music_collection.utils import random_utils
+from music_collection.utils.circuit_breaker import CircuitBreaker
+from music_collection.utils.random_org_stub import start_stub_server
+from music_collection.utils.random_utils import (
+    LocalSource,
+    RandomOrgSource,
+    RandomSource,
+    SeededSource,
+    create_random_source,
+    get_random,
+    get_random_org_status,
+    set_random_source,
+)
 
 
 RANDOM_NUMBER = 42
 NUM_SONGS = 100
 
+@pytest.fixture(autouse=True)
+def random_org_source(mocker):
+    # Every test starts from the default random.org source
+    source = RandomOrgSource()
+    mocker.patch.object(random_utils, "_source", source)
+    return source
+
+@pytest.fixture(autouse=True)
+def breaker(mocker):
+    # Fresh circuit breaker per test, and no backoff delay between retries
+    breaker = CircuitBreaker("random.org", failure_threshold=2, reset_timeout=60)
+    mocker.patch.object(random_utils, "_breaker", breaker)
+    mocker.patch.object(random_utils, "RANDOM_ORG_BACKOFF", 0)
+    return breaker
+
+@pytest.fixture
+def stub_server():
+    server = start_stub_server(seed=7)
+    yield server
+    server.shutdown()
+    server.server_close()
+
 @pytest.fixture
 def mock_random_org(mocker):
-    # Patch the requests.get call
-    # requests.get returns an object, which we have replaced with a mock object
+    # Patch the shared session's get call
+    # _session.get returns an object, which we have replaced with a mock object
     mock_response = mocker.Mock()
     # We are giving that object a text attribute
     mock_response.text = f"{RANDOM_NUMBER}"
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch.object(random_utils._session, "get", return_value=mock_response)
     return mock_response
 
 
@@ -26,18 +60,18 @@ def test_get_random(mock_random_org):
     assert result == RANDOM_NUMBER, f"Expected random number {RANDOM_NUMBER}, but got {result}"
 
     # Ensure that the correct URL was called
-    requests.get.assert_called_once_with("https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new", timeout=5)
+    random_utils._session.get.assert_called_once_with("https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new", timeout=2)
 
 def test_get_random_request_failure(mocker):
     """Simulate  a request failure."""
-    mocker.patch("requests.get", side_effect=requests.exceptions.RequestException("Connection error"))
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.RequestException("Connection error"))
 
     with pytest.raises(RuntimeError, match="Request to random.org failed: Connection error"):
         get_random(NUM_SONGS)
 
 def test_get_random_timeout(mocker):
     """Simulate  a timeout."""
-    mocker.patch("requests.get", side_effect=requests.exceptions.Timeout)
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.Timeout)
 
     with pytest.raises(RuntimeError, match="Request to random.org timed out."):
         get_random(NUM_SONGS)
@@ -47,4 +81,132 @@ def test_get_random_invalid_response(mock_random_org):
     mock_random_org.text = "invalid_response"
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random(NUM_SONGS)
\ No newline at end of file
+        get_random(NUM_SONGS)
+
+def test_seeded_source_is_reproducible():
+    """Two seeded sources produce the same sequence."""
+    first = SeededSource(42)
+    second = SeededSource(42)
+
+    draws = [first.get_random(NUM_SONGS) for _ in range(10)]
+    assert draws == [second.get_random(NUM_SONGS) for _ in range(10)]
+    assert all(1 <= draw <= NUM_SONGS for draw in draws)
+
+def test_local_source_range():
+    """The CSPRNG source stays within [1, num_songs]."""
+    source = LocalSource()
+    assert {source.get_random(3) for _ in range(200)} == {1, 2, 3}
+
+def test_incomplete_source_cannot_be_created():
+    """A source without get_random fails when it is built."""
+    class NoDrawSource(RandomSource):
+        name = "no_draw"
+
+    with pytest.raises(TypeError, match="abstract method"):
+        NoDrawSource()
+
+def test_create_random_source():
+    """Sources can be built by name."""
+    assert isinstance(create_random_source("random_org"), RandomOrgSource)
+    assert isinstance(create_random_source("local"), LocalSource)
+    assert create_random_source("seeded", seed=3).seed == 3
+
+def test_create_random_source_invalid():
+    """Unknown source names are rejected."""
+    with pytest.raises(ValueError, match="Invalid random source: dice"):
+        create_random_source("dice")
+
+def test_set_random_source(mocker):
+    """get_random draws from the active source without calling random.org."""
+    set_random_source(SeededSource(1))
+    expected = SeededSource(1).get_random(NUM_SONGS)
+
+    mocker.patch.object(random_utils._session, "get", side_effect=AssertionError("random.org must not be called"))
+    assert get_random(NUM_SONGS) == expected
+
+def test_random_org_source_against_stub(stub_server):
+    """The random.org source works end to end against the local stand-in."""
+    source = RandomOrgSource(base_url=stub_server.url)
+    assert all(1 <= source.get_random(5) <= 5 for _ in range(5))
+
+def test_get_random_retries_transient_failure(mock_random_org):
+    """A timeout is retried on the shared session."""
+    random_utils._session.get.side_effect = [requests.exceptions.Timeout, mock_random_org]
+
+    assert get_random(NUM_SONGS) == RANDOM_NUMBER
+    assert random_utils._session.get.call_count == 2
+
+def test_failed_attempts_count_toward_breaker(mocker):
+    """An outage opens the circuit within a single call's retries."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_RETRIES", 5)
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.ConnectionError("down"))
+
+    with pytest.raises(RuntimeError, match="Request to random.org failed: down"):
+        get_random(NUM_SONGS)
+
+    assert random_utils._session.get.call_count == 2
+    assert get_random_org_status()["circuit_breaker"]["state"] == "open"
+
+def test_retries_stop_at_deadline(mocker):
+    """No retry starts once the call has used up its deadline."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_RETRIES", 5)
+    mocker.patch.object(random_utils, "RANDOM_ORG_DEADLINE", 5)
+    mocker.patch.object(random_utils, "_breaker", CircuitBreaker("random.org", failure_threshold=10))
+    clock = [100.0]
+    mocker.patch.object(random_utils.time, "monotonic", side_effect=lambda: clock[0])
+    timeouts = []
+
+    def slow_timeout(url, timeout):
+        # Each attempt uses up its whole timeout
+        timeouts.append(timeout)
+        clock[0] += timeout
+        raise requests.exceptions.Timeout
+
+    mocker.patch.object(random_utils._session, "get", side_effect=slow_timeout)
+
+    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
+        get_random(NUM_SONGS)
+    assert timeouts == [2, 2, 1]
+
+def test_circuit_opens_and_fails_fast(mocker):
+    """Repeated failures open the circuit and later calls skip the network."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_RETRIES", 0)
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.ConnectionError("down"))
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="Request to random.org failed: down"):
+            get_random(NUM_SONGS)
+
+    with pytest.raises(RuntimeError, match="random.org circuit breaker is open, failing fast."):
+        get_random(NUM_SONGS)
+
+    assert random_utils._session.get.call_count == 2
+    assert get_random_org_status()["circuit_breaker"]["state"] == "open"
+
+@pytest.mark.parametrize("body, error", [
+    ("invalid_response", "Invalid response from random.org: invalid_response"),
+    (ValueError("bad body"), "bad body"),
+])
+def test_half_open_trial_always_settles(mocker, body, error):
+    """A trial call failing with anything but a RequestException still re-opens the breaker."""
+    breaker = CircuitBreaker("random.org", failure_threshold=1, reset_timeout=0)
+    mocker.patch.object(random_utils, "_breaker", breaker)
+    breaker.record_failure()
+    if isinstance(body, Exception):
+        mocker.patch.object(random_utils._session, "get", side_effect=body)
+    else:
+        mocker.patch.object(random_utils._session, "get", return_value=mocker.Mock(text=body))
+
+    with pytest.raises(ValueError, match=error):
+        get_random(NUM_SONGS)
+
+    assert breaker.get_state()["state"] == "open"
+    assert breaker.allow_request(), "the trial slot was never released"
+
+def test_random_org_source_falls_back(mocker):
+    """A random.org source with a fallback keeps serving numbers."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_RETRIES", 0)
+    mocker.patch.object(random_utils._session, "get", side_effect=requests.exceptions.ConnectionError("down"))
+    source = RandomOrgSource(fallback=SeededSource(5))
+
+    assert source.get_random(NUM_SONGS) == SeededSource(5).get_random(NUM_SONGS)
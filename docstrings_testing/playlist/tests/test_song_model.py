@@ -11,7 +11,9 @@ from music_collection.models.song_model import (
     get_song_by_id,
     get_song_by_compound_key,
     get_all_songs,
+    get_max_song_id,
     get_random_song,
+    get_song_at_or_after,
     update_play_count
 )
 
@@ -315,55 +317,82 @@ def test_get_all_songs_ordered_by_play_count(mock_cursor):
 def test_get_random_song(mock_cursor, mocker):
     """Test retrieving a random song from the catalog."""
 
-    # Simulate that there are multiple songs in the database
-    mock_cursor.fetchall.return_value = [
-        (1, "Artist A", "Song A", 2020, "Rock", 210, 10),
-        (2, "Artist B", "Song B", 2021, "Pop", 180, 20),
-        (3, "Artist C", "Song C", 2022, "Jazz", 200, 5)
+    # Simulate a largest id of 3, then the first song at or after the chosen id
+    mock_cursor.fetchone.side_effect = [
+        (3,),
+        (2, "Artist B", "Song B", 2021, "Pop", 180)
     ]
 
-    # Mock random number generation to return the 2nd song
+    # Mock random number generation to return id 2
     mock_random = mocker.patch("music_collection.models.song_model.get_random", return_value=2)
 
     # Call the get_random_song method
     result = get_random_song()
 
-    # Expected result based on the mock random number and fetchall return value
+    # Expected result based on the mock random number and fetchone return value
     expected_result = Song(2, "Artist B", "Song B", 2021, "Pop", 180)
 
     # Ensure the result matches the expected output
     assert result == expected_result, f"Expected {expected_result}, got {result}"
 
-    # Ensure that the random number was called with the correct number of songs
+    # Ensure that the random number was drawn up to the largest id
     mock_random.assert_called_once_with(3)
 
-    # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    # Ensure only the largest id and a single row were queried
+    expected_max_query = normalize_whitespace("SELECT MAX(id) FROM songs")
+    actual_max_query = normalize_whitespace(mock_cursor.execute.call_args_list[0][0][0])
+    assert actual_max_query == expected_max_query, "The largest id query did not match the expected structure."
 
-    # Assert that the SQL query was correct
+    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration FROM songs WHERE deleted = FALSE AND id >= ? ORDER BY id LIMIT 1")
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args_list[1][0][0])
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert mock_cursor.execute.call_args_list[1][0][1] == (2,)
+
+    # Ensure the whole catalog was never fetched
+    mock_cursor.fetchall.assert_not_called()
 
 def test_get_random_song_empty_catalog(mock_cursor, mocker):
     """Test retrieving a random song when the catalog is empty."""
 
-    # Simulate that the catalog is empty
-    mock_cursor.fetchall.return_value = []
+    # Simulate that the catalog has never held a song
+    mock_cursor.fetchone.return_value = (None,)
+    mock_random = mocker.patch("music_collection.models.song_model.get_random")
 
     # Expect a ValueError to be raised when calling get_random_song with an empty catalog
     with pytest.raises(ValueError, match="The song catalog is empty"):
         get_random_song()
 
-    # Ensure that the random number was not called since there are no songs
-    mocker.patch("music_collection.models.song_model.get_random").assert_not_called()
+    # Ensure that the random number was not drawn since there are no songs
+    mock_random.assert_not_called()
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE")
+    expected_query = normalize_whitespace("SELECT MAX(id) FROM songs")
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
 
     # Assert that the SQL query was correct
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
+def test_get_max_song_id(mock_cursor):
+    """Test retrieving the largest song id."""
+    mock_cursor.fetchone.return_value = (42,)
+
+    assert get_max_song_id() == 42
+
+def test_get_song_at_or_after_wraps_around(mock_cursor):
+    """Test that a seek past the last song wraps around to the lowest id."""
+    mock_cursor.fetchone.side_effect = [None, (1, "Artist A", "Song A", 2020, "Rock", 210)]
+
+    assert get_song_at_or_after(7) == Song(1, "Artist A", "Song A", 2020, "Rock", 210)
+    assert mock_cursor.execute.call_args_list[0][0][1] == (7,)
+    assert mock_cursor.execute.call_args_list[1][0][1] == (0,)
+
+def test_get_song_at_or_after_all_deleted(mock_cursor):
+    """Test error when every song has been deleted (e.g., deleted in between)."""
+    mock_cursor.fetchone.return_value = None
+
+    with pytest.raises(ValueError, match="The song catalog is empty"):
+        get_song_at_or_after(5)
+
 def test_update_play_count(mock_cursor):
     """Test updating the play count of a song."""
 
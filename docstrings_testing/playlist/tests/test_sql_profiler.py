@@ -0,0 +1,159 @@
+import os
+import sqlite3
+
+import pytest
+
+from music_collection.utils.migrations import run_migrations
+from music_collection.utils.request_timing import TimedConnection
+from music_collection.utils.sql_profiler import OTHER_TEMPLATE, SqlProfiler, normalize_statement
+from music_collection.utils import sql_utils
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "sql", "migrations")
+
+@pytest.fixture
+def db_conn(tmp_path):
+    """A connection to a real database built from the migrations"""
+    db_path = str(tmp_path / "song_catalog.db")
+    run_migrations(db_path, MIGRATIONS_DIR)
+    conn = sqlite3.connect(db_path, factory=TimedConnection)
+    yield conn
+    conn.close()
+
+def test_normalize_statement():
+    """Test that bound values are folded back into placeholders"""
+    sql = "SELECT id FROM songs WHERE artist = 'Guns N'' Roses'  AND year >= 1987\n AND id IN (1, 2, 3) AND duration > -1.5"
+
+    assert normalize_statement(sql) == "SELECT id FROM songs WHERE artist = ? AND year >= ? AND id IN (...) AND duration > ?"
+
+def test_trace_aggregates_by_template(db_conn):
+    """Test that statements differing only in their values share one template"""
+    profiler = SqlProfiler(enabled=True, slow_ms=1000)
+    trace = profiler.trace(db_conn)
+    for song_id in (1, 2, 3):
+        db_conn.execute("SELECT title FROM songs WHERE id = ?", (song_id,)).fetchall()
+    trace.close()
+
+    report = profiler.get_report()
+    template = report["templates"][0]
+    assert report["statements"] == 3
+    assert template["template"] == "SELECT title FROM songs WHERE id = ?"
+    assert template["count"] == 3
+    assert template["slow"] == 0
+    assert template["plan"] is None
+
+def test_slow_statement_is_explained(db_conn):
+    """Test that a statement over the threshold gets its query plan recorded once"""
+    profiler = SqlProfiler(enabled=True, slow_ms=0)
+    trace = profiler.trace(db_conn)
+    db_conn.execute("SELECT title FROM songs WHERE id = ?", (1,)).fetchall()
+    db_conn.execute("SELECT title FROM songs WHERE id = ?", (2,)).fetchall()
+    trace.close()
+
+    template = profiler.get_report()["templates"][0]
+    assert template["slow"] == 2
+    assert template["plan"] == ["SEARCH songs USING INTEGER PRIMARY KEY (rowid=?)"]
+
+def test_only_time_inside_sqlite_is_charged(db_conn):
+    """Test that work the application does between fetches is not charged to the statement"""
+    now = [0.0]
+
+    def clock():
+        # Every reading is a millisecond after the last
+        now[0] += 0.001
+        return now[0]
+
+    profiler = SqlProfiler(enabled=True, slow_ms=1000, clock=clock)
+    trace = profiler.trace(db_conn)
+    cursor = db_conn.execute("SELECT title FROM songs")
+    now[0] += 10
+    cursor.fetchall()
+    db_conn.execute("SELECT 1").fetchone()
+    trace.close()
+
+    templates = {template["template"]: template["total_ms"] for template in profiler.get_report()["templates"]}
+    assert templates == {"SELECT title FROM songs": pytest.approx(2.0), "SELECT ?": pytest.approx(2.0)}
+
+def test_executemany_time_is_split_across_executions(db_conn):
+    """Test that each execution of an executemany is charged its own time, not the last one all of it"""
+    now = [0.0]
+
+    def clock():
+        # Every reading is a millisecond after the last
+        now[0] += 0.001
+        return now[0]
+
+    profiler = SqlProfiler(enabled=True, slow_ms=1000, clock=clock)
+    trace = profiler.trace(db_conn)
+    db_conn.executemany("UPDATE songs SET play_count = play_count + 1 WHERE id = ?", [(1,), (2,), (3,)])
+    trace.close()
+
+    template = profiler.get_report()["templates"][0]
+    assert template["count"] == 3
+    assert template["total_ms"] == pytest.approx(3.0)
+    assert template["max_ms"] == pytest.approx(1.0)
+
+def test_progress_handler_counts_vm_steps(db_conn):
+    """Test that work done inside SQLite is counted per statement"""
+    profiler = SqlProfiler(enabled=True, progress_steps=10)
+    trace = profiler.trace(db_conn)
+    db_conn.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000) SELECT count(*) FROM n").fetchone()
+    trace.close()
+
+    assert profiler.get_report()["templates"][0]["vm_steps"] >= 1000
+
+def test_close_stops_tracing(db_conn):
+    """Test that statements after the trace is closed are not recorded"""
+    profiler = SqlProfiler(enabled=True)
+    profiler.trace(db_conn).close()
+    db_conn.execute("SELECT 1").fetchone()
+
+    assert profiler.get_report()["statements"] == 0
+
+def test_disabled_profiler_does_not_trace(db_conn):
+    """Test that a disabled profiler leaves connections alone"""
+    profiler = SqlProfiler(enabled=False)
+
+    assert profiler.trace(db_conn) is None
+
+def test_templates_are_bounded(db_conn):
+    """Test that templates past the limit are lumped together"""
+    profiler = SqlProfiler(enabled=True, max_templates=1)
+    profiler.record("SELECT 1", 0.001, 0)
+    profiler.record("SELECT title FROM songs", 0.001, 0)
+    profiler.record("SELECT artist FROM songs", 0.001, 0)
+
+    templates = {template["template"]: template["count"] for template in profiler.get_report()["templates"]}
+    assert templates == {"SELECT ?": 1, OTHER_TEMPLATE: 2}
+
+def test_reset_and_report_limit():
+    """Test clearing the profile and limiting the report"""
+    profiler = SqlProfiler()
+    profiler.record("SELECT 1", 0.002, 0)
+    profiler.record("SELECT title FROM songs", 0.001, 0)
+
+    assert [template["template"] for template in profiler.get_report(limit=1)["templates"]] == ["SELECT ?"]
+    with pytest.raises(ValueError, match="Invalid limit: 0. Must be at least 1."):
+        profiler.get_report(limit=0)
+
+    profiler.reset()
+    assert profiler.get_report()["templates"] == []
+
+def test_get_db_connection_traces_when_enabled(mocker, tmp_path):
+    """Test that connections are traced only while profiling is on"""
+    db_path = str(tmp_path / "song_catalog.db")
+    profiler = SqlProfiler()
+    mocker.patch("music_collection.utils.sql_utils.connect", side_effect=lambda: sqlite3.connect(db_path, factory=TimedConnection))
+    mocker.patch("music_collection.utils.sql_utils.SQL_PROFILER", profiler)
+
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("SELECT 1").fetchone()
+    profiler.enable()
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("SELECT 2").fetchone()
+    profiler.disable()
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("SELECT 3").fetchone()
+
+    report = profiler.get_report()
+    assert report["statements"] == 1
+    assert report["templates"][0]["template"] == "SELECT ?"
@@ -0,0 +1,46 @@
+import pytest
+
+from music_collection.utils.sql_utils import connect, get_pragmas
+
+
+######################################################
+#
+#    PRAGMA profiles
+#
+######################################################
+
+def test_connect_applies_wal_profile(tmp_path):
+    """Test that new connections use WAL and the tuned settings."""
+    conn = connect(str(tmp_path / "catalog.db"), "wal")
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+def test_connect_legacy_profile_keeps_defaults(tmp_path):
+    """Test that the legacy profile leaves SQLite's rollback journal in place."""
+    conn = connect(str(tmp_path / "catalog.db"), "legacy")
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+def test_get_pragmas_env_override(monkeypatch):
+    """Test overriding a single PRAGMA from the environment."""
+    monkeypatch.setenv("DB_PRAGMA_BUSY_TIMEOUT", "10000")
+
+    pragmas = get_pragmas("wal")
+
+    assert pragmas["busy_timeout"] == "10000"
+    assert pragmas["journal_mode"] == "WAL"
+
+def test_get_pragmas_invalid_profile():
+    """Test error when asking for an unknown profile."""
+    with pytest.raises(ValueError, match="Invalid PRAGMA profile: turbo"):
+        get_pragmas("turbo")
+
+def test_get_pragmas_rejects_injection(monkeypatch):
+    """Test that override values cannot smuggle in extra SQL."""
+    monkeypatch.setenv("DB_PRAGMA_CACHE_SIZE", "1; DROP TABLE songs")
+
+    with pytest.raises(ValueError, match="Invalid value for PRAGMA cache_size"):
+        get_pragmas("wal")